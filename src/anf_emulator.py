@@ -0,0 +1,474 @@
+# anf_emulator.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""anf_emulator.py code sample
+
+Local HTTP stand-in for the Microsoft.NetApp resource provider, serving the
+account, capacity pool, volume and snapshot routes used by example.py and
+sample_utils so that the real SDK HTTP stack (pipeline, retries, LRO polling,
+connection pooling) can be exercised and profiled offline.
+
+Notes:
+Creations and deletions answer with Azure-AsyncOperation and Location
+headers, are completed after a simulated provisioning delay and the
+resource state, latencies and throttling (429 with Retry-After) come from a
+fake_clients.Simulation. HEAD calls are answered with 405, as ARM does for
+subnets, and GET calls outside Microsoft.NetApp answer for the registered
+subnets (any subnet when none were registered). Connections are kept alive
+(HTTP/1.1) and counted, so connection reuse shows up in stats.
+
+Usage:
+python anf_emulator.py [--port 8080] [--provisioning-delay 5]
+    [--time-scale 1] [--read-rate 20] [--write-rate 2]
+
+with ANFEmulator() as emulator:
+    anf_client = NetAppManagementClient(credentials, subscription_id,
+                                        **emulator.client_kwargs())
+
+"""
+
+import argparse
+import json
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+from sample_utils import console_output
+import fake_clients
+import resource_uri_utils
+
+# Collection path segments and the kind of resource they hold
+COLLECTIONS = {
+    'netappaccounts': resource_uri_utils.KIND_ACCOUNT,
+    'capacitypools': resource_uri_utils.KIND_CAPACITY_POOL,
+    'volumes': resource_uri_utils.KIND_VOLUME,
+    'snapshots': resource_uri_utils.KIND_SNAPSHOT,
+}
+
+RESOURCE_TYPES = {
+    resource_uri_utils.KIND_ACCOUNT: 'Microsoft.NetApp/netAppAccounts',
+    resource_uri_utils.KIND_CAPACITY_POOL:
+        'Microsoft.NetApp/netAppAccounts/capacityPools',
+    resource_uri_utils.KIND_VOLUME:
+        'Microsoft.NetApp/netAppAccounts/capacityPools/volumes',
+    resource_uri_utils.KIND_SNAPSHOT:
+        'Microsoft.NetApp/netAppAccounts/capacityPools/volumes/snapshots',
+}
+
+# Seconds advertised in Retry-After while an operation is in progress
+DEFAULT_POLL_INTERVAL = 1
+
+
+def get_model_class(kind):
+    """Gets the SDK model class of an ANF resource kind"""
+
+    from azure.mgmt.netapp import models
+    return {resource_uri_utils.KIND_ACCOUNT: models.NetAppAccount,
+            resource_uri_utils.KIND_CAPACITY_POOL: models.CapacityPool,
+            resource_uri_utils.KIND_VOLUME: models.Volume,
+            resource_uri_utils.KIND_SNAPSHOT: models.Snapshot}[kind]
+
+
+def build_profile(provisioning_delay=None, time_scale=1.0, read_rate=20,
+                  write_rate=2, burst=50, retry_after=5, delete_lag=0,
+                  seed=None):
+    """Builds the simulation profile of an emulator
+
+    Resources are visible as soon as their creation completes, the SDK
+    fetches the final resource right after the operation succeeded.
+
+    Args:
+        provisioning_delay (float): Optional. Constant duration in seconds of
+            every creation and deletion, SimulationProfile defaults when None
+        time_scale (float): Optional. Wall-clock seconds per simulated second
+        read_rate (float): Optional. Sustained reads per second
+        write_rate (float): Optional. Sustained writes per second
+        burst (int): Optional. Calls allowed in a burst before throttling
+        retry_after (float): Optional. Retry-After of throttled calls
+        delete_lag (float): Optional. Seconds a deleted resource stays
+            visible
+        seed (int): Optional. Seed of the simulated latencies
+
+    Returns:
+        SimulationProfile: Returns the profile
+    """
+
+    defaults = fake_clients.SimulationProfile()
+    create_latency = defaults.create_latency
+    delete_latency = defaults.delete_latency
+    if provisioning_delay is not None:
+        constant = fake_clients.LatencyModel(provisioning_delay, 0)
+        create_latency = dict.fromkeys(create_latency, constant)
+        delete_latency = dict.fromkeys(delete_latency, constant)
+
+    return fake_clients.SimulationProfile(
+        create_latency=create_latency,
+        delete_latency=delete_latency,
+        visibility_delay=fake_clients.LatencyModel(0, 0),
+        delete_lag=fake_clients.LatencyModel(delete_lag, 0),
+        read_rate=read_rate,
+        write_rate=write_rate,
+        burst=burst,
+        retry_after=retry_after,
+        head_supported=False,
+        time_scale=time_scale,
+        seed=seed)
+
+
+class _Operation:
+    """Long running operation started by a PUT or DELETE"""
+
+    __slots__ = ('poller', 'resource_id', 'method', 'location')
+
+    def __init__(self, poller, resource_id, method, location):
+        self.poller = poller
+        self.resource_id = resource_id
+        self.method = method
+        self.location = location
+
+
+class _EmulatorRequestHandler(BaseHTTPRequestHandler):
+    """Routes the requests of one connection to the emulator"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ANFEmulator/1.0'
+
+    def setup(self):
+        super().setup()
+        self.server.emulator.count('connections')
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):
+        self.server.emulator.handle(self, 'GET')
+
+    def do_PUT(self):
+        self.server.emulator.handle(self, 'PUT')
+
+    def do_PATCH(self):
+        self.server.emulator.handle(self, 'PATCH')
+
+    def do_DELETE(self):
+        self.server.emulator.handle(self, 'DELETE')
+
+    def do_HEAD(self):
+        self.server.emulator.handle(self, 'HEAD')
+
+
+class ANFEmulator:
+    """Local HTTP server emulating the Microsoft.NetApp resource provider
+
+    Requests and responses are counted in stats: connections, requests per
+    method and responses per status code next to the simulation counters
+    (get, list, status, put, patch, delete, head, throttled).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, profile=None, subnets=None,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        self.profile = profile or build_profile()
+        self.simulation = fake_clients.Simulation(self.profile,
+                                                  retry_throttled=False)
+        self.subnets = {subnet_id.lower() for subnet_id in subnets or ()}
+        self.poll_interval = poll_interval
+        self._operations = {}
+        self._counters = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port),
+                                           _EmulatorRequestHandler)
+        self._server.daemon_threads = True
+        self._server.emulator = self
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        """string: Base URL of the emulator, e.g. http://127.0.0.1:8080"""
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    @property
+    def stats(self):
+        """dict: Request, response and simulation counters"""
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update(self.simulation.stats)
+        return stats
+
+    def count(self, counter):
+        """Increments one of the request counters"""
+
+        with self._lock:
+            self._counters[counter] += 1
+
+    def start(self):
+        """Starts serving on a background thread"""
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever,
+                                            name='anf-emulator', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the listening socket"""
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def client_kwargs(self):
+        """Gets the keyword arguments pointing a management client here
+
+        ARM bearer token authentication refuses plain HTTP URLs, so the
+        authentication policy is replaced by a no-op policy.
+
+        Returns:
+            dict: Returns base_url and authentication_policy entries
+        """
+
+        return {'base_url': self.url,
+                'authentication_policy': SansIOHTTPPolicy()}
+
+    def handle(self, request, method):
+        """Answers one request
+
+        Args:
+            request (BaseHTTPRequestHandler): Request being served
+            method (string): GET, PUT, PATCH, DELETE or HEAD
+        """
+
+        self.count(method)
+        path = urlsplit(request.path).path.rstrip('/')
+        body = None
+        length = int(request.headers.get('Content-Length') or 0)
+        if length:
+            body = json.loads(request.rfile.read(length) or b'null')
+
+        try:
+            status, payload, headers = self._route(request, method, path,
+                                                   body)
+        except Exception as ex: # pylint: disable=broad-except
+            status = getattr(ex, 'status_code', None) or 500
+            payload = {'error': {'code': request.responses.get(
+                status, ('Error',))[0].replace(' ', ''),
+                                 'message': str(ex)}}
+            headers = {}
+            if status == 429:
+                headers['Retry-After'] = str(self.profile.retry_after *
+                                             self.profile.time_scale)
+
+        self.count(str(status))
+        content = b''
+        if payload is not None and method != 'HEAD':
+            content = json.dumps(payload).encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        if content:
+            request.wfile.write(content)
+
+    def _route(self, request, method, path, body):
+        """Dispatches a request to its handler
+
+        Returns:
+            tuple: Returns status code, JSON payload and response headers
+        """
+
+        segments = path.strip('/').split('/')
+        lower_path = path.lower()
+
+        if '/providers/microsoft.netapp/locations/' in lower_path:
+            operation = self._get_operation(segments[-1])
+            if segments[-2].lower() == 'asyncoperations':
+                return self._get_operation_status(operation)
+            return self._get_operation_result(operation)
+
+        if method == 'HEAD':
+            self.simulation.call('head')
+            raise fake_clients.http_error(
+                405, 'The requested resource does not support http method '
+                'HEAD')
+
+        is_collection = len(segments) % 2 == 1
+        kind = COLLECTIONS.get(segments[-1].lower()) if is_collection \
+            else resource_uri_utils.parse_resource_id(path).kind
+
+        if kind is None:
+            return self._get_generic(method, path)
+        if is_collection:
+            return self._list(method, path, kind)
+        if method == 'GET':
+            return 200, self._serialize(self.simulation.get(path)), {}
+        if method == 'PUT':
+            return self._create(request, path, kind, body)
+        if method == 'PATCH':
+            return self._update(path, kind, body)
+        return self._delete(request, path)
+
+    def _get_generic(self, method, path):
+        """Answers resources outside Microsoft.NetApp, i.e. subnets"""
+
+        self.simulation.call('get')
+        if method == 'GET' and (not self.subnets or
+                                path.lower() in self.subnets):
+            return 200, {'id': path, 'name': path.rsplit('/', 1)[-1],
+                         'properties': fake_clients.get_subnet_properties(
+                             path)}, {}
+        raise fake_clients.http_error(
+            404 if method == 'GET' else 405,
+            'Resource {} not found'.format(path))
+
+    def _list(self, method, path, kind):
+        """Lists a collection"""
+
+        if method != 'GET':
+            raise fake_clients.http_error(
+                405, 'Method {} not allowed'.format(method))
+
+        parent_id = path.rsplit('/', 1)[0]
+        if kind == resource_uri_utils.KIND_ACCOUNT:
+            prefix = parent_id.rsplit('/providers/', 1)[0].lower() + '/'
+            resources = [resource for resource
+                         in self.simulation.list(None, kind)
+                         if resource.id.lower().startswith(prefix)]
+        else:
+            resources = self.simulation.list(parent_id, kind)
+
+        return 200, {'value': [self._serialize(resource)
+                               for resource in resources]}, {}
+
+    def _create(self, request, path, kind, body):
+        """Starts the creation or update of a resource"""
+
+        resource = get_model_class(kind).deserialize(body or {})
+        resource.type = RESOURCE_TYPES[kind]
+        poller = self.simulation.create(path, resource)
+
+        payload = self._serialize(poller.result(timeout=0))
+        payload.setdefault('properties', {})['provisioningState'] = \
+            'Succeeded' if poller.done() else 'Creating'
+        return 201, payload, self._start_operation(
+            request, poller, path, 'PUT', payload.get('location'))
+
+    def _update(self, path, kind, body):
+        """Applies a PATCH, answered synchronously with the resource"""
+
+        # Only the fields sent are set, model defaults are not applied
+        patch = get_model_class(kind).deserialize(body or {})
+        poller = self.simulation.update(path, patch)
+        return 200, self._serialize(poller.result(timeout=0)), {}
+
+    def _delete(self, request, path):
+        """Starts the deletion of a resource"""
+
+        poller = self.simulation.delete(path)
+        return 202, None, self._start_operation(request, poller, path,
+                                                'DELETE', None)
+
+    def _start_operation(self, request, poller, resource_id, method,
+                         location):
+        """Registers an operation and builds its polling headers"""
+
+        operation_id = uuid.uuid4().hex
+        with self._lock:
+            self._operations[operation_id] = _Operation(poller, resource_id,
+                                                        method, location)
+
+        subscription = resource_uri_utils.get_subscription(resource_id)
+        base = '{}/subscriptions/{}/providers/Microsoft.NetApp/locations/{}' \
+            .format(self._base_url(request), subscription,
+                    location or 'local')
+        query = urlsplit(request.path).query
+        return {'Azure-AsyncOperation': '{}/asyncOperations/{}?{}'.format(
+                    base, operation_id, query),
+                'Location': '{}/operationResults/{}?{}'.format(
+                    base, operation_id, query),
+                'Retry-After': self._retry_after()}
+
+    def _get_operation(self, operation_id):
+        with self._lock:
+            operation = self._operations.get(operation_id)
+        if operation is None:
+            raise fake_clients.http_error(
+                404, 'Operation {} not found'.format(operation_id))
+        return operation
+
+    def _get_operation_status(self, operation):
+        """Answers an Azure-AsyncOperation status check"""
+
+        self.simulation.call('status')
+        done = operation.poller.done()
+        return 200, {'id': operation.resource_id,
+                     'status': 'Succeeded' if done else 'InProgress'}, \
+            {} if done else {'Retry-After': self._retry_after()}
+
+    def _get_operation_result(self, operation):
+        """Answers a Location status check"""
+
+        if operation.poller.done() and operation.method != 'DELETE':
+            # The final resource counts as the one read of this call
+            return 200, self._serialize(self.simulation.get(
+                operation.resource_id)), {}
+
+        self.simulation.call('status')
+        if not operation.poller.done():
+            return 202, None, {'Retry-After': self._retry_after()}
+        return 204, None, {}
+
+    def _retry_after(self):
+        return str(max(self.poll_interval * self.profile.time_scale, 0.001))
+
+    def _base_url(self, request):
+        host = request.headers.get('Host')
+        return 'http://{}'.format(host) if host else self.url
+
+    @staticmethod
+    def _serialize(resource):
+        return resource.serialize(keep_readonly=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='port to listen on')
+    parser.add_argument('--provisioning-delay', type=float, default=None,
+                        help='seconds taken by creations and deletions')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='wall-clock seconds per simulated second')
+    parser.add_argument('--read-rate', type=float, default=20,
+                        help='sustained reads per second before throttling')
+    parser.add_argument('--write-rate', type=float, default=2,
+                        help='sustained writes per second before throttling')
+    arguments = parser.parse_args()
+
+    emulator = ANFEmulator(arguments.host, arguments.port, build_profile(
+        arguments.provisioning_delay, arguments.time_scale,
+        arguments.read_rate, arguments.write_rate))
+    emulator.start()
+    console_output('ANF emulator listening on {}'.format(emulator.url))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        console_output('Stats: {}'.format(emulator.stats))
+        emulator.stop()
@@ -0,0 +1,178 @@
+# benchmark_import_time.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""benchmark_import_time.py code sample
+
+Import time benchmark guarding the startup of cli.py: every module of
+IMPORT_BUDGETS is imported in a fresh interpreter with -X importtime, its
+cumulative import time is compared with its budget and the modules it pulls
+in are checked against FORBIDDEN_IMPORTS. Exits with status 1 when a budget
+is exceeded or a forbidden module is imported.
+
+Notes:
+Each module is imported several times and the fastest run is kept, which
+filters out most of the noise of a busy machine. Budgets can be scaled for
+slower machines with --scale.
+
+Usage:
+python benchmark_import_time.py [--repeat 5] [--scale 1.0]
+
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import namedtuple
+from pathlib import Path
+from sample_utils import console_output, print_header
+
+# Module -> cumulative import time budget in milliseconds
+IMPORT_BUDGETS = {
+    'cli': 20,
+    'resource_uri_utils': 20,
+    'logging_utils': 40,
+    'sample_utils': 200,
+    'example': 300,
+}
+
+# Module -> prefixes of modules that must only be imported on demand
+FORBIDDEN_IMPORTS = {
+    'cli': ('azure', 'haikunator', 'numpy', 'requests'),
+    'resource_uri_utils': ('azure', 'numpy'),
+    'sample_utils': ('azure.identity', 'azure.mgmt', 'msal'),
+    'example': ('azure.identity', 'azure.mgmt', 'haikunator', 'msal',
+                'requests'),
+}
+
+_IMPORT_TIME_LINE = re.compile(
+    r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+ImportTiming = namedtuple('ImportTiming', ['module', 'milliseconds',
+                                           'imported'])
+ImportTiming.__doc__ = """Import time of a module
+
+milliseconds is the cumulative import time of the module, imported is the
+set of modules imported because of it.
+"""
+
+
+def measure_import(module, repeat=5):
+    """Measures the import time of a module in fresh interpreters
+
+    Args:
+        module (string): Name of the module, importable from this folder
+        repeat (int): Optional. Number of imports, the fastest one is kept
+
+    Returns:
+        ImportTiming: Returns the fastest import time of the module
+
+    Raises:
+        RuntimeError: The module could not be imported
+    """
+
+    best = None
+    for _ in range(max(1, repeat)):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import {}'.format(module)],
+            cwd=str(Path(__file__).resolve().parent),
+            capture_output=True, text=True, check=False)
+        if process.returncode:
+            raise RuntimeError('import {} failed:\n{}'.format(
+                module, process.stderr))
+
+        # Modules are reported once imported, i.e. after the modules they
+        # imported, so the modules pulled in by the target are the ones
+        # listed since the previous top level import
+        imported = set()
+        timing = None
+        for line in process.stderr.splitlines():
+            match = _IMPORT_TIME_LINE.match(line)
+            if match is None:
+                continue
+            name = match.group(4)
+            if match.group(3):
+                imported.add(name)
+            elif name == module:
+                timing = ImportTiming(module, int(match.group(2)) / 1000,
+                                      frozenset(imported))
+            else:
+                imported = set()
+
+        if timing is None:
+            raise RuntimeError('no import time reported for {}'.format(
+                module))
+        if best is None or timing.milliseconds < best.milliseconds:
+            best = timing
+    return best
+
+
+def get_forbidden_imports(timing):
+    """Gets the forbidden modules imported by a module
+
+    Args:
+        timing (ImportTiming): Result of measure_import()
+
+    Returns:
+        list: Returns the sorted names of the forbidden modules imported,
+            submodules of a reported package are left out
+    """
+
+    prefixes = FORBIDDEN_IMPORTS.get(timing.module, ())
+    forbidden = {name for name in timing.imported
+                 if any(name == prefix or name.startswith(prefix + '.')
+                        for prefix in prefixes)}
+    return sorted(name for name in forbidden
+                  if name.rpartition('.')[0] not in forbidden)
+
+
+def run_benchmark(budgets=None, repeat=5, scale=1.0):
+    """Measures every module of a budget table and prints a report
+
+    Args:
+        budgets (dict): Optional. Module -> budget in milliseconds,
+            IMPORT_BUDGETS by default
+        repeat (int): Optional. Number of imports per module
+        scale (float): Optional. Multiplier applied to every budget
+
+    Returns:
+        list: Returns the names of the modules that regressed
+    """
+
+    budgets = IMPORT_BUDGETS if budgets is None else budgets
+
+    print_header('Import time benchmark (best of {}, budget scale {})'
+                 .format(repeat, scale))
+
+    regressions = []
+    for module, budget in budgets.items():
+        timing = measure_import(module, repeat)
+        budget *= scale
+        forbidden = get_forbidden_imports(timing)
+        status = 'OK'
+        if timing.milliseconds > budget or forbidden:
+            status = 'REGRESSION'
+            regressions.append(module)
+        console_output('{}: {:.1f}ms (budget {:.0f}ms) {}'.format(
+            module, timing.milliseconds, budget, status))
+        if forbidden:
+            console_output('\timports {}'.format(', '.join(forbidden)))
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of imports per module')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplier applied to every budget')
+    arguments = parser.parse_args()
+
+    sys.exit(1 if run_benchmark(repeat=arguments.repeat,
+                                scale=arguments.scale) else 0)
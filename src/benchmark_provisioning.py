@@ -0,0 +1,228 @@
+# benchmark_provisioning.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""benchmark_provisioning.py code sample
+
+Offline benchmark of run_example style flows (subnet check, account, capacity
+pool, volumes and optionally cleanup) against the simulated clients of
+fake_clients, reporting end-to-end duration, volume throughput, per volume
+latency, ARM calls and throttled calls for each volume count.
+
+Notes:
+Reported durations are simulated seconds, i.e. wall-clock time divided by
+the time scale.
+
+Usage:
+python benchmark_provisioning.py [--counts 1 10 100 1000]
+    [--concurrency 16] [--time-scale 0.001] [--seed 1] [--cleanup]
+
+"""
+
+import argparse
+import math
+import time
+from collections import namedtuple
+from sample_utils import console_output, print_header
+import bulk_provisioning
+import cleanup_utils
+import example
+import fake_clients
+import resource_uri_utils
+import sample_utils
+
+DEFAULT_COUNTS = (1, 10, 100, 1000)
+
+VOLUME_USAGE_QUOTA = 107374182400  # 100GiB
+
+FlowResult = namedtuple('FlowResult', ['volume_count', 'phases',
+                                       'volume_latencies', 'failed',
+                                       'elapsed', 'stats'])
+FlowResult.__doc__ = """Outcome of one simulated provisioning flow
+
+phases maps phase names to their duration, volume_latencies holds the
+creation plus visibility wait duration of each successful volume and elapsed
+is the duration of the whole flow, all in simulated seconds. failed is the
+number of volumes that failed and stats the call counters of the simulation.
+"""
+
+
+def percentile(values, fraction):
+    """Gets a percentile of a list of values
+
+    Args:
+        values (list): Values, not necessarily sorted
+        fraction (float): Percentile between 0 and 1, e.g. 0.95
+
+    Returns:
+        float: Returns the nearest-rank percentile, 0 for an empty list
+    """
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_flow(volume_count, concurrency=16, profile=None, cleanup=False):
+    """Runs one simulated provisioning flow
+
+    Args:
+        volume_count (int): Number of volumes to be created
+        concurrency (int): Optional. Maximum number of volumes in flight
+        profile (SimulationProfile): Optional. Simulation behavior
+        cleanup (boolean): Optional. Also deletes everything at the end
+
+    Returns:
+        FlowResult: Returns the measurements of the flow
+    """
+
+    simulation = fake_clients.Simulation(profile)
+    anf_client = fake_clients.FakeNetAppManagementClient(simulation)
+    resources_client = fake_clients.FakeResourceManagementClient(simulation)
+    time_scale = simulation.profile.time_scale
+
+    def strategy(resource_id):
+        return fake_clients.scale_strategy(
+            sample_utils.get_wait_strategy(resource_id), time_scale)
+
+    def wait_for(resource_id):
+        wait_result = sample_utils.wait_for_anf_resource(
+            anf_client, resource_id, strategy=strategy(resource_id))
+        if not wait_result.succeeded:
+            raise TimeoutError('{} not visible'.format(resource_id))
+
+    def delete(client, resource_id):
+        sample_utils.get_anf_resource_deleter(client, resource_id)().wait()
+        wait_result = sample_utils.wait_for_no_anf_resource(
+            client, resource_id, strategy=strategy(resource_id))
+        if not wait_result.succeeded:
+            raise TimeoutError('{} still visible'.format(resource_id))
+
+    phases = {}
+
+    def timed(phase, function, *args):
+        start = simulation.now()
+        result = function(*args)
+        phases[phase] = simulation.now() - start
+        return result
+
+    start = simulation.now()
+    subnet_id = example.build_subnet_id(simulation.subscription_id,
+                                        example.VNET_RESOURCE_GROUP_NAME,
+                                        example.VNET_NAME,
+                                        example.SUBNET_NAME)
+    simulation.add_subnet(subnet_id)
+    timed('subnet', sample_utils.check_resource_existence, resources_client,
+          subnet_id, example.VIRTUAL_NETWORKS_SUBNET_API_VERSION)
+
+    account = timed('account', example.create_account, anf_client,
+                    example.RESOURCE_GROUP_NAME, 'benchmark-account',
+                    example.LOCATION)
+    timed('account_wait', wait_for, account.id)
+
+    pool_size = max(example.CAPACITYPOOL_SIZE, sample_utils.get_tib_in_bytes(
+        math.ceil(sample_utils.get_bytes_in_tib(
+            VOLUME_USAGE_QUOTA * volume_count))))
+    pool = timed('pool', example.create_capacitypool_async, anf_client,
+                 example.RESOURCE_GROUP_NAME, 'benchmark-account',
+                 'benchmark-pool', example.CAPACITYPOOL_SERVICE_LEVEL,
+                 pool_size, example.LOCATION)
+    timed('pool_wait', wait_for, pool.id)
+
+    specs = [bulk_provisioning.VolumeSpec(example.RESOURCE_GROUP_NAME,
+                                          'benchmark-account',
+                                          'benchmark-pool',
+                                          'volume-{:04d}'.format(index),
+                                          VOLUME_USAGE_QUOTA,
+                                          example.CAPACITYPOOL_SERVICE_LEVEL,
+                                          subnet_id,
+                                          example.LOCATION)
+             for index in range(volume_count)]
+    volumes_start = simulation.now()
+    bulk_result = bulk_provisioning.create_volumes(
+        anf_client, specs, concurrency, clock=simulation.now,
+        strategy=fake_clients.scale_strategy(
+            sample_utils.WAIT_STRATEGY_PRIORS[
+                resource_uri_utils.KIND_VOLUME], time_scale))
+    # A volume counts as created once visible, as with wait_for()
+    succeeded = [result for result in bulk_result.succeeded
+                 if result.wait_result.succeeded]
+    volume_ids = [result.volume.id for result in succeeded]
+    latencies = [result.elapsed for result in succeeded]
+    failed = volume_count - len(succeeded)
+    phases['volumes'] = simulation.now() - volumes_start
+
+    if cleanup:
+        timed('cleanup', cleanup_utils.delete_anf_resources, anf_client,
+              volume_ids + [pool.id, account.id], concurrency, delete)
+
+    return FlowResult(volume_count, phases, latencies, failed,
+                      simulation.now() - start, dict(simulation.stats))
+
+
+def run_benchmark(counts=DEFAULT_COUNTS, concurrency=16, time_scale=0.001,
+                  seed=1, cleanup=False):
+    """Runs the flow for each volume count and prints a report
+
+    Args:
+        counts (iterable): Optional. Volume counts to be measured
+        concurrency (int): Optional. Maximum number of volumes in flight
+        time_scale (float): Optional. Wall-clock seconds per simulated second
+        seed (int): Optional. Seed of the simulated latencies
+        cleanup (boolean): Optional. Also measures the deletion of everything
+
+    Returns:
+        list: Returns one FlowResult per volume count
+    """
+
+    print_header('Simulated provisioning benchmark (concurrency {}, '
+                 'time scale {})'.format(concurrency, time_scale))
+    profile = fake_clients.SimulationProfile(time_scale=time_scale, seed=seed)
+
+    results = []
+    for count in counts:
+        wall_start = time.monotonic()
+        result = run_flow(count, concurrency, profile, cleanup)
+        results.append(result)
+
+        throughput = len(result.volume_latencies) / result.phases['volumes'] \
+            * 60 if result.phases['volumes'] else 0.0
+        console_output('{} volumes: {:.0f}s end-to-end, {:.1f} volumes/min, '
+                       'latency p50 {:.0f}s p95 {:.0f}s max {:.0f}s, {} failed '
+                       '({:.1f}s wall-clock)'.format(
+                           count, result.elapsed, throughput,
+                           percentile(result.volume_latencies, 0.5),
+                           percentile(result.volume_latencies, 0.95),
+                           percentile(result.volume_latencies, 1),
+                           result.failed, time.monotonic() - wall_start))
+        console_output('\tphases: {}'.format(', '.join(
+            '{} {:.0f}s'.format(phase, duration)
+            for phase, duration in result.phases.items())))
+        console_output('\tARM calls: {}'.format(', '.join(
+            '{} {}'.format(operation, calls)
+            for operation, calls in sorted(result.stats.items()))))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--counts', type=int, nargs='+',
+                        default=list(DEFAULT_COUNTS),
+                        help='volume counts to be measured')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='maximum number of volumes in flight')
+    parser.add_argument('--time-scale', type=float, default=0.001,
+                        help='wall-clock seconds per simulated second')
+    parser.add_argument('--seed', type=int, default=1,
+                        help='seed of the simulated latencies')
+    parser.add_argument('--cleanup', action='store_true',
+                        help='also delete every resource')
+    arguments = parser.parse_args()
+
+    run_benchmark(arguments.counts, arguments.concurrency,
+                  arguments.time_scale, arguments.seed, arguments.cleanup)
@@ -0,0 +1,112 @@
+# benchmark_resource_ids.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""benchmark_resource_ids.py code sample
+
+Compares the bulk resource id parser against the per-id helpers from
+resource_uri_utils over a synthetic inventory of ANF resource ids.
+
+Usage:
+python benchmark_resource_ids.py [--count 200000]
+
+"""
+
+import argparse
+import importlib.util
+import time
+import resource_uri_utils
+
+PER_ID_HELPERS = (resource_uri_utils.get_subscription,
+                  resource_uri_utils.get_resource_group,
+                  resource_uri_utils.get_anf_account,
+                  resource_uri_utils.get_anf_capacity_pool,
+                  resource_uri_utils.get_anf_volume,
+                  resource_uri_utils.get_anf_snapshot)
+
+LEGACY_SEGMENTS = ('/subscriptions', '/resourceGroups', '/netAppAccounts',
+                   '/capacityPools', '/volumes', '/snapshots')
+
+
+def build_resource_ids(count):
+    """Builds a synthetic inventory of ANF resource ids
+
+    Args:
+        count (int): Number of resource ids to build
+
+    Returns:
+        list: Returns resource ids with a mix of accounts, pools, volumes
+            and snapshots
+    """
+
+    resource_ids = []
+    for index in range(count):
+        resource_id = ('/subscriptions/{:08d}-0000-0000-0000-000000000000'
+                       '/resourceGroups/anf-rg-{}'
+                       '/providers/Microsoft.NetApp/netAppAccounts/account-{}'
+                       ).format(index % 40, index % 200, index)
+        depth = index % 4
+        if depth > 0:
+            resource_id += '/capacityPools/pool-{}'.format(index)
+        if depth > 1:
+            resource_id += '/volumes/volume-{}'.format(index)
+        if depth > 2:
+            resource_id += '/snapshots/snapshot-{}'.format(index)
+        resource_ids.append(resource_id)
+    return resource_ids
+
+
+def time_it(label, function, count):
+    """Runs a function once and prints its duration and rate"""
+
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print('{:<32} {:>9.3f}s {:>12,.0f} ids/s'.format(
+        label, elapsed, count / elapsed if elapsed else float('inf')))
+
+
+def run_benchmark(count):
+    """Runs all parser variants over the same inventory
+
+    Args:
+        count (int): Number of resource ids to parse
+    """
+
+    resource_ids = build_resource_ids(count)
+
+    def legacy_scan():
+        for resource_id in resource_ids:
+            for segment in LEGACY_SEGMENTS:
+                resource_uri_utils.get_resource_value(resource_id, segment)
+
+    def per_id_helpers():
+        resource_uri_utils.parse_resource_id.cache_clear()
+        for resource_id in resource_ids:
+            for helper in PER_ID_HELPERS:
+                helper(resource_id)
+            resource_uri_utils.is_anf_account(resource_id)
+
+    def bulk():
+        resource_uri_utils.parse_resource_ids(resource_ids)
+
+    def bulk_structured():
+        resource_uri_utils.as_structured_array(
+            resource_uri_utils.parse_resource_ids(resource_ids))
+
+    time_it('get_resource_value (rescan)', legacy_scan, count)
+    time_it('per-id helpers (cached)', per_id_helpers, count)
+    time_it('parse_resource_ids', bulk, count)
+    # numpy is imported lazily by resource_uri_utils, only probe for it
+    if importlib.util.find_spec('numpy') is not None:
+        time_it('parse_resource_ids + numpy', bulk_structured, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000,
+                        help='number of resource ids to parse')
+    run_benchmark(parser.parse_args().count)
@@ -0,0 +1,201 @@
+# bulk_provisioning.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""bulk_provisioning.py code sample
+
+Bulk provisioning functions to create many NFSv4.1 volumes at once with a
+bounded number of in-flight operations.
+
+"""
+
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sample_utils import console_output
+import sample_utils
+import example
+
+# Default maximum number of volumes being created at the same time
+DEFAULT_CONCURRENCY = 16
+
+VolumeSpec = namedtuple('VolumeSpec', ['resource_group_name',
+                                       'anf_account_name',
+                                       'capacitypool_name',
+                                       'volume_name',
+                                       'volume_usage_quota',
+                                       'service_level',
+                                       'subnet_id',
+                                       'location',
+                                       'tags'])
+VolumeSpec.__new__.__defaults__ = (None,)
+VolumeSpec.__doc__ = """Arguments of example.create_volume() for one volume"""
+
+VolumeResult = namedtuple('VolumeResult', ['spec', 'volume', 'error',
+                                           'wait_result', 'elapsed'])
+VolumeResult.__doc__ = """Outcome of one volume of a create_volumes() batch
+
+volume is the created Volume or None if error (the raised exception) is set,
+wait_result is the WaitResult of the visibility wait or None when waiting
+was disabled or the creation failed and elapsed is the time in seconds spent
+on this volume.
+"""
+
+
+class BulkResult(namedtuple('_BulkResultBase', ['results', 'elapsed'])):
+    """Outcome of a create_volumes() batch
+
+    results holds one VolumeResult per spec, in the same order as the specs,
+    and elapsed is the wall-clock time in seconds of the whole batch.
+    """
+
+    __slots__ = ()
+
+    @property
+    def succeeded(self):
+        """list: VolumeResult entries without error"""
+        return [result for result in self.results if result.error is None]
+
+    @property
+    def failed(self):
+        """list: VolumeResult entries with error"""
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def throughput(self):
+        """float: Successfully created volumes per second"""
+        if not self.elapsed:
+            return 0.0
+        return len(self.succeeded) / self.elapsed
+
+
+def create_volume_from_spec(client, spec, wait=True, clock=time.monotonic,
+                            poller=None, strategy=None):
+    """Creates one volume and captures its outcome
+
+    Exceptions are not raised but recorded in the returned VolumeResult, so a
+    failing volume does not stop the rest of a batch.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        spec (VolumeSpec): Volume to be created
+        wait (boolean): Optional. Waits for the volume to be visible through
+            wait_for_anf_resource, default is True
+        clock (function): Optional. Monotonic clock, time.monotonic by
+            default
+        poller (CoalescedPoller): Optional. Shared status poller used for
+            the wait instead of one GET call per check
+        strategy (WaitStrategy): Optional. Strategy of the wait when no
+            poller is given, defaults to the volume prior of
+            sample_utils.WAIT_STRATEGY_PRIORS
+
+    Returns:
+        VolumeResult: Returns the outcome of the volume creation
+    """
+
+    start = clock()
+    try:
+        volume = example.create_volume(client,
+                                       spec.resource_group_name,
+                                       spec.anf_account_name,
+                                       spec.capacitypool_name,
+                                       spec.volume_name,
+                                       spec.volume_usage_quota,
+                                       spec.service_level,
+                                       spec.subnet_id,
+                                       spec.location,
+                                       spec.tags)
+        wait_result = None
+        if wait and poller is not None:
+            # ARM Workaround to wait for the creation completion
+            wait_result = poller.wait_for_anf_resource(volume.id)
+        elif wait:
+            wait_result = sample_utils.wait_for_anf_resource(
+                client, volume.id, strategy=strategy)
+        return VolumeResult(spec, volume, None, wait_result, clock() - start)
+    except Exception as ex: # pylint: disable=broad-except
+        return VolumeResult(spec, None, ex, None, clock() - start)
+
+
+def create_volumes(client, specs, concurrency=DEFAULT_CONCURRENCY, wait=True,
+                   clock=time.monotonic, poller=None, validator=None,
+                   strategy=None):
+    """Creates many volumes with a bounded number of in-flight operations
+
+    Function that submits the begin_create_or_update calls of all volume
+    specs, keeping at most concurrency volumes being created and waited upon
+    at the same time. Per volume results and errors are collected without
+    stopping the batch and the aggregate throughput is reported at the end.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        specs (list): VolumeSpec entries of the volumes to be created
+        concurrency (int): Optional. Maximum number of volumes in flight
+        wait (boolean): Optional. Waits for each volume to be visible through
+            wait_for_anf_resource, default is True
+        clock (function): Optional. Monotonic clock, time.monotonic by
+            default
+        poller (CoalescedPoller): Optional. Shared status poller resolving
+            the waits of volumes of the same capacity pool with one list
+            call per tick
+        validator (SubnetValidator): Optional. Checks the distinct subnets
+            of the specs concurrently before any creation, specs with an
+            invalid subnet fail without being submitted
+        strategy (WaitStrategy): Optional. Strategy of the waits when no
+            poller is given, e.g. a strategy with a simulated sleep
+
+    Returns:
+        BulkResult: Returns per volume results and aggregate figures
+    """
+
+    specs = list(specs)
+    results = [None] * len(specs)
+    start = clock()
+
+    subnet_checks = {}
+    if validator is not None:
+        subnet_checks = validator.validate(spec.subnet_id for spec in specs)
+        for index, spec in enumerate(specs):
+            subnet_check = subnet_checks[spec.subnet_id]
+            if not subnet_check.valid:
+                results[index] = VolumeResult(
+                    spec, None, subnet_check.error or
+                    ValueError(subnet_check.reason), None, 0.0)
+                console_output('\tVolume {} failed. Error details: {}'.format(
+                    spec.volume_name, subnet_check.reason), logging.ERROR,
+                               phase='create_volume',
+                               error=subnet_check.reason)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(create_volume_from_spec, client, spec,
+                                   wait, clock, poller, strategy): index
+                   for index, spec in enumerate(specs)
+                   if results[index] is None}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if result.error is None:
+                console_output('\tVolume successfully created, resource id: '
+                               '{}'.format(result.volume.id),
+                               resource_id=result.volume.id,
+                               phase='create_volume',
+                               duration=result.elapsed)
+            else:
+                console_output('\tVolume {} failed. Error details: {}'.format(
+                    result.spec.volume_name, result.error), logging.ERROR,
+                               phase='create_volume',
+                               duration=result.elapsed,
+                               error=str(result.error))
+
+    bulk_result = BulkResult(results, clock() - start)
+    console_output('Created {} of {} volumes in {:.1f}s ({:.2f} volumes/s)'
+                   .format(len(bulk_result.succeeded), len(specs),
+                           bulk_result.elapsed, bulk_result.throughput),
+                   phase='create_volumes', duration=bulk_result.elapsed)
+    return bulk_result
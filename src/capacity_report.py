@@ -0,0 +1,361 @@
+# capacity_report.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""capacity_report.py code sample
+
+Capacity and throughput report of whole ANF inventories: capacity pools and
+volumes are listed once, stored as array-backed columns and every figure
+(pool utilization, unallocated capacity, QoS throughput per volume and per
+pool) is computed with NumPy vectorized operations instead of one helper
+call per volume.
+
+Notes:
+Volume throughput follows the QoS type of its pool: with automatic QoS it is
+the volume quota in TiB times the THROUGHPUT_PER_TIB of the service level,
+with manual QoS it is the throughput assigned to the volume. Reports are
+written as CSV, or as Parquet when pyarrow is installed.
+
+Usage:
+python capacity_report.py --resource-group anf01-rg [--account account01]
+    [--output-dir .] [--format csv|parquet]
+
+"""
+
+import argparse
+import csv
+import math
+import os
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+from sample_utils import console_output, get_bytes_in_tib
+from pool_planner import SERVICE_LEVELS, THROUGHPUT_PER_TIB, \
+    normalize_service_level
+import resource_uri_utils
+import streaming_inventory
+
+# Default maximum number of list calls sent at the same time
+DEFAULT_MAX_WORKERS = 16
+
+QOS_MANUAL = 'manual'
+
+Inventory = namedtuple('Inventory', ['pool_ids', 'pool_service_level',
+                                     'pool_manual_qos', 'pool_size',
+                                     'pool_throughput', 'volume_ids',
+                                     'volume_pool', 'volume_quota',
+                                     'volume_throughput'])
+Inventory.__doc__ = """Array-backed columns of capacity pools and volumes
+
+pool_ids and volume_ids are lists of resource ids, the other fields are
+arrays with one entry per pool or per volume: pool_service_level holds the
+index of the service level in SERVICE_LEVELS, pool_manual_qos 1 for manual
+QoS pools, pool_size and volume_quota sizes in bytes, pool_throughput and
+volume_throughput the throughput set with manual QoS (NaN otherwise) and
+volume_pool the index of the pool of each volume.
+"""
+
+CapacityReport = namedtuple('CapacityReport', ['pools', 'volumes'])
+CapacityReport.__doc__ = """Result of compute_report()
+
+pools and volumes are dicts of column name -> NumPy array (or list for the
+resource id columns), one entry per pool or per volume.
+"""
+
+
+def build_inventory(pools, volumes):
+    """Builds the columns of listed capacity pools and volumes
+
+    Volumes of pools missing from pools are left out.
+
+    Args:
+        pools (iterable): CapacityPool objects
+        volumes (iterable): Volume objects or VolumeRecord entries
+
+    Returns:
+        Inventory: Returns the columns
+    """
+
+    pool_ids = []
+    pool_index = {}
+    pool_service_level = array('b')
+    pool_manual_qos = array('b')
+    pool_size = array('q')
+    pool_throughput = array('d')
+    for pool in pools:
+        pool_index[pool.id.lower()] = len(pool_ids)
+        pool_ids.append(pool.id)
+        pool_service_level.append(SERVICE_LEVELS.index(
+            normalize_service_level(pool.service_level)))
+        pool_manual_qos.append((pool.qos_type or '').lower() == QOS_MANUAL)
+        pool_size.append(pool.size)
+        pool_throughput.append(math.nan if pool.total_throughput_mibps is None
+                               else pool.total_throughput_mibps)
+
+    volume_ids = []
+    volume_pool = array('q')
+    volume_quota = array('q')
+    volume_throughput = array('d')
+    for volume in volumes:
+        # Ids of listed volumes are well formed, the pool id is the id
+        # without its last two segments (see get_anf_parent_id)
+        index = pool_index.get(volume.id.rstrip('/').rsplit('/', 2)[0]
+                               .lower())
+        if index is None:
+            continue
+        volume_ids.append(volume.id)
+        volume_pool.append(index)
+        volume_quota.append(volume.usage_threshold)
+        volume_throughput.append(math.nan if volume.throughput_mibps is None
+                                 else volume.throughput_mibps)
+
+    return Inventory(pool_ids, pool_service_level, pool_manual_qos,
+                     pool_size, pool_throughput, volume_ids, volume_pool,
+                     volume_quota, volume_throughput)
+
+
+def pull_inventory(client, resource_group_name, account_names=None,
+                   max_workers=DEFAULT_MAX_WORKERS):
+    """Lists the capacity pools and volumes of a resource group once
+
+    Pools of every account and volumes of every pool are listed in
+    parallel.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Optional. Accounts to be listed, all the
+            accounts of the resource group by default
+        max_workers (int): Optional. Maximum number of list calls at once
+
+    Returns:
+        Inventory: Returns the columns of the listed pools and volumes
+    """
+
+    if account_names is not None:
+        account_names = {name.lower() for name in account_names}
+
+    accounts = [resource_uri_utils.get_anf_account(account.id)
+                for account in client.accounts.list(resource_group_name)]
+    accounts = [name for name in accounts
+                if account_names is None or name.lower() in account_names]
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pools = [pool for account_pools in executor.map(
+            lambda name: list(client.pools.list(resource_group_name, name)),
+            accounts) for pool in account_pools]
+
+        # Volumes are kept as VolumeRecord entries rather than full models
+        volumes = [volume for pool_volumes in executor.map(
+            lambda pool: list(streaming_inventory.stream_volumes(
+                client, resource_group_name,
+                resource_uri_utils.get_anf_account(pool.id),
+                resource_uri_utils.get_anf_capacity_pool(pool.id))),
+            pools) for volume in pool_volumes]
+
+    return build_inventory(pools, volumes)
+
+
+def compute_report(inventory):
+    """Computes the capacity and throughput figures of an inventory
+
+    Pool columns: pool_id, service_level, qos_type, size_tib,
+    allocated_tib, unallocated_tib, utilization, volume_count,
+    throughput_mibps and allocated_throughput_mibps. Volume columns:
+    volume_id, pool_id, service_level, quota_tib, throughput_mibps and
+    pool_share (fraction of the pool size allocated to the volume).
+
+    Args:
+        inventory (Inventory): Columns built by build_inventory()
+
+    Returns:
+        CapacityReport: Returns the pool and volume columns
+    """
+
+    pool_count = len(inventory.pool_ids)
+    level = numpy.frombuffer(inventory.pool_service_level, dtype=numpy.int8)
+    manual = numpy.frombuffer(inventory.pool_manual_qos,
+                              dtype=numpy.int8).astype(bool)
+    size = numpy.frombuffer(inventory.pool_size, dtype=numpy.int64)
+    pool_set_throughput = numpy.frombuffer(inventory.pool_throughput,
+                                           dtype=numpy.float64)
+    volume_pool = numpy.frombuffer(inventory.volume_pool, dtype=numpy.int64)
+    quota = numpy.frombuffer(inventory.volume_quota, dtype=numpy.int64)
+    volume_set_throughput = numpy.frombuffer(inventory.volume_throughput,
+                                             dtype=numpy.float64)
+
+    per_tib = numpy.array([THROUGHPUT_PER_TIB[service_level]
+                           for service_level in SERVICE_LEVELS],
+                          dtype=numpy.float64)
+    level_names = numpy.array(SERVICE_LEVELS)
+    size_tib = get_bytes_in_tib(size)
+    quota_tib = get_bytes_in_tib(quota)
+
+    # Per volume figures, pool attributes are gathered with the pool index
+    volume_throughput = numpy.where(
+        manual[volume_pool], numpy.nan_to_num(volume_set_throughput),
+        quota_tib * per_tib[level[volume_pool]])
+
+    # Per pool aggregates of the volumes
+    allocated = numpy.bincount(volume_pool, weights=quota,
+                               minlength=pool_count)
+    allocated_tib = get_bytes_in_tib(allocated)
+    allocated_throughput = numpy.bincount(volume_pool,
+                                          weights=volume_throughput,
+                                          minlength=pool_count)
+    pool_throughput = numpy.where(manual,
+                                  numpy.nan_to_num(pool_set_throughput),
+                                  size_tib * per_tib[level])
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        utilization = numpy.where(size > 0, allocated / size, 0.0)
+        pool_share = numpy.where(size[volume_pool] > 0,
+                                 quota / size[volume_pool], 0.0)
+
+    pools = {
+        'pool_id': inventory.pool_ids,
+        'service_level': level_names[level],
+        'qos_type': numpy.where(manual, 'Manual', 'Auto'),
+        'size_tib': size_tib,
+        'allocated_tib': allocated_tib,
+        'unallocated_tib': size_tib - allocated_tib,
+        'utilization': utilization,
+        'volume_count': numpy.bincount(volume_pool, minlength=pool_count),
+        'throughput_mibps': pool_throughput,
+        'allocated_throughput_mibps': allocated_throughput,
+    }
+    volumes = {
+        'volume_id': inventory.volume_ids,
+        'pool_id': [inventory.pool_ids[index]
+                    for index in volume_pool.tolist()],
+        'service_level': level_names[level[volume_pool]],
+        'quota_tib': quota_tib,
+        'throughput_mibps': volume_throughput,
+        'pool_share': pool_share,
+    }
+    return CapacityReport(pools, volumes)
+
+
+def write_csv(columns, path):
+    """Writes report columns as a CSV file with a header row
+
+    Args:
+        columns (dict): Column name -> values, e.g. CapacityReport.pools
+        path (string): Path of the CSV file
+    """
+
+    values = [column.tolist() if isinstance(column, numpy.ndarray)
+              else column for column in columns.values()]
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(columns.keys())
+        writer.writerows(zip(*values))
+
+
+def write_parquet(columns, path):
+    """Writes report columns as a Parquet file
+
+    Args:
+        columns (dict): Column name -> values, e.g. CapacityReport.pools
+        path (string): Path of the Parquet file
+
+    Raises:
+        ImportError: pyarrow is not installed
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('pyarrow is required to write Parquet '
+                          'reports') from None
+
+    pyarrow.parquet.write_table(
+        pyarrow.table({name: list(column) if isinstance(column, list)
+                       else column for name, column in columns.items()}),
+        path)
+
+
+def write_report(report, output_dir='.', output_format='csv'):
+    """Writes the pool and volume reports
+
+    Args:
+        report (CapacityReport): Result of compute_report()
+        output_dir (string): Optional. Folder of the report files
+        output_format (string): Optional. "csv" or "parquet"
+
+    Returns:
+        list: Returns the paths of the pool and volume reports
+    """
+
+    writer = write_parquet if output_format == 'parquet' else write_csv
+    paths = []
+    for name, columns in (('pools', report.pools),
+                          ('volumes', report.volumes)):
+        path = os.path.join(output_dir, 'capacity_{}.{}'.format(
+            name, output_format))
+        writer(columns, path)
+        paths.append(path)
+    return paths
+
+
+def summarize(report):
+    """Prints the totals of a report"""
+
+    pools = report.pools
+    size = pools['size_tib'].sum()
+    allocated = pools['allocated_tib'].sum()
+    console_output('{} capacity pool(s), {} volume(s): {:.1f}TiB provisioned, '
+                   '{:.1f}TiB allocated ({:.1%}), {:.1f}TiB unallocated, '
+                   '{:.0f}MiB/s of {:.0f}MiB/s throughput allocated'.format(
+                       len(pools['pool_id']), len(report.volumes['volume_id']),
+                       size, allocated, allocated / size if size else 0,
+                       size - allocated,
+                       pools['allocated_throughput_mibps'].sum(),
+                       pools['throughput_mibps'].sum()))
+
+
+def run(resource_group_name, account_names=None, output_dir='.',
+        output_format='csv'):
+    """Reports the inventory of a resource group of the credentials subscription
+
+    Args:
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Optional. Accounts to be reported
+        output_dir (string): Optional. Folder of the report files
+        output_format (string): Optional. "csv" or "parquet"
+
+    Returns:
+        CapacityReport: Returns the report
+    """
+
+    import client_factory
+
+    anf_client = client_factory.get_default_factory().netapp_client()
+    report = compute_report(pull_inventory(anf_client, resource_group_name,
+                                           account_names))
+    for path in write_report(report, output_dir, output_format):
+        console_output('Report written to {}'.format(path))
+    summarize(report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resource-group', required=True,
+                        help='resource group holding the accounts')
+    parser.add_argument('--account', action='append',
+                        help='account to be reported, all by default')
+    parser.add_argument('--output-dir', default='.',
+                        help='folder of the report files')
+    parser.add_argument('--format', choices=('csv', 'parquet'),
+                        default='csv', help='report file format')
+    arguments = parser.parse_args()
+
+    run(arguments.resource_group, arguments.account, arguments.output_dir,
+        arguments.format)
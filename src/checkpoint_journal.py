@@ -0,0 +1,421 @@
+# checkpoint_journal.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""checkpoint_journal.py code sample
+
+Crash-safe checkpoint journal: an append-only JSON lines file recording the
+intent, resource id and completion of each step of a run, so a run that died
+halfway resumes where it stopped instead of creating new resources and
+waiting for every long running operation (LRO) again.
+
+Notes:
+Every record is flushed and fsync'd before the step goes on, so whatever was
+acknowledged survives a crash or power loss. A line torn by a crash while
+being written is ignored when the journal is opened again.
+
+run_operation() writes an intent record before calling begin_*, then the
+continuation token of the poller, then the resource id once the operation
+succeeded. On resume completed steps only cost a GET of their resource,
+operations still in flight are reattached to their poller with
+begin_*(..., continuation_token=...) and steps that only recorded their
+intent are started again, which is safe since ANF creations are idempotent
+PUTs. submit_operation() does the same without blocking, the operation being
+tracked by an lro_manager.LROManager, reattached ones included.
+
+Usage:
+journal = CheckpointJournal('run.journal')
+account_name = journal.setdefault('account_name', generate_name)
+account = run_operation(journal, 'create_account',
+                        anf_client.accounts.begin_create_or_update,
+                        resource_group_name, account_name, account_body,
+                        resource_getter=lambda: anf_client.accounts.get(
+                            resource_group_name, account_name))
+journal.finish()
+
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from sample_utils import console_output
+
+STATE_INTENT = 'intent'
+STATE_STARTED = 'started'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+
+StepRecord = namedtuple('StepRecord', ['step', 'state', 'resource_id',
+                                       'continuation_token', 'data'])
+StepRecord.__new__.__defaults__ = (None, None, None)
+StepRecord.__doc__ = """Last known state of one journaled step
+
+state is one of STATE_INTENT, STATE_STARTED, STATE_DONE or STATE_FAILED,
+continuation_token the token of the in-flight poller (STATE_STARTED only) and
+data the values recorded with the step.
+"""
+
+
+class CheckpointJournal:
+    """Append-only, fsync'd JSON lines journal of the steps of a run
+
+    Records are replayed when the journal is opened, the last record of a
+    step wins. Values saved with set_value() are stored as records of the
+    "value:<name>" step. All methods are thread safe.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._steps = {}
+        self._resumed = False
+
+        if os.path.exists(path):
+            self._replay()
+        self._file = open(path, 'a')
+
+    def _replay(self):
+        with open(self.path) as journal_file:
+            lines = journal_file.read().split('\n')
+
+        torn = False
+        for number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Only the last line can be torn by a crash
+                if any(rest.strip() for rest in lines[number + 1:]):
+                    raise ValueError('Corrupted checkpoint journal {}, line '
+                                     '{}'.format(self.path, number + 1))
+                torn = True
+                break
+            self._steps[entry['step']] = StepRecord(
+                entry['step'], entry['state'], entry.get('resourceId'),
+                entry.get('continuationToken'), entry.get('data'))
+        self._resumed = bool(self._steps)
+
+        if torn:
+            # Rewrites the journal without the torn line, so new records
+            # start on a line of their own, and swaps it in atomically
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as journal_file:
+                for record in self._steps.values():
+                    journal_file.write(self._serialize(record) + '\n')
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            os.replace(temp_path, self.path)
+
+    @staticmethod
+    def _serialize(record):
+        entry = {'step': record.step, 'state': record.state,
+                 'time': time.time()}
+        if record.resource_id is not None:
+            entry['resourceId'] = record.resource_id
+        if record.continuation_token is not None:
+            entry['continuationToken'] = record.continuation_token
+        if record.data is not None:
+            entry['data'] = record.data
+        return json.dumps(entry, default=str)
+
+    @property
+    def resumed(self):
+        """boolean: True when the journal held records of a previous run"""
+        return self._resumed
+
+    def __len__(self):
+        return len(self._steps)
+
+    def record(self, step, state, resource_id=None, continuation_token=None,
+               data=None):
+        """Appends the new state of a step and waits for it to be on disk
+
+        Args:
+            step (string): Step name, unique within the run
+            state (string): STATE_INTENT, STATE_STARTED, STATE_DONE or
+                STATE_FAILED
+            resource_id (string): Optional. Resource the step works on
+            continuation_token (string): Optional. Token of the in-flight
+                poller of the step
+            data (object): Optional. JSON serializable values of the step
+
+        Returns:
+            StepRecord: Returns the recorded state
+        """
+
+        record = StepRecord(step, state, resource_id, continuation_token,
+                            data)
+        line = self._serialize(record)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._steps[step] = record
+        return record
+
+    def get(self, step):
+        """Gets the last recorded state of a step
+
+        Args:
+            step (string): Step name
+
+        Returns:
+            StepRecord: Returns the record, None if the step was never
+                recorded
+        """
+
+        with self._lock:
+            return self._steps.get(step)
+
+    def is_done(self, step):
+        """Checks if a step completed
+
+        Args:
+            step (string): Step name
+
+        Returns:
+            boolean: Returns True when the last record is STATE_DONE
+        """
+
+        record = self.get(step)
+        return record is not None and record.state == STATE_DONE
+
+    def get_value(self, name, default=None):
+        """Gets a value saved with set_value()
+
+        Args:
+            name (string): Value name
+            default (object): Optional. Returned when the value is not saved
+
+        Returns:
+            object: Returns the saved value
+        """
+
+        record = self.get('value:{}'.format(name))
+        return default if record is None else record.data
+
+    def set_value(self, name, value):
+        """Saves a JSON serializable value of the run, e.g. a generated name
+
+        Args:
+            name (string): Value name
+            value (object): Value to be saved
+        """
+
+        self.record('value:{}'.format(name), STATE_DONE, data=value)
+
+    def setdefault(self, name, factory):
+        """Gets a saved value, generating and saving it on first use
+
+        Args:
+            name (string): Value name
+            factory (function): Function without arguments returning the
+                value when it is not saved yet
+
+        Returns:
+            object: Returns the saved value, the one of the interrupted run
+                when resuming
+        """
+
+        record = self.get('value:{}'.format(name))
+        if record is not None:
+            return record.data
+        value = factory()
+        self.set_value(name, value)
+        return value
+
+    def get_resource_ids(self):
+        """Gets the resource ids of the steps, in recording order
+
+        Returns:
+            list: Returns the distinct resource ids
+        """
+
+        with self._lock:
+            records = list(self._steps.values())
+        return list(dict.fromkeys(record.resource_id for record in records
+                                  if record.resource_id is not None))
+
+    def close(self):
+        """Closes the journal file, keeping it for a later resume"""
+
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def finish(self):
+        """Closes and deletes the journal once the run completed"""
+
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _get_continuation_token(poller):
+    """Gets the continuation token of a poller, None when not supported"""
+
+    try:
+        return poller.continuation_token()
+    except (AttributeError, NotImplementedError, TypeError):
+        return None
+
+
+def run_operation(journal, step, begin_function, *args, resource_getter=None,
+                  **kwargs):
+    """Runs a long running operation at most once across restarts
+
+    Args:
+        journal (CheckpointJournal): Journal of the run, None runs the
+            operation without checkpoints
+        step (string): Step name, unique within the run
+        begin_function (function): begin_* function of an operation group,
+            e.g. anf_client.volumes.begin_create_or_update
+        args (list): Positional arguments of begin_function
+        resource_getter (function): Optional. Function without arguments
+            getting the resource of a step completed by a previous run,
+            without it a completed step is started again
+        kwargs (dict): Keyword arguments of begin_function
+
+    Returns:
+        object: Returns the result of the operation or of resource_getter
+    """
+
+    if journal is None:
+        return begin_function(*args, **kwargs).result()
+
+    record = journal.get(step)
+    if record is not None and record.state == STATE_DONE and \
+            resource_getter is not None:
+        try:
+            resource = resource_getter()
+            console_output('\tResuming: {} already completed'.format(step),
+                           resource_id=record.resource_id, phase=step)
+            return resource
+        except ResourceNotFoundError:
+            # Deleted since, the step is run again
+            pass
+
+    poller = None
+    if record is not None and record.state == STATE_STARTED and \
+            record.continuation_token:
+        try:
+            poller = begin_function(
+                *args, continuation_token=record.continuation_token,
+                **kwargs)
+            console_output('\tResuming: reattached to {}'.format(step),
+                           resource_id=record.resource_id, phase=step)
+        except (HttpResponseError, ValueError) as ex:
+            console_output('\tResuming: cannot reattach to {}, starting it '
+                           'again. Error details: {}'.format(step, ex),
+                           phase=step)
+
+    if poller is None:
+        journal.record(step, STATE_INTENT)
+        poller = begin_function(*args, **kwargs)
+        token = _get_continuation_token(poller)
+        if token is not None:
+            journal.record(step, STATE_STARTED, continuation_token=token)
+
+    try:
+        result = poller.result()
+    except Exception as ex: # pylint: disable=broad-except
+        journal.record(step, STATE_FAILED, data={'error': str(ex)})
+        raise
+    journal.record(step, STATE_DONE,
+                   resource_id=getattr(result, 'id', None))
+    return result
+
+
+def submit_operation(manager, journal, step, begin_function, *args,
+                     resource_getter=None, result_function=None, **kwargs):
+    """Same as run_operation() but tracked by an LROManager, without blocking
+
+    Args:
+        manager (LROManager): Started manager tracking the operation
+        journal (CheckpointJournal): Journal of the run, None runs the
+            operation without checkpoints
+        step (string): Step name, unique within the run
+        begin_function (function): begin_* function of an operation group
+        args (list): Positional arguments of begin_function
+        resource_getter (function): Optional. Function without arguments
+            getting the resource of a step completed by a previous run
+        result_function (function): Optional. Function applied to the result
+            before the future is resolved, e.g. to index the new resource
+        kwargs (dict): Keyword arguments of begin_function
+
+    Returns:
+        Future: Returns a future resolved with the result of the operation or
+            of resource_getter
+    """
+
+    future = Future()
+
+    def resolve(result, record=True):
+        try:
+            if record and journal is not None:
+                journal.record(step, STATE_DONE,
+                               resource_id=getattr(result, 'id', None))
+            if result_function is not None:
+                result = result_function(result)
+        except Exception as ex: # pylint: disable=broad-except
+            future.set_exception(ex)
+            return
+        future.set_result(result)
+
+    def on_done(operation):
+        ex = operation.exception()
+        if ex is None:
+            resolve(operation.result())
+            return
+        if journal is not None:
+            journal.record(step, STATE_FAILED, data={'error': str(ex)})
+        future.set_exception(ex)
+
+    if journal is not None and journal.is_done(step) and \
+            resource_getter is not None:
+        try:
+            resource = resource_getter()
+            console_output('\tResuming: {} already completed'.format(step),
+                           resource_id=journal.get(step).resource_id,
+                           phase=step)
+            resolve(resource, record=False)
+            return future
+        except ResourceNotFoundError:
+            # Deleted since, the step is run again
+            pass
+
+    def on_start(poller):
+        token = _get_continuation_token(poller)
+        if token is not None:
+            journal.record(step, STATE_STARTED, continuation_token=token)
+
+    record = None if journal is None else journal.get(step)
+    if record is not None and record.state == STATE_STARTED and \
+            record.continuation_token:
+        try:
+            manager.submit(begin_function, *args, callback=on_done,
+                           continuation_token=record.continuation_token,
+                           **kwargs)
+            console_output('\tResuming: reattached to {}'.format(step),
+                           resource_id=record.resource_id, phase=step)
+            return future
+        except (HttpResponseError, ValueError) as ex:
+            console_output('\tResuming: cannot reattach to {}, starting it '
+                           'again. Error details: {}'.format(step, ex),
+                           phase=step)
+
+    if journal is not None:
+        journal.record(step, STATE_INTENT)
+    manager.submit(begin_function, *args, callback=on_done,
+                   on_start=None if journal is None else on_start, **kwargs)
+    return future
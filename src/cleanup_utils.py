@@ -0,0 +1,281 @@
+# cleanup_utils.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""cleanup_utils.py code sample
+
+Cleanup functions that delete sets of ANF resources in dependency order,
+running independent deletions in parallel.
+
+Notes:
+Resources are deleted from the innermost resources up in the hierarchy chain
+Snapshots->Volumes->Capacity Pools->Accounts and a resource is only deleted
+once all of its children in the set are gone. Volume deletion operations at
+the RP level are executed serially within a capacity pool, every other
+deletion runs in parallel.
+
+With an lro_manager.LROManager the delete operations are polled by the
+manager threads instead of one SDK polling thread per deletion; the workers
+still wait for each deletion, and for it to propagate, before scheduling the
+resources depending on it.
+
+"""
+
+import contextvars
+import logging
+import time
+from functools import partial
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from sample_utils import console_output
+import sample_utils
+import resource_index
+import resource_uri_utils
+import tracing
+
+# Default maximum number of deletions running at the same time
+DEFAULT_MAX_WORKERS = 16
+
+CleanupResult = namedtuple('CleanupResult', ['deleted', 'failed', 'skipped',
+                                             'elapsed'])
+CleanupResult.__doc__ = """Outcome of delete_anf_resources
+
+deleted is the list of deleted resource ids in completion order, failed maps
+resource ids to the exception raised while deleting them, skipped lists the
+resource ids not deleted because a resource they depend on failed and elapsed
+is the wall-clock time in seconds of the whole cleanup.
+"""
+
+
+def _resource_key(resource_id):
+    """Normalizes a resource id, ARM resource ids are case insensitive"""
+    return resource_id.strip().rstrip('/').lower()
+
+
+def build_deletion_graph(resource_ids):
+    """Builds the deletion dependency graph of a set of ANF resources
+
+    Each resource is linked to its closest ancestor present in the set, so
+    an account is only deleted after the pools, volumes and snapshots of the
+    set that live under it.
+
+    Args:
+        resource_ids (iterable): ANF resource ids
+
+    Returns:
+        dict: Returns normalized key -> resource id
+        dict: Returns normalized key -> closest ancestor key in the set or
+            None
+        dict: Returns normalized key -> number of children in the set
+
+    Raises:
+        ValueError: If one of the resource ids is not an ANF resource
+    """
+
+    # The closest ancestors are found by walking the trie of the set once,
+    # instead of parsing the ids of every ancestor of every resource
+    index = resource_index.ResourceIndex()
+    for resource_id in resource_ids:
+        if resource_id not in index:
+            index.add(resource_id)
+
+    nodes = {}
+    parents = {}
+    for entry in index.walk():
+        key = _resource_key(entry.resource_id)
+        nodes[key] = entry.resource_id
+        parents[key] = None if entry.parent_id is None else \
+            _resource_key(entry.parent_id)
+
+    child_counts = dict.fromkeys(nodes, 0)
+    for parent_key in parents.values():
+        if parent_key is not None:
+            child_counts[parent_key] += 1
+
+    return nodes, parents, child_counts
+
+
+def delete_anf_resource(client, resource_id, cache=None, index=None,
+                        manager=None):
+    """Deletes one ANF resource and waits for the deletion to propagate
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be deleted
+        cache (InventoryCache): Optional. Inventory cache whose entries for
+            the resource and its subtree are invalidated
+        index (ResourceIndex): Optional. Resource index the resource and its
+            subtree are removed from once deleted
+        manager (LROManager): Optional. LRO manager polling the delete
+            operation, it is polled by its own SDK thread otherwise
+
+    Returns:
+        WaitResult: Returns the result of the wait for the resource to be gone
+
+    Raises:
+        TimeoutError: If the resource is still visible once the wait gives up
+    """
+
+    if cache is not None:
+        cache.invalidate(resource_id)
+
+    with tracing.span('delete', resource_id=resource_id):
+        deleter = sample_utils.get_anf_resource_deleter(client, resource_id)
+        if manager is not None:
+            manager.submit(deleter).result()
+        else:
+            deleter().wait()
+
+    # ARM Workaround to wait the deletion complete/propagate
+    with tracing.span('wait_deleted', resource_id=resource_id):
+        wait_result = sample_utils.wait_for_no_anf_resource(
+            client, resource_id, cache=cache)
+    if not wait_result.succeeded:
+        raise TimeoutError('{} still visible after {:.0f}s'.format(
+            resource_id, wait_result.elapsed))
+
+    if index is not None:
+        index.remove(resource_id)
+    return wait_result
+
+
+def delete_anf_resources(client, resource_ids,
+                         max_workers=DEFAULT_MAX_WORKERS,
+                         delete_function=delete_anf_resource, cache=None,
+                         index=None, manager=None):
+    """Deletes a set of ANF resources in dependency order
+
+    Function that deletes leaves of the dependency graph in parallel, only
+    serializing volume deletions that share a capacity pool. When a deletion
+    fails the resources depending on it are skipped and every other branch
+    keeps going.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_ids (iterable): ANF resource ids to be deleted, e.g.
+            snapshots, volumes, capacity pools and accounts
+        max_workers (int): Optional. Maximum number of deletions in flight
+        delete_function (function): Optional. Function called with client
+            and resource id to delete one resource, default is
+            delete_anf_resource
+        cache (InventoryCache): Optional. Inventory cache passed to
+            delete_function as cache keyword argument
+        index (ResourceIndex): Optional. Resource index passed to
+            delete_function as index keyword argument
+        manager (LROManager): Optional. LRO manager passed to
+            delete_function as manager keyword argument
+
+    Returns:
+        CleanupResult: Returns deleted, failed and skipped resource ids
+    """
+
+    start = time.monotonic()
+    nodes, parents, pending_children = build_deletion_graph(resource_ids)
+    if cache is not None:
+        delete_function = partial(delete_function, cache=cache)
+    if index is not None:
+        delete_function = partial(delete_function, index=index)
+    if manager is not None:
+        delete_function = partial(delete_function, manager=manager)
+
+    # Volumes are serialized per capacity pool
+    serial_keys = {}
+    for key, resource_id in nodes.items():
+        if resource_uri_utils.is_anf_volume(resource_id):
+            serial_keys[key] = _resource_key(
+                resource_uri_utils.get_anf_parent_id(resource_id))
+
+    ready = deque(key for key, count in pending_children.items()
+                  if count == 0)
+    busy_serial_keys = set()
+    in_flight = {}
+    deleted = []
+    failed = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while ready or in_flight:
+            deferred = []
+            while ready and len(in_flight) < max_workers:
+                key = ready.popleft()
+                serial_key = serial_keys.get(key)
+                if serial_key in busy_serial_keys:
+                    deferred.append(key)
+                    continue
+                if serial_key is not None:
+                    busy_serial_keys.add(serial_key)
+                console_output('\t\tDeleting {}'.format(nodes[key]),
+                               resource_id=nodes[key], phase='delete')
+                # Running within a copy of the context keeps tracing spans
+                # of the worker nested in the caller span
+                in_flight[executor.submit(contextvars.copy_context().run,
+                                          delete_function, client,
+                                          nodes[key])] = key
+            ready.extendleft(reversed(deferred))
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = in_flight.pop(future)
+                busy_serial_keys.discard(serial_keys.get(key))
+                try:
+                    future.result()
+                except Exception as ex: # pylint: disable=broad-except
+                    failed[nodes[key]] = ex
+                    console_output('\t\tFailed to delete {}. Error details: '
+                                   '{}'.format(nodes[key], ex),
+                                   logging.ERROR, resource_id=nodes[key],
+                                   phase='delete', error=str(ex))
+                    continue
+
+                deleted.append(nodes[key])
+                console_output('\t\tDeleted {}'.format(nodes[key]),
+                               resource_id=nodes[key], phase='delete')
+                parent_key = parents[key]
+                if parent_key is not None:
+                    pending_children[parent_key] -= 1
+                    if pending_children[parent_key] == 0:
+                        ready.append(parent_key)
+
+    finished = set(deleted).union(failed)
+    skipped = [resource_id for resource_id in nodes.values()
+               if resource_id not in finished]
+
+    return CleanupResult(deleted, failed, skipped, time.monotonic() - start)
+
+
+def delete_anf_subtree(client, index, resource_id,
+                       max_workers=DEFAULT_MAX_WORKERS,
+                       delete_function=delete_anf_resource, cache=None,
+                       manager=None):
+    """Deletes a resource and every indexed resource under it
+
+    The resources to be deleted are taken from the index instead of list
+    calls, e.g. every pool, volume and snapshot of an account.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        index (ResourceIndex): Resource index holding the subtree, deleted
+            resources are removed from it
+        resource_id (string): Root of the subtree, an ANF resource, resource
+            group or subscription id
+        max_workers (int): Optional. Maximum number of deletions in flight
+        delete_function (function): Optional. Function called with client
+            and resource id to delete one resource, default is
+            delete_anf_resource
+        cache (InventoryCache): Optional. Inventory cache passed to
+            delete_function as cache keyword argument
+        manager (LROManager): Optional. LRO manager passed to
+            delete_function as manager keyword argument
+
+    Returns:
+        CleanupResult: Returns deleted, failed and skipped resource ids
+    """
+
+    return delete_anf_resources(
+        client, [entry.resource_id for entry in index.walk(resource_id)],
+        max_workers, delete_function, cache, index, manager)
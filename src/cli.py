@@ -0,0 +1,293 @@
+# cli.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""cli.py code sample
+
+Command line entry point of the sample. Each subcommand imports the modules
+it needs when it runs, so short lived invocations that only parse resource
+ids do not pay for importing the Azure SDK, azure.identity or numpy.
+
+Notes:
+Startup time is guarded by benchmark_import_time.py, which fails when
+importing this module or the sample modules exceeds its budget.
+
+Usage:
+python cli.py parse-ids resource_ids.txt [--csv]
+python cli.py plan-pools volume_requests.json --resource-group anf01-rg
+    --location eastus --account account01 --subnet-id <subnet id>
+    [--output manifest.json]
+python cli.py size-volume --throughput 250 [--min-capacity 107374182400]
+python cli.py plan|apply manifest.json
+python cli.py capacity-report --resource-group anf01-rg [--format parquet]
+python cli.py list-volumes --resource-group anf01-rg [--account account01]
+python cli.py fleet inventory|apply shards.json [--manifest manifest.json]
+    [--workers 8]
+python cli.py run
+python cli.py run-async [--count 4]
+python cli.py benchmark [--counts 1 10 100] [--cleanup]
+
+"""
+
+import argparse
+import sys
+
+
+def parse_ids(arguments):
+    """Parses a file of resource ids and prints a summary or CSV rows"""
+
+    import resource_uri_utils
+
+    if arguments.path == '-':
+        columns = resource_uri_utils.parse_resource_ids(
+            resource_uri_utils.iter_resource_id_lines(sys.stdin))
+    else:
+        columns = resource_uri_utils.parse_resource_ids_file(arguments.path)
+
+    if arguments.csv:
+        import csv
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns._fields)
+        kinds = resource_uri_utils.ANF_RESOURCE_KINDS
+        for row in zip(*columns[:-1], columns.kind):
+            writer.writerow(row[:-1] + (kinds[row[-1]] or '',))
+        return 0
+
+    counts = {}
+    for code in columns.kind:
+        counts[code] = counts.get(code, 0) + 1
+    print('{} resource id(s)'.format(len(columns.kind)))
+    for code, count in sorted(counts.items()):
+        print('\t{}: {}'.format(
+            resource_uri_utils.ANF_RESOURCE_KINDS[code] or 'other', count))
+    return 0
+
+
+def plan_pools(arguments):
+    """Packs volume requests into capacity pools and writes the manifest"""
+
+    import pool_planner
+
+    pool_planner.run(arguments.requests, arguments.resource_group,
+                     arguments.account, arguments.location,
+                     arguments.subnet_id, arguments.output)
+    return 0
+
+
+def size_volume(arguments):
+    """Prints the cheapest service level and quota of a throughput target"""
+
+    import volume_sizing
+
+    sizing = volume_sizing.size_volume(arguments.throughput,
+                                       arguments.min_capacity,
+                                       existing_pool=arguments.existing_pool)
+    print('{} {} ({:.0f}MiB/s, {:.2f} USD/month)'.format(
+        sizing.service_level, sizing.usage_threshold,
+        sizing.throughput_mibps, sizing.monthly_cost))
+    return 0
+
+
+def plan_or_apply(arguments):
+    """Runs desired_state plan or apply for a manifest"""
+
+    import desired_state
+
+    result = desired_state.run(arguments.command, arguments.manifest)
+    if arguments.command == 'apply' and result.failed:
+        return 1
+    return 0
+
+
+def capacity_report(arguments):
+    """Writes the capacity and throughput report of a resource group"""
+
+    import capacity_report as report
+
+    report.run(arguments.resource_group, arguments.account,
+               arguments.output_dir, arguments.format)
+    return 0
+
+
+def list_volumes(arguments):
+    """Streams the volumes of a resource group as CSV rows"""
+
+    import streaming_inventory
+
+    streaming_inventory.run(arguments.resource_group, arguments.account)
+    return 0
+
+
+def fleet(arguments):
+    """Runs a fleet job over the subscriptions and regions of a shards file"""
+
+    import fleet_orchestrator
+
+    summary = fleet_orchestrator.run(arguments.job, arguments.shards,
+                                     arguments.manifest, arguments.workers)
+    return 1 if summary.errors else 0
+
+
+def run(arguments): # pylint: disable=unused-argument
+    """Runs example.py"""
+
+    import example
+
+    example.run_example()
+    return 0
+
+
+def run_async(arguments):
+    """Runs example_async.py with a number of concurrent deployments"""
+
+    import asyncio
+    import example_async
+
+    asyncio.run(example_async.run_example(arguments.count))
+    return 0
+
+
+def benchmark(arguments):
+    """Runs the offline provisioning benchmark"""
+
+    import benchmark_provisioning
+
+    benchmark_provisioning.run_benchmark(arguments.counts,
+                                         arguments.concurrency,
+                                         arguments.time_scale,
+                                         arguments.seed, arguments.cleanup)
+    return 0
+
+
+def build_parser():
+    """Builds the argument parser of every subcommand
+
+    Returns:
+        ArgumentParser: Returns the parser, the handler of the selected
+            subcommand is stored in the handler attribute of parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description='Azure NetApp Files NFSv4.1 SDK sample commands')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    parser_ids = subparsers.add_parser(
+        'parse-ids', help='parse a file of resource ids, - for stdin')
+    parser_ids.add_argument('path', help='file with one resource id per line')
+    parser_ids.add_argument('--csv', action='store_true',
+                            help='write the parsed segments as CSV')
+    parser_ids.set_defaults(handler=parse_ids)
+
+    parser_pools = subparsers.add_parser(
+        'plan-pools', help='pack volume requests into capacity pools')
+    parser_pools.add_argument('requests', help='JSON file of volume requests')
+    parser_pools.add_argument('--resource-group', required=True,
+                              help='resource group of the account')
+    parser_pools.add_argument('--location', required=True,
+                              help='region of the resources')
+    parser_pools.add_argument('--account', required=True,
+                              help='account holding the capacity pools')
+    parser_pools.add_argument('--subnet-id', required=True,
+                              help='subnet delegated to ANF volumes')
+    parser_pools.add_argument('--output',
+                              help='manifest file, printed if omitted')
+    parser_pools.set_defaults(handler=plan_pools)
+
+    parser_size = subparsers.add_parser(
+        'size-volume', help='cheapest volume meeting a throughput target')
+    parser_size.add_argument('--throughput', type=float, required=True,
+                             help='throughput target in MiB/s')
+    parser_size.add_argument('--min-capacity', type=int,
+                             default=107374182400,
+                             help='minimum quota in bytes')
+    parser_size.add_argument('--existing-pool', action='store_true',
+                             help='price only the quota, placed into an '
+                             'existing pool')
+    parser_size.set_defaults(handler=size_volume)
+
+    for command, description in (('plan', 'show the actions of a manifest'),
+                                 ('apply', 'converge to a manifest')):
+        parser_state = subparsers.add_parser(command, help=description)
+        parser_state.add_argument('manifest',
+                                  help='desired-state manifest (JSON/YAML)')
+        parser_state.set_defaults(handler=plan_or_apply)
+
+    parser_report = subparsers.add_parser(
+        'capacity-report', help='write capacity and throughput reports')
+    parser_report.add_argument('--resource-group', required=True,
+                               help='resource group holding the accounts')
+    parser_report.add_argument('--account', action='append',
+                               help='account to be reported, all by default')
+    parser_report.add_argument('--output-dir', default='.',
+                               help='folder of the report files')
+    parser_report.add_argument('--format', choices=('csv', 'parquet'),
+                               default='csv', help='report file format')
+    parser_report.set_defaults(handler=capacity_report)
+
+    parser_volumes = subparsers.add_parser(
+        'list-volumes', help='stream the volumes of a resource group as CSV')
+    parser_volumes.add_argument('--resource-group', required=True,
+                                help='resource group holding the accounts')
+    parser_volumes.add_argument('--account', action='append',
+                                help='account to be listed, all by default')
+    parser_volumes.set_defaults(handler=list_volumes)
+
+    parser_fleet = subparsers.add_parser(
+        'fleet', help='run a job over many subscriptions and regions')
+    parser_fleet.add_argument('job', choices=('inventory', 'apply'),
+                              help='job run for every shard')
+    parser_fleet.add_argument('shards', help='JSON file of shards')
+    parser_fleet.add_argument('--manifest',
+                              help='manifest applied to every shard')
+    parser_fleet.add_argument('--workers', type=int,
+                              help='number of worker processes')
+    parser_fleet.set_defaults(handler=fleet)
+
+    parser_run = subparsers.add_parser('run', help='run example.py')
+    parser_run.set_defaults(handler=run)
+
+    parser_async = subparsers.add_parser('run-async',
+                                         help='run example_async.py')
+    parser_async.add_argument('--count', type=int, default=1,
+                              help='number of concurrent deployments')
+    parser_async.set_defaults(handler=run_async)
+
+    parser_benchmark = subparsers.add_parser(
+        'benchmark', help='run the offline provisioning benchmark')
+    parser_benchmark.add_argument('--counts', type=int, nargs='+',
+                                  default=[1, 10, 100, 1000],
+                                  help='volume counts to be measured')
+    parser_benchmark.add_argument('--concurrency', type=int, default=16,
+                                  help='maximum number of volumes in flight')
+    parser_benchmark.add_argument('--time-scale', type=float, default=0.001,
+                                  help='wall-clock seconds per simulated '
+                                       'second')
+    parser_benchmark.add_argument('--seed', type=int, default=1,
+                                  help='seed of the simulated latencies')
+    parser_benchmark.add_argument('--cleanup', action='store_true',
+                                  help='also delete every resource')
+    parser_benchmark.set_defaults(handler=benchmark)
+
+    return parser
+
+
+def main(argv=None):
+    """Runs the subcommand of a command line
+
+    Args:
+        argv (list): Optional. Arguments, sys.argv[1:] by default
+
+    Returns:
+        int: Returns the exit code
+    """
+
+    arguments = build_parser().parse_args(argv)
+    return arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
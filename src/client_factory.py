@@ -0,0 +1,191 @@
+# client_factory.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""client_factory.py code sample
+
+Client factory that reuses credentials, access tokens and HTTP connections
+across every management client of a process: all clients built by the same
+factory share one credential object and one pooled keep-alive transport.
+
+Notes:
+The connection pool size is taken from the ANF_HTTP_POOL_SIZE environment
+variable when set, DEFAULT_POOL_SIZE otherwise. Setting
+ANF_PERSIST_TOKEN_CACHE=1 persists access tokens between runs (requires
+msal-extensions). Calls are paced by the process wide rate_limiter.
+
+"""
+
+import os
+import threading
+import rate_limiter
+import sample_utils
+import tracing
+
+DEFAULT_POOL_SIZE = 32
+
+
+def get_pool_size():
+    """Gets the configured HTTP connection pool size
+
+    Returns:
+        int: Returns ANF_HTTP_POOL_SIZE when set, DEFAULT_POOL_SIZE otherwise
+    """
+
+    return int(os.environ.get('ANF_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+
+def build_shared_transport(pool_size=None):
+    """Builds a pooled keep-alive transport to be shared by many clients
+
+    The requests session is not owned by the transport, so closing one of
+    the clients using it does not close the connections of the others.
+
+    Args:
+        pool_size (int): Optional. Maximum number of connections kept per
+            host, defaults to get_pool_size()
+
+    Returns:
+        RequestsTransport: Returns the transport
+    """
+
+    # requests is only imported once a transport is actually needed
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from azure.core.pipeline.transport import RequestsTransport
+
+    pool_size = pool_size or get_pool_size()
+
+    session = requests.Session()
+    # Retries are handled by the azure-core retry policy
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size,
+                          max_retries=Retry(total=False, redirect=False,
+                                            raise_on_status=False))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return RequestsTransport(session=session, session_owner=False)
+
+
+class ClientFactory:
+    """Builds management clients sharing credentials and connections
+
+    Clients are memoized per subscription, so asking twice for the NetApp
+    client of a subscription returns the same object. Additional keyword
+    arguments given to the factory (e.g. per_call_policies) are passed to
+    every client, after the tracing counter policies. Every attempt of every
+    call goes through the rate limiter, the process wide one unless another
+    is given.
+    """
+
+    def __init__(self, pool_size=None, persist_token_cache=None,
+                 limiter=None, **kwargs):
+        if persist_token_cache is None:
+            persist_token_cache = \
+                os.environ.get('ANF_PERSIST_TOKEN_CACHE', '0') == '1'
+        self.pool_size = pool_size or get_pool_size()
+        self.persist_token_cache = persist_token_cache
+        self.limiter = limiter or rate_limiter.get_default_limiter()
+        policies = tracing.get_client_policies()
+        policies['per_retry_policies'].append(
+            rate_limiter.RateLimitPolicy(self.limiter))
+        for name, factory_policies in policies.items():
+            kwargs[name] = factory_policies + list(kwargs.get(name) or [])
+        self.client_kwargs = kwargs
+        self._transport = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @property
+    def credentials(self):
+        """ClientSecretCredential: Memoized service principal credential"""
+        return sample_utils.get_credentials(self.persist_token_cache)[0]
+
+    @property
+    def subscription_id(self):
+        """string: Subscription id of the service principal"""
+        return sample_utils.get_credentials(self.persist_token_cache)[1]
+
+    @property
+    def transport(self):
+        """RequestsTransport: Transport shared by every client"""
+        with self._lock:
+            if self._transport is None:
+                self._transport = build_shared_transport(self.pool_size)
+            return self._transport
+
+    def _get_client(self, client_class, subscription_id):
+        """Builds or returns the memoized client of a subscription"""
+
+        subscription_id = subscription_id or self.subscription_id
+        transport = self.transport
+        key = (client_class, subscription_id)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = client_class(self.credentials,
+                                                  subscription_id,
+                                                  transport=transport,
+                                                  **self.client_kwargs)
+            return self._clients[key]
+
+    def netapp_client(self, subscription_id=None):
+        """Gets the NetAppManagementClient of a subscription
+
+        Args:
+            subscription_id (string): Optional. Defaults to the subscription
+                of the service principal
+
+        Returns:
+            NetAppManagementClient: Returns the shared client
+        """
+
+        from azure.mgmt.netapp import NetAppManagementClient
+        return self._get_client(NetAppManagementClient, subscription_id)
+
+    def resource_client(self, subscription_id=None):
+        """Gets the ResourceManagementClient of a subscription
+
+        Args:
+            subscription_id (string): Optional. Defaults to the subscription
+                of the service principal
+
+        Returns:
+            ResourceManagementClient: Returns the shared client
+        """
+
+        from azure.mgmt.resource import ResourceManagementClient
+        return self._get_client(ResourceManagementClient, subscription_id)
+
+    def close(self):
+        """Closes every client and the shared connections"""
+
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            transport, self._transport = self._transport, None
+        for client in clients.values():
+            client.close()
+        if transport is not None and transport.session is not None:
+            transport.session.close()
+
+
+_DEFAULT_FACTORY = None
+_DEFAULT_FACTORY_LOCK = threading.Lock()
+
+
+def get_default_factory():
+    """Gets the process wide client factory
+
+    Returns:
+        ClientFactory: Returns the factory, built on first use
+    """
+
+    global _DEFAULT_FACTORY # pylint: disable=global-statement
+    with _DEFAULT_FACTORY_LOCK:
+        if _DEFAULT_FACTORY is None:
+            _DEFAULT_FACTORY = ClientFactory()
+        return _DEFAULT_FACTORY
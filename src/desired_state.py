@@ -0,0 +1,540 @@
+# desired_state.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""desired_state.py code sample
+
+Declarative plan/apply mode: a desired-state manifest lists the accounts,
+capacity pools and NFSv4.1 volumes that should exist, plan() compares it
+with the current state and apply() only executes the create, update and
+delete actions that are actually needed.
+
+Manifest format (JSON, or YAML with the optional PyYAML package):
+
+    {
+        "resourceGroup": "anf01-rg",
+        "location": "eastus",
+        "subnetId": "/subscriptions/.../subnets/anf-sn",
+        "prune": false,
+        "accounts": [{
+            "name": "account01",
+            "tags": {"dept": "IT"},
+            "capacityPools": [{
+                "name": "pool01",
+                "serviceLevel": "Standard",
+                "size": 4398046511104,
+                "volumes": [{
+                    "name": "vol01",
+                    "usageThreshold": 107374182400
+                }]
+            }]
+        }]
+    }
+
+location, subnetId and tags can also be set on each account, pool or
+volume. When prune is true, pools and volumes found under the manifest
+accounts but not listed in the manifest are deleted.
+
+Existing resources are only updated through PATCH calls of the fields ANF
+can change after creation, UPDATABLE_FIELDS. A manifest changing any other
+field of an existing resource, e.g. the subnetId of a volume or the
+serviceLevel of a pool, is rejected by plan() with a ValueError.
+
+Usage:
+python desired_state.py plan|apply manifest.json
+
+.yaml and .yml manifests need PyYAML, which is not part of requirements.txt:
+pip install pyyaml
+
+"""
+
+import json
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from sample_utils import console_output
+import sample_utils
+import resource_uri_utils
+import cleanup_utils
+import client_factory
+import example
+
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+ACTION_DELETE = 'delete'
+
+# Default maximum number of actions of the same level applied at once
+DEFAULT_MAX_WORKERS = 16
+
+# Body fields of each resource kind that can be changed by a PATCH, any
+# other field is fixed at creation
+UPDATABLE_FIELDS = {
+    resource_uri_utils.KIND_ACCOUNT: ('tags',),
+    resource_uri_utils.KIND_CAPACITY_POOL: ('tags', 'size'),
+    resource_uri_utils.KIND_VOLUME: ('tags', 'usage_threshold',
+                                     'export_policy', 'throughput_mibps'),
+}
+
+PlanAction = namedtuple('PlanAction', ['action', 'resource_id', 'body',
+                                       'changes'])
+PlanAction.__doc__ = """One action of a plan
+
+action is one of ACTION_CREATE, ACTION_UPDATE or ACTION_DELETE, body is the
+desired NetAppAccount, CapacityPool or Volume body (None for deletes) and
+changes lists the top level body fields that differ from the current state,
+the fields sent by the PATCH of an update.
+"""
+
+ApplyResult = namedtuple('ApplyResult', ['applied', 'failed', 'skipped',
+                                         'elapsed'])
+ApplyResult.__doc__ = """Outcome of apply()
+
+applied lists the executed PlanAction entries, failed maps resource ids to
+the exception raised, skipped lists actions not executed because an action
+of a parent resource failed and elapsed is the wall-clock time in seconds.
+"""
+
+
+def load_manifest(path):
+    """Loads a desired-state manifest from a JSON or YAML file
+
+    Args:
+        path (string): Path of the manifest, files ending in .yaml or .yml
+            are parsed as YAML and require PyYAML
+
+    Returns:
+        dict: Returns the manifest
+
+    Raises:
+        ImportError: A YAML manifest is given and PyYAML is not installed
+    """
+
+    with open(path) as manifest_file:
+        if path.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError('PyYAML is required to load .yaml '
+                                  'manifests') from None
+            return yaml.safe_load(manifest_file)
+        return json.load(manifest_file)
+
+
+def build_desired_state(manifest, subscription_id):
+    """Builds the bodies of every resource of a manifest
+
+    Bodies are built with the same functions used by the create_* functions
+    of example.py, so a converged resource is one those functions would
+    have created.
+
+    Args:
+        manifest (dict): Desired-state manifest
+        subscription_id (string): Subscription id where resources live
+
+    Returns:
+        dict: Returns resource id -> body, accounts first, then capacity
+            pools and volumes
+    """
+
+    resource_group_name = manifest['resourceGroup']
+    accounts, pools, volumes = {}, {}, {}
+
+    for account in manifest.get('accounts', []):
+        location = account.get('location', manifest.get('location'))
+        account_id = resource_uri_utils.build_anf_resource_id(
+            subscription_id, resource_group_name, account['name'])
+        accounts[account_id] = example.build_account_body(
+            location, account.get('tags'))
+
+        for pool in account.get('capacityPools', []):
+            pool_location = pool.get('location', location)
+            pool_id = resource_uri_utils.build_anf_resource_id(
+                subscription_id, resource_group_name, account['name'],
+                pool['name'])
+            pools[pool_id] = example.build_capacitypool_body(
+                pool['serviceLevel'], pool['size'], pool_location,
+                pool.get('tags'))
+
+            for volume in pool.get('volumes', []):
+                volume_id = resource_uri_utils.build_anf_resource_id(
+                    subscription_id, resource_group_name, account['name'],
+                    pool['name'], volume['name'])
+                volumes[volume_id] = example.build_volume_body(
+                    volume['name'],
+                    volume['usageThreshold'],
+                    volume.get('serviceLevel', pool['serviceLevel']),
+                    volume.get('subnetId', account.get(
+                        'subnetId', manifest.get('subnetId'))),
+                    volume.get('location', pool_location),
+                    volume.get('tags'))
+
+    desired_state = dict(accounts)
+    desired_state.update(pools)
+    desired_state.update(volumes)
+    return desired_state
+
+
+def list_current_state(client, resource_group_name, account_names):
+    """Lists the current state of a set of accounts
+
+    One list call is made for the accounts of the resource group, one per
+    existing account for its capacity pools and one per existing capacity
+    pool for its volumes.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Names of the accounts to be listed
+
+    Returns:
+        dict: Returns lower case resource id -> NetAppAccount, CapacityPool
+            or Volume
+    """
+
+    account_names = {name.lower() for name in account_names}
+    current_state = {}
+
+    for account in client.accounts.list(resource_group_name):
+        account_name = resource_uri_utils.get_anf_account(account.id)
+        if account_name.lower() not in account_names:
+            continue
+        current_state[account.id.lower()] = account
+
+        for pool in client.pools.list(resource_group_name, account_name):
+            current_state[pool.id.lower()] = pool
+
+            for volume in client.volumes.list(
+                    resource_group_name, account_name,
+                    resource_uri_utils.get_anf_capacity_pool(pool.id)):
+                current_state[volume.id.lower()] = volume
+
+    return current_state
+
+
+def _is_subset(desired, current):
+    """Checks that every value set in desired has the same value in current
+
+    Strings are compared case insensitively, ARM normalizes the casing of
+    some values such as locations and resource ids.
+    """
+
+    if isinstance(desired, dict):
+        if not isinstance(current, dict):
+            return not any(value is not None for value in desired.values())
+        return all(_is_subset(value, current.get(key))
+                   for key, value in desired.items() if value is not None)
+    if isinstance(desired, list):
+        return isinstance(current, list) and len(desired) == len(current) \
+            and all(_is_subset(d, c) for d, c in zip(desired, current))
+    if isinstance(desired, str) and isinstance(current, str):
+        return desired.lower() == current.lower()
+    return desired == current
+
+
+def get_changes(desired_body, current):
+    """Lists the body fields that differ from the current resource
+
+    Only fields set in the desired body are compared, read-only and default
+    values returned by the RP don't count as changes. Tags are an exception,
+    an empty or missing desired tags field means no tags.
+
+    Args:
+        desired_body (Model): Desired NetAppAccount, CapacityPool or Volume
+        current (Model): Current resource as returned by the RP
+
+    Returns:
+        list: Returns the names of the fields that differ
+    """
+
+    desired = desired_body.as_dict()
+    existing = current.as_dict()
+    changes = [field for field, value in desired.items()
+               if field != 'tags' and value is not None
+               and not _is_subset(value, existing.get(field))]
+    if (desired.get('tags') or {}) != (existing.get('tags') or {}):
+        changes.append('tags')
+    return changes
+
+
+def get_immutable_changes(resource_id, changes):
+    """Lists the changed fields ANF cannot update in place
+
+    Args:
+        resource_id (string): Resource id of the resource
+        changes (list): Field names returned by get_changes()
+
+    Returns:
+        list: Returns the changed fields missing from UPDATABLE_FIELDS
+    """
+
+    updatable = UPDATABLE_FIELDS.get(
+        resource_uri_utils.parse_resource_id(resource_id).kind, ())
+    return [field for field in changes if field not in updatable]
+
+
+def plan(client, manifest, subscription_id):
+    """Computes the actions needed to converge to a manifest
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        manifest (dict): Desired-state manifest
+        subscription_id (string): Subscription id where resources live
+
+    Returns:
+        list: Returns PlanAction entries, creates and updates ordered from
+            accounts to volumes followed by deletes
+
+    Raises:
+        ValueError: The manifest changes fields of existing resources that
+            cannot be updated
+    """
+
+    desired_state = build_desired_state(manifest, subscription_id)
+    current_state = list_current_state(
+        client, manifest['resourceGroup'],
+        [account['name'] for account in manifest.get('accounts', [])])
+
+    actions = []
+    immutable_changes = []
+    for resource_id, body in desired_state.items():
+        current = current_state.get(resource_id.lower())
+        if current is None:
+            actions.append(PlanAction(ACTION_CREATE, resource_id, body, []))
+            continue
+        changes = get_changes(body, current)
+        immutable = get_immutable_changes(current.id, changes)
+        if immutable:
+            immutable_changes.append('{} ({})'.format(current.id,
+                                                      ', '.join(immutable)))
+        elif changes:
+            actions.append(PlanAction(ACTION_UPDATE, current.id, body,
+                                      changes))
+
+    if immutable_changes:
+        raise ValueError('Fields that cannot be updated differ from the '
+                         'manifest, the resources need to be recreated: {}'
+                         .format('; '.join(immutable_changes)))
+
+    if manifest.get('prune'):
+        desired_keys = {resource_id.lower() for resource_id in desired_state}
+        actions.extend(PlanAction(ACTION_DELETE, current.id, None, [])
+                       for key, current in current_state.items()
+                       if key not in desired_keys)
+
+    return actions
+
+
+def format_plan(actions):
+    """Formats plan actions as human readable lines
+
+    Args:
+        actions (list): PlanAction entries returned by plan()
+
+    Returns:
+        list: Returns one string per action
+    """
+
+    symbols = {ACTION_CREATE: '+', ACTION_UPDATE: '~', ACTION_DELETE: '-'}
+    return ['{} {}{}'.format(symbols[action.action], action.resource_id,
+                             ' ({})'.format(', '.join(action.changes))
+                             if action.changes else '')
+            for action in actions]
+
+
+def _create(client, resource_id, body):
+    """Runs the begin_create_or_update call matching a resource id"""
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+    if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+        poller = client.accounts.begin_create_or_update(
+            rid.resource_group, rid.account, body)
+    elif rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        poller = client.pools.begin_create_or_update(
+            rid.resource_group, rid.account, rid.pool, body)
+    elif rid.kind == resource_uri_utils.KIND_VOLUME:
+        poller = client.volumes.begin_create_or_update(
+            rid.resource_group, rid.account, rid.pool, rid.volume, body)
+    else:
+        raise ValueError('Unsupported resource id: {}'.format(resource_id))
+
+    resource = poller.result()
+
+    # ARM Workaround to wait for the creation completion
+    sample_utils.wait_for_anf_resource(client, resource.id)
+    return resource
+
+
+def build_patch(resource_id, body, changes):
+    """Builds the PATCH body of the changed fields of a resource
+
+    Args:
+        resource_id (string): Resource id of the resource
+        body (Model): Desired NetAppAccount, CapacityPool or Volume
+        changes (list): Changed fields, all of them in UPDATABLE_FIELDS
+
+    Returns:
+        Model: Returns the NetAppAccountPatch, CapacityPoolPatch or
+            VolumePatch
+    """
+
+    from azure.mgmt.netapp import models
+
+    kind = resource_uri_utils.parse_resource_id(resource_id).kind
+    desired = body.as_dict()
+    fields = {field: desired.get(field) for field in changes}
+    if 'tags' in fields:
+        # No desired tags means no tags, an empty dict removes them
+        fields['tags'] = fields['tags'] or {}
+
+    if kind == resource_uri_utils.KIND_ACCOUNT:
+        return models.NetAppAccountPatch.from_dict(fields)
+    # The patch models default size and usage_threshold to the minimum
+    # sizes, they are always sent so a patch never shrinks the resource
+    if kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        fields['size'] = body.size
+        return models.CapacityPoolPatch.from_dict(fields)
+    if kind == resource_uri_utils.KIND_VOLUME:
+        fields['usage_threshold'] = body.usage_threshold
+        return models.VolumePatch.from_dict(fields)
+    raise ValueError('Unsupported resource id: {}'.format(resource_id))
+
+
+def _update(client, resource_id, body, changes):
+    """Runs the begin_update call (PATCH) of the changed fields"""
+
+    patch = build_patch(resource_id, body, changes)
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+    if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+        poller = client.accounts.begin_update(rid.resource_group, rid.account,
+                                              patch)
+    elif rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        poller = client.pools.begin_update(rid.resource_group, rid.account,
+                                           rid.pool, patch)
+    else:
+        poller = client.volumes.begin_update(rid.resource_group, rid.account,
+                                             rid.pool, rid.volume, patch)
+    return poller.result()
+
+
+def _apply_action(client, action):
+    """Runs the create or update of a plan action"""
+
+    if action.action == ACTION_CREATE:
+        return _create(client, action.resource_id, action.body)
+    return _update(client, action.resource_id, action.body, action.changes)
+
+
+def apply(client, actions, max_workers=DEFAULT_MAX_WORKERS):
+    """Executes the actions of a plan
+
+    Creates (PUT) and updates (PATCH) run level by level (accounts, capacity
+    pools and then volumes) with the actions of the same level in parallel;
+    deletes run last through cleanup_utils.delete_anf_resources().
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        actions (list): PlanAction entries returned by plan()
+        max_workers (int): Optional. Maximum number of actions in flight
+
+    Returns:
+        ApplyResult: Returns applied, failed and skipped actions
+    """
+
+    start = time.monotonic()
+    applied, failed, skipped = [], {}, []
+
+    def has_failed_ancestor(resource_id):
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        while parent_id is not None:
+            if parent_id.lower() in failed_keys:
+                return True
+            parent_id = resource_uri_utils.get_anf_parent_id(parent_id)
+        return False
+
+    failed_keys = set()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for kind in resource_uri_utils.ANF_RESOURCE_KINDS[1:]:
+            level = []
+            for action in actions:
+                if action.action == ACTION_DELETE or \
+                        resource_uri_utils.parse_resource_id(
+                            action.resource_id).kind != kind:
+                    continue
+                if has_failed_ancestor(action.resource_id):
+                    skipped.append(action)
+                    continue
+                console_output('\t{} {}'.format(action.action.capitalize(),
+                                                action.resource_id))
+                level.append((action, executor.submit(
+                    _apply_action, client, action)))
+
+            for action, future in level:
+                try:
+                    future.result()
+                    applied.append(action)
+                except Exception as ex: # pylint: disable=broad-except
+                    failed[action.resource_id] = ex
+                    failed_keys.add(action.resource_id.lower())
+                    console_output('\tFailed to {} {}. Error details: {}'
+                                   .format(action.action, action.resource_id,
+                                           ex))
+
+    deletes = {action.resource_id: action for action in actions
+               if action.action == ACTION_DELETE}
+    if deletes:
+        cleanup_result = cleanup_utils.delete_anf_resources(
+            client, list(deletes), max_workers=max_workers)
+        applied.extend(deletes[resource_id]
+                       for resource_id in cleanup_result.deleted)
+        failed.update(cleanup_result.failed)
+        skipped.extend(deletes[resource_id]
+                       for resource_id in cleanup_result.skipped)
+
+    return ApplyResult(applied, failed, skipped, time.monotonic() - start)
+
+
+def run(command, manifest_path):
+    """Runs plan or apply against the subscription of the credentials
+
+    Args:
+        command (string): "plan" or "apply"
+        manifest_path (string): Path of the desired-state manifest
+
+    Returns:
+        list or ApplyResult: Returns the plan actions for "plan" and the
+            apply result for "apply"
+    """
+
+    factory = client_factory.get_default_factory()
+    subscription_id = factory.subscription_id
+    anf_client = factory.netapp_client()
+
+    actions = plan(anf_client, load_manifest(manifest_path), subscription_id)
+    console_output('Plan: {} action(s)'.format(len(actions)))
+    for line in format_plan(actions):
+        console_output('\t{}'.format(line))
+
+    if command != 'apply':
+        return actions
+
+    result = apply(anf_client, actions)
+    console_output('Applied {} action(s), {} failed, {} skipped in {:.0f}s'
+                   .format(len(result.applied), len(result.failed),
+                           len(result.skipped), result.elapsed))
+    return result
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) != 3 or sys.argv[1] not in ('plan', 'apply'):
+        print('Usage: python desired_state.py plan|apply manifest.json')
+        sys.exit(2)
+
+    run(sys.argv[1], sys.argv[2])
@@ -17,20 +17,26 @@ AZURE_AUTH_LOCATION: contains path for azureauth.json file
 File content (and how to generate) is documented at
 https://docs.microsoft.com/en-us/dotnet/azure/dotnet-sdk-azure-authenticate?view=azure-dotnet
 
+Steps are recorded in a checkpoint journal, CHECKPOINT_FILE or the file set
+in ANF_CHECKPOINT_FILE. When a run is interrupted the next one reuses its
+account name, skips the completed steps and reattaches to operations still
+in flight. The journal is deleted once a run completes.
+
 """
 
-from haikunator import Haikunator
+import logging
+import os
+from functools import lru_cache
 from azure.core.exceptions import AzureError
-from azure.mgmt.netapp import NetAppManagementClient
-from azure.mgmt.netapp.models import NetAppAccount, \
-    CapacityPool, \
-    Volume, \
-    ExportPolicyRule, \
-    VolumePropertiesExportPolicy
-from azure.mgmt.resource import ResourceManagementClient
-from sample_utils import console_output, print_header, resource_exists
+from sample_utils import console_output, print_header
 import sample_utils
+import resource_index
+import checkpoint_journal
+import subnet_prevalidation
 import resource_uri_utils
+import cleanup_utils
+import client_factory
+import tracing
 
 SHOULD_CLEANUP = False
 LOCATION = 'eastus'
@@ -38,18 +44,200 @@ RESOURCE_GROUP_NAME = 'anf01-rg'
 VNET_NAME = 'vnet-01'
 SUBNET_NAME = 'anf-sn'
 VNET_RESOURCE_GROUP_NAME = 'anf01-rg'
-ANF_ACCOUNT_NAME = Haikunator().haikunate(delimiter='')
 CAPACITYPOOL_NAME = "Pool01"
 CAPACITYPOOL_SERVICE_LEVEL = "Standard"
 CAPACITYPOOL_SIZE = 4398046511104  # 4TiB
-VOLUME_NAME = 'Vol-{}-{}'.format(ANF_ACCOUNT_NAME, CAPACITYPOOL_NAME)
 VOLUME_USAGE_QUOTA = 107374182400  # 100GiB
+CHECKPOINT_FILE = 'anf-example.journal'
 
 # Resource SDK related (change only if API version is not supported anymore)
 VIRTUAL_NETWORKS_SUBNET_API_VERSION = '2018-11-01'
 
+# The SDK models and haikunator are imported by the functions using them, so
+# importing this module stays cheap for commands that never reach Azure.
+
+
+@lru_cache(maxsize=None)
+def get_account_name():
+    """Gets the random account name of this run, generated on first use
+
+    Returns:
+        string: Returns the account name, also exposed as ANF_ACCOUNT_NAME
+    """
+
+    from haikunator import Haikunator
+    return Haikunator().haikunate(delimiter='')
+
+
+def get_volume_name(account_name=None):
+    """Gets the volume name of this run, derived from the account name
+
+    Args:
+        account_name (string): Optional. Account name, get_account_name() by
+            default
+
+    Returns:
+        string: Returns the volume name, also exposed as VOLUME_NAME
+    """
+
+    return 'Vol-{}-{}'.format(account_name or get_account_name(),
+                              CAPACITYPOOL_NAME)
+
+
+def __getattr__(name):
+    # ANF_ACCOUNT_NAME and VOLUME_NAME are only generated when accessed
+    if name == 'ANF_ACCOUNT_NAME':
+        return get_account_name()
+    if name == 'VOLUME_NAME':
+        return get_volume_name()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(
+        __name__, name))
+
+
+def build_account_body(location, tags=None):
+    """Builds the body of an Azure NetApp Files Account
+
+    Args:
+        location (string): Azure short name of the region where resource will
+            be deployed
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        NetAppAccount: Returns the account body used by create_account
+    """
+
+    from azure.mgmt.netapp.models import NetAppAccount
+
+    return NetAppAccount(location=location, tags=tags)
+
+
+def build_capacitypool_body(service_level, size, location, tags=None):
+    """Builds the body of a capacity pool
+
+    Args:
+        service_level (string): Desired service level for this new capacity
+            pool, valid values are "Ultra","Premium","Standard"
+        size (long): Capacity pool size, values range from 4398046511104
+            (4TiB) to 549755813888000 (500TiB)
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        CapacityPool: Returns the capacity pool body used by
+            create_capacitypool_async
+    """
+
+    from azure.mgmt.netapp.models import CapacityPool
+
+    return CapacityPool(
+        location=location,
+        service_level=service_level,
+        size=size,
+        tags=tags)
+
+
+def build_volume_body(volume_name, volume_usage_quota, service_level,
+                      subnet_id, location, tags=None):
+    """Builds the body of a NFSv4.1 volume
+
+    Args:
+        volume_name (string): Volume name, also used as creation token
+        volume_usage_quota (long): Volume size in bytes, minimum value is
+            107374182400 (100GiB), maximum value is 109951162777600 (100TiB)
+        service_level (string): Volume service level, needs to be the same as
+            the capacity pool, valid values are "Ultra","Premium","Standard"
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        Volume: Returns the volume body used by create_volume
+    """
+
+    from azure.mgmt.netapp.models import ExportPolicyRule, Volume, \
+        VolumePropertiesExportPolicy
+
+    rule_list = [ExportPolicyRule(
+        allowed_clients="0.0.0.0/0",
+        cifs=False,
+        nfsv3=False,
+        nfsv41=True,
+        rule_index=1,
+        unix_read_only=False,
+        unix_read_write=True)]
+
+    export_policies = VolumePropertiesExportPolicy(
+        rules=rule_list)
+
+    return Volume(
+        usage_threshold=volume_usage_quota,
+        creation_token=volume_name,
+        location=location,
+        service_level=service_level,
+        subnet_id=subnet_id,
+        protocol_types=["NFSv4.1"],
+        export_policy=export_policies,
+        tags=tags)
+
+
+def build_subnet_id(subscription_id, vnet_resource_group_name, vnet_name,
+                    subnet_name):
+    """Builds the resource id of a subnet
+
+    Args:
+        subscription_id (string): Subscription id where the vnet lives
+        vnet_resource_group_name (string): Resource group of the vnet
+        vnet_name (string): Virtual network name
+        subnet_name (string): Subnet name
+
+    Returns:
+        string: Returns the subnet resource id
+    """
+
+    return ('/subscriptions/{}'
+            '/resourceGroups/{}'
+            '/providers/Microsoft.Network/virtualNetworks/{}'
+            '/subnets/{}').format(
+        subscription_id, vnet_resource_group_name, vnet_name, subnet_name)
+
+
+def _run_creation(manager, journal, step, begin_function, *args,
+                  resource_getter=None, cache=None, index=None):
+    """Runs a creation, through the LRO manager when one is given
+
+    The cache entry of the new resource is invalidated and the resource is
+    added to the index once created.
+
+    Returns:
+        object: Returns the created resource, or a Future resolved with it
+            when manager is set
+    """
+
+    def register(resource):
+        if cache is not None:
+            cache.invalidate(resource.id)
+        if index is not None:
+            index.add(resource.id, resource)
+        return resource
+
+    if manager is not None:
+        return checkpoint_journal.submit_operation(
+            manager, journal, step, begin_function, *args,
+            resource_getter=resource_getter, result_function=register)
+    return register(checkpoint_journal.run_operation(
+        journal, step, begin_function, *args,
+        resource_getter=resource_getter))
+
+
 def create_account(client, resource_group_name, anf_account_name, location,
-                   tags=None):
+                   tags=None, cache=None, index=None, journal=None,
+                   manager=None):
     """Creates an Azure NetApp Files Account
 
     Function that creates an Azure NetApp Account, which requires building the
@@ -64,21 +252,36 @@ def create_account(client, resource_group_name, anf_account_name, location,
             be deployed
         tags (object): Optional. Key-value pairs to tag the resource, default
             value is None. E.g. {'cc':'1234','dept':'IT'}
+        cache (InventoryCache): Optional. Inventory cache whose entry for
+            the new resource is invalidated
+        index (ResourceIndex): Optional. Resource index the new resource is
+            added to
+        journal (CheckpointJournal): Optional. Checkpoint journal recording
+            the creation, a creation completed by an interrupted run is not
+            repeated
+        manager (LROManager): Optional. LRO manager tracking the creation,
+            a Future resolved with the new resource is returned instead of
+            blocking until it is created
 
     Returns:
         NetAppAccount: Returns the newly created NetAppAccount resource
     """
 
-    account_body = NetAppAccount(location=location, tags=tags)
+    account_body = build_account_body(location, tags)
 
-    return client.accounts.begin_create_or_update(resource_group_name,
-                                            anf_account_name,
-                                            account_body).result()
+    return _run_creation(
+        manager, journal, 'create_account/{}'.format(anf_account_name),
+        client.accounts.begin_create_or_update, resource_group_name,
+        anf_account_name, account_body,
+        resource_getter=lambda: client.accounts.get(resource_group_name,
+                                                    anf_account_name),
+        cache=cache, index=index)
 
 
 def create_capacitypool_async(client, resource_group_name, anf_account_name,
                               capacitypool_name, service_level, size, location,
-                              tags=None):
+                              tags=None, cache=None, index=None,
+                              journal=None, manager=None):
     """Creates a capacity pool within an account
 
     Function that creates a Capacity Pool, capacity pools are needed to define
@@ -101,26 +304,38 @@ def create_capacitypool_async(client, resource_group_name, anf_account_name,
             be deployed, needs to be the same as the account
         tags (object): Optional. Key-value pairs to tag the resource, default
             value is None. E.g. {'cc':'1234','dept':'IT'}
+        cache (InventoryCache): Optional. Inventory cache whose entry for
+            the new resource is invalidated
+        index (ResourceIndex): Optional. Resource index the new resource is
+            added to
+        journal (CheckpointJournal): Optional. Checkpoint journal recording
+            the creation, a creation completed by an interrupted run is not
+            repeated
+        manager (LROManager): Optional. LRO manager tracking the creation,
+            a Future resolved with the new resource is returned instead of
+            blocking until it is created
 
     Returns:
         CapacityPool: Returns the newly created capacity pool resource
     """
 
-    capacitypool_body = CapacityPool(
-        location=location,
-        service_level=service_level,
-        size=size,
-        tags=tags)
+    capacitypool_body = build_capacitypool_body(service_level, size, location,
+                                                tags)
 
-    return client.pools.begin_create_or_update(resource_group_name,
-                                         anf_account_name,
-                                         capacitypool_name,
-                                         capacitypool_body).result()
+    return _run_creation(
+        manager, journal, 'create_capacity_pool/{}/{}'.format(
+            anf_account_name, capacitypool_name),
+        client.pools.begin_create_or_update, resource_group_name,
+        anf_account_name, capacitypool_name, capacitypool_body,
+        resource_getter=lambda: client.pools.get(
+            resource_group_name, anf_account_name, capacitypool_name),
+        cache=cache, index=index)
 
 
 def create_volume(client, resource_group_name, anf_account_name,
                   capacitypool_name, volume_name, volume_usage_quota,
-                  service_level, subnet_id, location, tags=None):
+                  service_level, subnet_id, location, tags=None, cache=None,
+                  index=None, journal=None, manager=None):
     """Creates a volume within a capacity pool
 
     Function that in this example creates a NFSv4.1 volume within a capacity
@@ -148,82 +363,177 @@ def create_volume(client, resource_group_name, anf_account_name,
             be deployed, needs to be the same as the account
         tags (object): Optional. Key-value pairs to tag the resource, default
             value is None. E.g. {'cc':'1234','dept':'IT'}
+        cache (InventoryCache): Optional. Inventory cache whose entry for
+            the new resource is invalidated
+        index (ResourceIndex): Optional. Resource index the new resource is
+            added to
+        journal (CheckpointJournal): Optional. Checkpoint journal recording
+            the creation, a creation completed by an interrupted run is not
+            repeated
+        manager (LROManager): Optional. LRO manager tracking the creation,
+            a Future resolved with the new resource is returned instead of
+            blocking until it is created
 
     Returns:
         Volume: Returns the newly created volume resource
     """
 
-    rule_list = [ExportPolicyRule(
-        allowed_clients="0.0.0.0/0",
-        cifs=False,
-        nfsv3=False,
-        nfsv41=True,
-        rule_index=1,
-        unix_read_only=False,
-        unix_read_write=True)]
+    volume_body = build_volume_body(volume_name, volume_usage_quota,
+                                    service_level, subnet_id, location, tags)
 
-    export_policies = VolumePropertiesExportPolicy(
-        rules=rule_list)
+    return _run_creation(
+        manager, journal, 'create_volume/{}/{}/{}'.format(
+            anf_account_name, capacitypool_name, volume_name),
+        client.volumes.begin_create_or_update, resource_group_name,
+        anf_account_name, capacitypool_name, volume_name, volume_body,
+        resource_getter=lambda: client.volumes.get(
+            resource_group_name, anf_account_name, capacitypool_name,
+            volume_name),
+        cache=cache, index=index)
 
-    volume_body = Volume(
-        usage_threshold=volume_usage_quota,
-        creation_token=volume_name,
-        location=location,
-        service_level=service_level,
-        subnet_id=subnet_id,
-        protocol_types=["NFSv4.1"],
-        export_policy=export_policies,
-        tags=tags)
 
-    return client.volumes.begin_create_or_update(resource_group_name,
-                                           anf_account_name,
-                                           capacitypool_name,
-                                           volume_name,
-                                           volume_body).result()
+def create_volume_from_sizing(client, resource_group_name, anf_account_name,
+                              capacitypool_name, volume_name, sizing,
+                              subnet_id, location, tags=None, cache=None,
+                              index=None, journal=None, manager=None):
+    """Creates a volume with the quota and service level of a sizing
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created, its service level needs to be sizing.service_level
+        volume_name (string): Volume name
+        sizing (VolumeSizing): Result of volume_sizing.size_volume()
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+        cache (InventoryCache): Optional. Inventory cache whose entry for
+            the new resource is invalidated
+        index (ResourceIndex): Optional. Resource index the new resource is
+            added to
+        journal (CheckpointJournal): Optional. Checkpoint journal recording
+            the creation, a creation completed by an interrupted run is not
+            repeated
+        manager (LROManager): Optional. LRO manager tracking the creation,
+            a Future resolved with the new resource is returned instead of
+            blocking until it is created
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+    return create_volume(client, resource_group_name, anf_account_name,
+                         capacitypool_name, volume_name,
+                         sizing.usage_threshold, sizing.service_level,
+                         subnet_id, location, tags, cache, index, journal,
+                         manager)
 
 
 def run_example():
     """Azure NetApp Files SDK management example."""
 
+    # Phase timings are written as JSON lines to ANF_TRACE_FILE when set
+    exporter = tracing.configure_from_environment()
+    try:
+        with tracing.span('run_example'):
+            # Long running operations are polled by the threads of one LRO
+            # manager instead of one SDK polling thread each
+            import lro_manager
+            manager = lro_manager.LROManager()
+            manager.start()
+            try:
+                _run_example(manager)
+            finally:
+                manager.stop(wait=False)
+    finally:
+        if exporter is not None:
+            tracing.remove_exporter(exporter)
+            exporter.close()
+
+
+def _run_example(manager=None):
+    """Runs the phases of the example, each one within a tracing span"""
+
     print_header("Azure NetAppFiles Python SDK Sample - Sample "
         "project that creates an NFS v4.1 volume with Azure NetApp "
         " Files SDK with Python")
 
     # Creating the Azure NetApp Files Client with an Application
-    # (service principal) token provider
-    credentials, subscription_id = sample_utils.get_credentials()
-    anf_client = NetAppManagementClient(
-        credentials, subscription_id)
+    # (service principal) token provider, clients built by the factory share
+    # the credential and one pooled HTTP transport
+    factory = client_factory.get_default_factory()
+    subscription_id = factory.subscription_id
+    anf_client = factory.netapp_client()
+
+    # Resources created by this run, cleanup deletes the subtree of the
+    # account from it
+    index = resource_index.ResourceIndex()
+
+    # Steps of an interrupted run are resumed from its checkpoint journal
+    journal = checkpoint_journal.CheckpointJournal(
+        os.environ.get('ANF_CHECKPOINT_FILE') or CHECKPOINT_FILE)
+    if journal.resumed:
+        console_output('Resuming the interrupted run recorded in {}'.format(
+            journal.path))
+    if journal.get('cleanup') is not None:
+        # The interrupted run was cleaning up, only the resources it
+        # created that still exist are left to be deleted
+        for resource_id in journal.get_resource_ids():
+            if sample_utils.anf_resource_exists(
+                    sample_utils.get_anf_resource_getter(
+                        anf_client, resource_id)) is not False:
+                index.add(resource_id)
+        _cleanup(anf_client, index, None, journal, manager)
+        journal.finish()
+        return
 
     # Checking if vnet/subnet information leads to a valid resource
-    resources_client = ResourceManagementClient(credentials, subscription_id)
-    subnet_id = ('/subscriptions/{}'
-                '/resourceGroups/{}'
-                '/providers/Microsoft.Network/virtualNetworks/{}'
-                '/subnets/{}').format(
-        subscription_id, VNET_RESOURCE_GROUP_NAME, VNET_NAME, SUBNET_NAME)
-
-    result = resource_exists(resources_client,
-        subnet_id,
-        VIRTUAL_NETWORKS_SUBNET_API_VERSION)
-
-    if not result:
-        console_output("ERROR: Subnet not with id {} not found".format(
-            subnet_id))
-        raise Exception("Subnet not found error. Subnet Id {}".format(
-            subnet_id))
+    resources_client = factory.resource_client()
+    subnet_id = build_subnet_id(subscription_id, VNET_RESOURCE_GROUP_NAME,
+                                VNET_NAME, SUBNET_NAME)
+
+    # One GET checks that the subnet exists and is delegated to ANF volumes,
+    # the validator keeps the result for the rest of the run
+    validator = subnet_prevalidation.SubnetValidator(
+        resources_client, VIRTUAL_NETWORKS_SUBNET_API_VERSION)
+    with tracing.span('check_subnet', resource_id=subnet_id):
+        subnet_check = validator.check(subnet_id)
+
+    if subnet_check.error is not None:
+        console_output("ERROR: {}".format(subnet_check.reason))
+        raise subnet_check.error
+    if not subnet_check.valid:
+        console_output("ERROR: {}".format(subnet_check.reason))
+        raise Exception("Subnet validation error. {}".format(
+            subnet_check.reason))
 
     # Creating an Azure NetApp Account
     console_output('Creating Azure NetApp Files account ...')
+    account_name = journal.setdefault('account_name', get_account_name)
     account = None
     try:
-        account = create_account(anf_client,
-                                 RESOURCE_GROUP_NAME,
-                                 ANF_ACCOUNT_NAME,
-                                 LOCATION)
+        with tracing.span('create_account', account=account_name):
+            account = create_account(anf_client,
+                                     RESOURCE_GROUP_NAME,
+                                     account_name,
+                                     LOCATION,
+                                     index=index,
+                                     journal=journal,
+                                     manager=manager)
+            if manager is not None:
+                account = account.result()
         console_output(
             '\tAccount successfully created, resource id: {}'
-            .format(account.id))
+            .format(account.id), resource_id=account.id,
+            phase='create_account')
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -233,15 +543,24 @@ def run_example():
     console_output('Creating Capacity Pool ...')
     capacity_pool = None
     try:
-        capacity_pool = create_capacitypool_async(anf_client,
-                                                  RESOURCE_GROUP_NAME,
-                                                  account.name,
-                                                  CAPACITYPOOL_NAME,
-                                                  CAPACITYPOOL_SERVICE_LEVEL,
-                                                  CAPACITYPOOL_SIZE,
-                                                  LOCATION)
+        with tracing.span('create_capacity_pool', pool=CAPACITYPOOL_NAME):
+            capacity_pool = create_capacitypool_async(
+                anf_client,
+                RESOURCE_GROUP_NAME,
+                account.name,
+                CAPACITYPOOL_NAME,
+                CAPACITYPOOL_SERVICE_LEVEL,
+                CAPACITYPOOL_SIZE,
+                LOCATION,
+                index=index,
+                journal=journal,
+                manager=manager)
+            if manager is not None:
+                capacity_pool = capacity_pool.result()
         console_output('\tCapacity Pool successfully created, resource id: {}'
-                       .format(capacity_pool.id))
+                       .format(capacity_pool.id),
+                       resource_id=capacity_pool.id,
+                       phase='create_capacity_pool')
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -259,30 +578,43 @@ def run_example():
     # you will see a sample function that parses the name from its
     # resource id: resource_uri_utils.get_anf_capacity_pool()
     console_output('Creating a Volume ...')
-    subnet_id = ('/subscriptions/{}'
-                 '/resourceGroups/{}'
-                 '/providers/Microsoft.Network/virtualNetworks/{}'
-                 '/subnets/{}').format(
-        subscription_id, VNET_RESOURCE_GROUP_NAME, VNET_NAME, SUBNET_NAME)
+    subnet_id = build_subnet_id(subscription_id, VNET_RESOURCE_GROUP_NAME,
+                                VNET_NAME, SUBNET_NAME)
     volume = None
     try:
         pool_name = resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)
 
-        volume = create_volume(anf_client,
-                               RESOURCE_GROUP_NAME,
-                               account.name,
-                               pool_name,
-                               VOLUME_NAME,
-                               VOLUME_USAGE_QUOTA,
-                               CAPACITYPOOL_SERVICE_LEVEL,
-                               subnet_id,
-                               LOCATION)
+        volume_name = get_volume_name(account_name)
+        with tracing.span('create_volume', volume=volume_name):
+            volume = create_volume(anf_client,
+                                   RESOURCE_GROUP_NAME,
+                                   account.name,
+                                   pool_name,
+                                   volume_name,
+                                   VOLUME_USAGE_QUOTA,
+                                   CAPACITYPOOL_SERVICE_LEVEL,
+                                   subnet_id,
+                                   LOCATION,
+                                   index=index,
+                                   journal=journal,
+                                   manager=manager)
+            if manager is not None:
+                volume = volume.result()
 
         # ARM Workaround to wait for the creation completion
-        sample_utils.wait_for_anf_resource(anf_client, volume.id)
+        with tracing.span('wait_volume', resource_id=volume.id):
+            wait_result = sample_utils.wait_for_anf_resource(anf_client,
+                                                             volume.id)
+        if not wait_result.succeeded:
+            console_output(
+                '\tWARNING: Volume not visible after {:.0f}s'.format(
+                    wait_result.elapsed), logging.WARNING,
+                resource_id=volume.id, phase='wait_volume',
+                duration=wait_result.elapsed)
 
         console_output(
-            '\tVolume successfully created, resource id: {}'.format(volume.id))
+            '\tVolume successfully created, resource id: {}'.format(volume.id),
+            resource_id=volume.id, phase='create_volume')
     except AzureError as ex:
         console_output(
             'An error ocurred. Error details: {}'.format(ex.message))
@@ -291,63 +623,36 @@ def run_example():
     # Cleaning up volumes - for this to happen, please change the value of
     # SHOULD_CLEANUP variable to true.
     # Note: Volume deletion operations at the RP level are executed serially
+    # within a capacity pool
     if SHOULD_CLEANUP:
-        # Cleaning up. This process needs to start the cleanup from the
-        # innermost resources down in the hierarchy chain in our case
-        # Snapshots->Volumes->Capacity Pools->Accounts
-        console_output('Cleaning up...')
-
-        console_output("\tDeleting Volumes...")
-        try:
-            volume_ids = [volume.id]
-            for volume_id in volume_ids:
-                console_output("\t\tDeleting {}".format(volume_id))
-                anf_client.volumes.begin_delete(RESOURCE_GROUP_NAME,
-                                          account.name,
-                                          resource_uri_utils.get_anf_capacity_pool(
-                                              capacity_pool.id),
-                                          resource_uri_utils.get_anf_volume(
-                                              volume_id)
-                                          ).wait()
-
-                # ARM Workaround to wait the deletion complete/propagate
-                sample_utils.wait_for_no_anf_resource(anf_client, volume_id)
-
-                console_output('\t\tDeleted Volume: {}'.format(volume_id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
-
-        # Cleaning up Capacity Pool
-        console_output("\tDeleting Capacity Pool {} ...".format(
-            resource_uri_utils.get_anf_capacity_pool(capacity_pool.id)))
-        try:
-            anf_client.pools.begin_delete(RESOURCE_GROUP_NAME,
-                                    account.name,
-                                    resource_uri_utils.get_anf_capacity_pool(
-                                        capacity_pool.id)
-                                    ).wait()
-
-            # ARM Workaround to wait the deletion complete/propagate
-            sample_utils.wait_for_no_anf_resource(anf_client, capacity_pool.id)
+        _cleanup(anf_client, index, account.id, journal, manager)
 
-            console_output(
-                '\t\tDeleted Capacity Pool: {}'.format(capacity_pool.id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
-
-        # Cleaning up Account
-        console_output("\tDeleting Account {} ...".format(account.name))
-        try:
-            anf_client.accounts.begin_delete(RESOURCE_GROUP_NAME, account.name)
-            console_output('\t\tDeleted Account: {}'.format(account.id))
-        except AzureError as ex:
-            console_output(
-                'An error ocurred. Error details: {}'.format(ex.message))
-            raise
+    journal.finish()
+
+
+def _cleanup(anf_client, index, account_id, journal, manager=None):
+    """Deletes the indexed resources, recording the cleanup in the journal"""
+
+    # Cleaning up. This process needs to start the cleanup from the
+    # innermost resources down in the hierarchy chain in our case
+    # Snapshots->Volumes->Capacity Pools->Accounts, cleanup_utils takes
+    # care of the ordering and deletes independent resources in parallel
+    console_output('Cleaning up...')
+    journal.record('cleanup', checkpoint_journal.STATE_INTENT)
+
+    with tracing.span('cleanup'):
+        cleanup_result = cleanup_utils.delete_anf_subtree(
+            anf_client, index, account_id, manager=manager)
+
+    for resource_id, ex in cleanup_result.failed.items():
+        console_output('An error ocurred deleting {}. Error details: {}'
+                       .format(resource_id, ex))
+    if cleanup_result.failed:
+        raise next(iter(cleanup_result.failed.values()))
+
+    console_output('\tCleanup completed in {:.0f}s'.format(
+        cleanup_result.elapsed), phase='cleanup',
+                   duration=cleanup_result.elapsed)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,318 @@
+# example_async.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""example_async.py code sample
+
+asyncio counterpart of example.py, it deploys ANF Accounts, Capacity Pools
+and NFSv4.1 volumes using the azure.mgmt.netapp.aio client, so a single
+process and thread can drive many independent deployments at once.
+
+Notes:
+This script expects the same AZURE_AUTH_LOCATION environment variable as
+example.py and requires aiohttp, the asyncio transport of azure-core.
+
+Usage:
+python example_async.py [deployment count]
+
+"""
+
+import asyncio
+import sys
+from haikunator import Haikunator
+from azure.core.exceptions import AzureError
+from azure.mgmt.netapp.aio import NetAppManagementClient
+from azure.mgmt.resource.resources.aio import ResourceManagementClient
+from sample_utils import console_output, print_header
+import sample_utils
+import example
+import rate_limiter
+import resource_uri_utils
+
+# Maximum number of deployments running their LROs at the same time
+MAX_CONCURRENT_DEPLOYMENTS = 50
+
+
+async def create_account(client, resource_group_name, anf_account_name,
+                         location, tags=None):
+    """Creates an Azure NetApp Files Account
+
+    asyncio counterpart of example.create_account().
+
+    Args:
+        client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure Resource
+            Provider asyncio Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            account will be created
+        anf_account_name (string): Name of the Azure NetApp Files Account
+        location (string): Azure short name of the region where resource will
+            be deployed
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        NetAppAccount: Returns the newly created NetAppAccount resource
+    """
+
+    poller = await client.accounts.begin_create_or_update(
+        resource_group_name,
+        anf_account_name,
+        example.build_account_body(location, tags))
+
+    return await poller.result()
+
+
+async def create_capacitypool(client, resource_group_name, anf_account_name,
+                              capacitypool_name, service_level, size,
+                              location, tags=None):
+    """Creates a capacity pool within an account
+
+    asyncio counterpart of example.create_capacitypool_async(), which despite
+    its name blocks until the pool is created.
+
+    Args:
+        client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure Resource
+            Provider asyncio Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            capacity pool will be created, it needs to be the same as the
+            Account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool will be created
+        capacitypool_name (string): Capacity pool name
+        service_level (string): Desired service level for this new capacity
+            pool, valid values are "Ultra","Premium","Standard"
+        size (long): Capacity pool size, values range from 4398046511104
+            (4TiB) to 549755813888000 (500TiB)
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        CapacityPool: Returns the newly created capacity pool resource
+    """
+
+    poller = await client.pools.begin_create_or_update(
+        resource_group_name,
+        anf_account_name,
+        capacitypool_name,
+        example.build_capacitypool_body(service_level, size, location, tags))
+
+    return await poller.result()
+
+
+async def create_volume(client, resource_group_name, anf_account_name,
+                        capacitypool_name, volume_name, volume_usage_quota,
+                        service_level, subnet_id, location, tags=None):
+    """Creates a volume within a capacity pool
+
+    asyncio counterpart of example.create_volume().
+
+    Args:
+        client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure Resource
+            Provider asyncio Client designed to interact with ANF resources
+        resource_group_name (string): Name of the resource group where the
+            volume will be created, it needs to be the same as the account
+        anf_account_name (string): Name of the Azure NetApp Files Account where
+            the capacity pool holding the volume exists
+        capacitypool_name (string): Capacity pool name where volume will be
+            created
+        volume_name (string): Volume name
+        volume_usage_quota (long): Volume size in bytes, minimum value is
+            107374182400 (100GiB), maximum value is 109951162777600 (100TiB)
+        service_level (string): Volume service level, needs to be the same as
+            the capacity pool, valid values are "Ultra","Premium","Standard"
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+        location (string): Azure short name of the region where resource will
+            be deployed, needs to be the same as the account
+        tags (object): Optional. Key-value pairs to tag the resource, default
+            value is None. E.g. {'cc':'1234','dept':'IT'}
+
+    Returns:
+        Volume: Returns the newly created volume resource
+    """
+
+    poller = await client.volumes.begin_create_or_update(
+        resource_group_name,
+        anf_account_name,
+        capacitypool_name,
+        volume_name,
+        example.build_volume_body(volume_name, volume_usage_quota,
+                                  service_level, subnet_id, location, tags))
+
+    return await poller.result()
+
+
+async def cleanup_deployment(anf_client, account, capacity_pool, volume):
+    """Deletes the volume, capacity pool and account of one deployment
+
+    Args:
+        anf_client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure
+            Resource Provider asyncio Client
+        account (NetAppAccount): Account created by provision_deployment
+        capacity_pool (CapacityPool): Capacity pool created by
+            provision_deployment
+        volume (Volume): Volume created by provision_deployment
+    """
+
+    rid = resource_uri_utils.parse_resource_id(volume.id)
+
+    console_output("\t\tDeleting {}".format(volume.id))
+    poller = await anf_client.volumes.begin_delete(
+        rid.resource_group, rid.account, rid.pool, rid.volume)
+    await poller.wait()
+    await sample_utils.wait_for_no_anf_resource_async(anf_client, volume.id)
+
+    console_output("\t\tDeleting {}".format(capacity_pool.id))
+    poller = await anf_client.pools.begin_delete(
+        rid.resource_group, rid.account, rid.pool)
+    await poller.wait()
+    await sample_utils.wait_for_no_anf_resource_async(anf_client,
+                                                      capacity_pool.id)
+
+    console_output("\t\tDeleting {}".format(account.id))
+    poller = await anf_client.accounts.begin_delete(rid.resource_group,
+                                                    rid.account)
+    await poller.wait()
+
+
+async def provision_deployment(anf_client, anf_account_name, subnet_id):
+    """Deploys one account, capacity pool and NFSv4.1 volume
+
+    Args:
+        anf_client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure
+            Resource Provider asyncio Client
+        anf_account_name (string): Name of the account to be created
+        subnet_id (string): Subnet resource id of the delegated to ANF Volumes
+            subnet
+
+    Returns:
+        tuple: Returns the created NetAppAccount, CapacityPool and Volume
+    """
+
+    account = await create_account(anf_client,
+                                   example.RESOURCE_GROUP_NAME,
+                                   anf_account_name,
+                                   example.LOCATION)
+    console_output('\tAccount successfully created, resource id: {}'
+                   .format(account.id))
+
+    capacity_pool = await create_capacitypool(
+        anf_client,
+        example.RESOURCE_GROUP_NAME,
+        account.name,
+        example.CAPACITYPOOL_NAME,
+        example.CAPACITYPOOL_SERVICE_LEVEL,
+        example.CAPACITYPOOL_SIZE,
+        example.LOCATION)
+    console_output('\tCapacity Pool successfully created, resource id: {}'
+                   .format(capacity_pool.id))
+
+    volume = await create_volume(
+        anf_client,
+        example.RESOURCE_GROUP_NAME,
+        account.name,
+        resource_uri_utils.get_anf_capacity_pool(
+            capacity_pool.id),
+        'Vol-{}-{}'.format(anf_account_name, example.CAPACITYPOOL_NAME),
+        example.VOLUME_USAGE_QUOTA,
+        example.CAPACITYPOOL_SERVICE_LEVEL,
+        subnet_id,
+        example.LOCATION)
+
+    # ARM Workaround to wait for the creation completion
+    wait_result = await sample_utils.wait_for_anf_resource_async(anf_client,
+                                                                 volume.id)
+    if not wait_result.succeeded:
+        console_output('\tWARNING: Volume not visible after {:.0f}s'.format(
+            wait_result.elapsed))
+
+    console_output(
+        '\tVolume successfully created, resource id: {}'.format(volume.id))
+
+    return account, capacity_pool, volume
+
+
+async def run_example(deployment_count=1,
+                      max_concurrency=MAX_CONCURRENT_DEPLOYMENTS):
+    """Azure NetApp Files SDK asyncio management example
+
+    Args:
+        deployment_count (int): Number of independent account/pool/volume
+            deployments to run concurrently
+        max_concurrency (int): Maximum number of deployments in flight
+
+    Returns:
+        list: Returns one (account, pool, volume) tuple or exception per
+            deployment
+    """
+
+    print_header("Azure NetAppFiles Python SDK Sample - Sample "
+        "project that creates NFS v4.1 volumes concurrently with Azure "
+        "NetApp Files asyncio SDK with Python")
+
+    credentials, subscription_id = sample_utils.get_credentials_async()
+
+    # Every task shares the process wide ARM read/write budgets
+    limiter = rate_limiter.get_default_limiter()
+
+    async with credentials, \
+            NetAppManagementClient(
+                credentials, subscription_id,
+                per_retry_policies=[
+                    rate_limiter.AsyncRateLimitPolicy(limiter)]) \
+            as anf_client, \
+            ResourceManagementClient(
+                credentials, subscription_id,
+                per_retry_policies=[
+                    rate_limiter.AsyncRateLimitPolicy(limiter)]) \
+            as resources_client:
+
+        # Checking if vnet/subnet information leads to a valid resource
+        subnet_id = example.build_subnet_id(subscription_id,
+                                            example.VNET_RESOURCE_GROUP_NAME,
+                                            example.VNET_NAME,
+                                            example.SUBNET_NAME)
+
+        result = await sample_utils.resource_exists_async(
+            resources_client,
+            subnet_id,
+            example.VIRTUAL_NETWORKS_SUBNET_API_VERSION)
+
+        if not result:
+            console_output("ERROR: Subnet not with id {} not found".format(
+                subnet_id))
+            raise Exception("Subnet not found error. Subnet Id {}".format(
+                subnet_id))
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        haikunator = Haikunator()
+
+        async def deploy(anf_account_name):
+            async with semaphore:
+                try:
+                    deployment = await provision_deployment(
+                        anf_client, anf_account_name, subnet_id)
+                    if example.SHOULD_CLEANUP:
+                        await cleanup_deployment(anf_client, *deployment)
+                    return deployment
+                except AzureError as ex:
+                    console_output('An error ocurred. Error details: {}'
+                                   .format(ex.message))
+                    raise
+
+        console_output('Creating {} deployment(s) ...'.format(
+            deployment_count))
+        return await asyncio.gather(
+            *(deploy(haikunator.haikunate(delimiter=''))
+              for _ in range(deployment_count)),
+            return_exceptions=True)
+
+
+if __name__ == "__main__":
+
+    asyncio.run(run_example(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
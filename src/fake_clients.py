@@ -0,0 +1,516 @@
+# fake_clients.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""fake_clients.py code sample
+
+In-process stand-ins for NetAppManagementClient and ResourceManagementClient
+backed by a Simulation that models the behaviors the sample code works
+around: long running operation latency, eventual consistency of newly
+created resources, resources still visible for a while after their deletion
+and 429 throttling of ARM calls.
+
+Notes:
+Simulated durations are multiplied by time_scale before sleeping, e.g. with
+time_scale=0.001 a 60 seconds volume creation takes 60ms of wall-clock time.
+The wait functions of sample_utils sleep for real, so strategies given to
+them must be scaled as well through scale_strategy().
+
+Usage:
+simulation = Simulation(SimulationProfile(time_scale=0.001))
+anf_client = FakeNetAppManagementClient(simulation)
+resources_client = FakeResourceManagementClient(simulation)
+
+"""
+
+import copy
+import math
+import random
+import threading
+import time
+from collections import Counter, namedtuple
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+import resource_uri_utils
+import sample_utils
+
+LatencyModel = namedtuple('LatencyModel', ['median', 'sigma'])
+LatencyModel.__doc__ = """Log-normal latency distribution
+
+median is the median duration in seconds and sigma the standard deviation of
+the underlying normal distribution, 0 makes the latency constant.
+"""
+
+SimulationProfile = namedtuple('SimulationProfile', [
+    'create_latency', 'delete_latency', 'visibility_delay', 'delete_lag',
+    'read_rate', 'write_rate', 'burst', 'retry_after', 'head_supported',
+    'time_scale', 'seed'])
+SimulationProfile.__new__.__defaults__ = (
+    # Creation and deletion LRO latencies per resource kind
+    {resource_uri_utils.KIND_ACCOUNT: LatencyModel(5, 0.3),
+     resource_uri_utils.KIND_CAPACITY_POOL: LatencyModel(10, 0.3),
+     resource_uri_utils.KIND_VOLUME: LatencyModel(60, 0.5),
+     resource_uri_utils.KIND_SNAPSHOT: LatencyModel(10, 0.4)},
+    {resource_uri_utils.KIND_ACCOUNT: LatencyModel(5, 0.3),
+     resource_uri_utils.KIND_CAPACITY_POOL: LatencyModel(10, 0.3),
+     resource_uri_utils.KIND_VOLUME: LatencyModel(30, 0.5),
+     resource_uri_utils.KIND_SNAPSHOT: LatencyModel(5, 0.4)},
+    LatencyModel(5, 0.8),
+    LatencyModel(10, 0.8),
+    20, 2, 50, 5, False, 1.0, None)
+SimulationProfile.__doc__ = """Behavior of a Simulation
+
+create_latency and delete_latency map ANF resource kinds to the LatencyModel
+of their long running operations, visibility_delay is the LatencyModel of
+the time a completed creation keeps answering 404 to GET calls and
+delete_lag the time a completed deletion keeps answering 200. read_rate and
+write_rate are the sustained ARM calls per simulated second allowed before
+answering 429 with a Retry-After of retry_after seconds, burst is the bucket
+size of both. head_supported False answers 405 to HEAD calls of the
+ResourceManagementClient. Simulated durations are multiplied by time_scale
+before sleeping and seed makes latencies reproducible.
+"""
+
+# Maximum number of retries of a throttled call, as the azure-core default
+MAX_THROTTLE_RETRIES = 10
+
+
+def scale_strategy(strategy, time_scale):
+    """Scales the durations of a wait strategy to a simulation
+
+    Args:
+        strategy (WaitStrategy): Strategy using simulated seconds
+        time_scale (float): Wall-clock seconds per simulated second
+
+    Returns:
+        WaitStrategy: Returns the strategy using wall-clock seconds
+    """
+
+    return sample_utils.WaitStrategy(
+        initial_delay=strategy.initial_delay * time_scale,
+        interval=strategy.interval * time_scale,
+        max_interval=strategy.max_interval * time_scale,
+        multiplier=strategy.multiplier,
+        jitter=strategy.jitter,
+        deadline=None if strategy.deadline is None
+        else strategy.deadline * time_scale,
+        max_attempts=strategy.max_attempts)
+
+
+def http_error(status_code, message):
+    """Builds the exception the SDK raises for an error status code"""
+
+    error_class = ResourceNotFoundError if status_code == 404 \
+        else HttpResponseError
+    error = error_class(message=message)
+    error.status_code = status_code
+    return error
+
+
+def get_subnet_properties(subnet_id):
+    """Builds the properties of a subnet delegated to ANF volumes"""
+
+    return {'provisioningState': 'Succeeded',
+            'delegations': [{
+                'name': 'netapp',
+                'id': '{}/delegations/netapp'.format(subnet_id),
+                'properties': {'serviceName': 'Microsoft.Netapp/volumes'}}]}
+
+
+class _TokenBucket:
+    """Token bucket refilled at rate tokens per simulated second"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def take(self, now):
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _Record:
+    """Simulated state of one resource"""
+
+    __slots__ = ('resource', 'ready_at', 'visible_at', 'deleted_at',
+                 'gone_at')
+
+    def __init__(self, resource, ready_at, visible_at):
+        self.resource = resource
+        self.ready_at = ready_at
+        self.visible_at = visible_at
+        self.deleted_at = None
+        self.gone_at = None
+
+
+class Simulation:
+    """Shared state of the fake clients
+
+    Keeps every simulated resource with its lifecycle timestamps, throttles
+    calls and counts them in stats (get, list, put, patch, delete, head and
+    throttled entries).
+    """
+
+    def __init__(self, profile=None, subscription_id=None,
+                 retry_throttled=True):
+        self.profile = profile or SimulationProfile()
+        self.retry_throttled = retry_throttled
+        self.subscription_id = subscription_id or \
+            '00000000-0000-0000-0000-000000000000'
+        self.stats = Counter()
+        self.subnets = set()
+        self._records = {}
+        self._random = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._buckets = {
+            'read': _TokenBucket(self.profile.read_rate, self.profile.burst,
+                                 0),
+            'write': _TokenBucket(self.profile.write_rate,
+                                  self.profile.burst, 0)}
+
+    def now(self):
+        """float: Simulated seconds since the simulation started"""
+        return (time.monotonic() - self._start) / self.profile.time_scale
+
+    def sleep(self, seconds):
+        """Sleeps for a number of simulated seconds"""
+
+        if seconds > 0:
+            time.sleep(seconds * self.profile.time_scale)
+
+    def sample(self, latency):
+        """Draws a duration in simulated seconds from a LatencyModel"""
+
+        if latency.sigma == 0:
+            return latency.median
+        with self._lock:
+            return latency.median * math.exp(
+                self._random.gauss(0, latency.sigma))
+
+    def add_subnet(self, subnet_id):
+        """Registers a subnet answered as existing by the resource client"""
+
+        self.subnets.add(subnet_id.lower())
+
+    def call(self, operation):
+        """Accounts for one ARM call, retrying it while throttled
+
+        Throttled calls sleep Retry-After and are retried, as the azure-core
+        retry policy does, up to MAX_THROTTLE_RETRIES times, unless the
+        simulation was built with retry_throttled=False.
+
+        Args:
+            operation (string): get, list, head, status, put, patch or
+                delete
+
+        Raises:
+            HttpResponseError: With status code 429 when retries run out
+        """
+
+        bucket_name = 'write' if operation in ('put', 'patch', 'delete') \
+            else 'read'
+        for _ in range(MAX_THROTTLE_RETRIES + 1):
+            with self._lock:
+                self.stats[operation] += 1
+                if self._buckets[bucket_name].take(self.now()):
+                    return
+                self.stats['throttled'] += 1
+            if not self.retry_throttled:
+                break
+            self.sleep(self.profile.retry_after)
+
+        raise http_error(429, 'Too many requests')
+
+    def _get_record(self, resource_id):
+        return self._records.get(resource_id.lower())
+
+    def get(self, resource_id):
+        """Simulates a GET call
+
+        Returns:
+            object: Returns the resource
+
+        Raises:
+            ResourceNotFoundError: If the resource is not visible
+        """
+
+        self.call('get')
+        now = self.now()
+        with self._lock:
+            record = self._get_record(resource_id)
+            if record is None or now < record.visible_at or \
+                    (record.gone_at is not None and now >= record.gone_at):
+                raise http_error(404, 'Resource {} not found'.format(
+                    resource_id))
+            return record.resource
+
+    def list(self, parent_id, kind):
+        """Simulates a list call of the children of a parent resource
+
+        Returns:
+            list: Returns the visible children of the given kind
+        """
+
+        self.call('list')
+        now = self.now()
+        parent_id = parent_id.lower() if parent_id else None
+        with self._lock:
+            return [record.resource for record in self._records.values()
+                    if resource_uri_utils.parse_resource_id(
+                        record.resource.id).kind == kind
+                    and (resource_uri_utils.get_anf_parent_id(
+                        record.resource.id) or '').lower() == (parent_id or '')
+                    and now >= record.visible_at
+                    and (record.gone_at is None or now < record.gone_at)]
+
+    def create(self, resource_id, body):
+        """Simulates a PUT call starting a creation
+
+        Args:
+            resource_id (string): Resource Id of the resource
+            body (object): Resource body as sent to begin_create_or_update
+
+        Returns:
+            FakePoller: Returns the poller of the operation
+
+        Raises:
+            ResourceNotFoundError: If the parent resource does not exist
+        """
+
+        self.call('put')
+        kind = resource_uri_utils.parse_resource_id(resource_id).kind
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        now = self.now()
+        ready_at = now + self.sample(self.profile.create_latency[kind])
+        visible_at = ready_at + self.sample(self.profile.visibility_delay)
+
+        resource = copy.copy(body)
+        resource.id = resource_id
+        resource.name = '/'.join(
+            name for name in resource_uri_utils.parse_resource_id(
+                resource_id)[2:6] if name)
+        resource.provisioning_state = 'Succeeded'
+
+        with self._lock:
+            parent = self._get_record(parent_id) if parent_id else None
+            if parent_id and (parent is None or parent.deleted_at is not None
+                              or now < parent.ready_at):
+                raise http_error(404, 'Parent resource {} not found'.format(
+                    parent_id))
+            existing = self._get_record(resource_id)
+            if existing is not None and existing.deleted_at is None:
+                # Updates complete right away and keep the visibility
+                existing.resource = resource
+                return FakePoller(self, now, resource)
+            self._records[resource_id.lower()] = _Record(resource, ready_at,
+                                                         visible_at)
+        return FakePoller(self, ready_at, resource)
+
+    def update(self, resource_id, patch):
+        """Simulates a PATCH call, completing right away
+
+        Args:
+            resource_id (string): Resource Id of the resource
+            patch (object): Patch body as sent to begin_update, fields set
+                in it replace those of the resource
+
+        Returns:
+            FakePoller: Returns the poller of the operation
+
+        Raises:
+            ResourceNotFoundError: If the resource is not visible
+        """
+
+        self.call('patch')
+        now = self.now()
+        with self._lock:
+            record = self._get_record(resource_id)
+            if record is None or now < record.visible_at or \
+                    record.deleted_at is not None:
+                raise http_error(404, 'Resource {} not found'.format(
+                    resource_id))
+            resource = copy.copy(record.resource)
+            for field in patch._attribute_map: # pylint: disable=protected-access
+                value = getattr(patch, field, None)
+                if value is not None and field not in ('id', 'name', 'type'):
+                    setattr(resource, field, value)
+            record.resource = resource
+        return FakePoller(self, now, resource)
+
+    def delete(self, resource_id):
+        """Simulates a DELETE call starting a deletion
+
+        Returns:
+            FakePoller: Returns the poller of the operation
+
+        Raises:
+            HttpResponseError: With status code 409 if the resource still
+                has children
+        """
+
+        self.call('delete')
+        kind = resource_uri_utils.parse_resource_id(resource_id).kind
+        now = self.now()
+        prefix = resource_id.lower() + '/'
+        delete_latency = self.sample(self.profile.delete_latency[kind])
+        delete_lag = self.sample(self.profile.delete_lag)
+        with self._lock:
+            record = self._get_record(resource_id)
+            if record is None or record.deleted_at is not None:
+                return FakePoller(self, now, None)
+            if any(key.startswith(prefix) and child.deleted_at is None
+                   for key, child in self._records.items()):
+                raise http_error(409, 'Resource {} has nested resources'
+                                  .format(resource_id))
+            record.deleted_at = now + delete_latency
+            record.gone_at = record.deleted_at + delete_lag
+            deleted_at = record.deleted_at
+        return FakePoller(self, deleted_at, None)
+
+    def purge(self):
+        """Forgets deleted resources whose lag elapsed"""
+
+        now = self.now()
+        with self._lock:
+            for key in [key for key, record in self._records.items()
+                        if record.gone_at is not None
+                        and now >= record.gone_at]:
+                del self._records[key]
+
+
+class FakePoller:
+    """LROPoller stand-in completing at a simulated time"""
+
+    __slots__ = ('_simulation', '_done_at', '_resource')
+
+    def __init__(self, simulation, done_at, resource):
+        self._simulation = simulation
+        self._done_at = done_at
+        self._resource = resource
+
+    def done(self):
+        """boolean: True once the operation completed"""
+        return self._simulation.now() >= self._done_at
+
+    def wait(self, timeout=None):
+        """Blocks until the operation completes"""
+
+        remaining = self._done_at - self._simulation.now()
+        if timeout is not None:
+            remaining = min(remaining,
+                            timeout / self._simulation.profile.time_scale)
+        self._simulation.sleep(remaining)
+
+    def result(self, timeout=None):
+        """Blocks until the operation completes and returns its resource"""
+
+        self.wait(timeout)
+        return self._resource
+
+    def status(self):
+        """string: Succeeded or InProgress"""
+        return 'Succeeded' if self.done() else 'InProgress'
+
+
+class _FakeOperations:
+    """Operation group of one ANF resource kind
+
+    Positional arguments are the resource group and the names down to the
+    resource itself, begin_create_or_update takes the body last.
+    """
+
+    def __init__(self, simulation, kind):
+        self._simulation = simulation
+        self._kind = kind
+        self._depth = resource_uri_utils.ANF_RESOURCE_KINDS.index(kind)
+
+    def _resource_id(self, names):
+        names = list(names) + [None] * (self._depth + 1 - len(names))
+        return resource_uri_utils.build_anf_resource_id(
+            self._simulation.subscription_id, *names[:self._depth + 1])
+
+    def get(self, *names, **kwargs):
+        return self._simulation.get(self._resource_id(names))
+
+    def list(self, *names, **kwargs):
+        if self._kind == resource_uri_utils.KIND_ACCOUNT:
+            parent_id = None
+        else:
+            parent_id = resource_uri_utils.build_anf_resource_id(
+                self._simulation.subscription_id, *names)
+        return iter(self._simulation.list(parent_id, self._kind))
+
+    def begin_create_or_update(self, *args, **kwargs):
+        return self._simulation.create(self._resource_id(args[:-1]), args[-1])
+
+    begin_create = begin_create_or_update
+
+    def begin_update(self, *args, **kwargs):
+        return self._simulation.update(self._resource_id(args[:-1]), args[-1])
+
+    def begin_delete(self, *names, **kwargs):
+        return self._simulation.delete(self._resource_id(names))
+
+
+class FakeNetAppManagementClient:
+    """NetAppManagementClient stand-in backed by a Simulation"""
+
+    def __init__(self, simulation, subscription_id=None):
+        self.simulation = simulation
+        self.subscription_id = subscription_id or simulation.subscription_id
+        self.accounts = _FakeOperations(simulation,
+                                        resource_uri_utils.KIND_ACCOUNT)
+        self.pools = _FakeOperations(simulation,
+                                     resource_uri_utils.KIND_CAPACITY_POOL)
+        self.volumes = _FakeOperations(simulation,
+                                       resource_uri_utils.KIND_VOLUME)
+        self.snapshots = _FakeOperations(simulation,
+                                         resource_uri_utils.KIND_SNAPSHOT)
+
+    def close(self):
+        pass
+
+
+class _FakeResources:
+    """Generic resources operation group answering for subnets"""
+
+    def __init__(self, simulation):
+        self._simulation = simulation
+
+    def check_existence_by_id(self, resource_id, api_version, **kwargs):
+        self._simulation.call('head')
+        if not self._simulation.profile.head_supported:
+            raise http_error(405, 'Method HEAD not allowed')
+        return resource_id.lower() in self._simulation.subnets
+
+    def get_by_id(self, resource_id, api_version, **kwargs):
+        self._simulation.call('get')
+        if resource_id.lower() not in self._simulation.subnets:
+            raise http_error(404, 'Resource {} not found'.format(
+                resource_id))
+        return {'id': resource_id,
+                'properties': get_subnet_properties(resource_id)}
+
+
+class FakeResourceManagementClient:
+    """ResourceManagementClient stand-in backed by a Simulation"""
+
+    def __init__(self, simulation, subscription_id=None):
+        self.simulation = simulation
+        self.subscription_id = subscription_id or simulation.subscription_id
+        self.resources = _FakeResources(simulation)
+
+    def close(self):
+        pass
@@ -0,0 +1,380 @@
+# fleet_orchestrator.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""fleet_orchestrator.py code sample
+
+Fleet-wide orchestration: an inventory or provisioning job is sharded by
+subscription and region, the shards run in parallel in a pool of worker
+processes and their results are merged as a stream, so jobs spanning tens of
+subscriptions and regions scale with the number of cores instead of running
+one region after the other.
+
+Notes:
+Every worker process builds its own ClientFactory, hence its own
+credentials, access tokens, connection pool and rate limiter, and reuses it
+for every shard it runs. Workers send their results back in batches through
+a queue as soon as they are produced and iter_fleet() yields them in arrival
+order. A shard raising an exception does not stop the others, but a worker
+process killed by the OS breaks the pool and every unfinished shard is then
+reported as failed. Worker processes are started with the spawn method, safe
+with the threads of the parent.
+
+The rate limiter of each worker only paces its own calls: shards of the same
+subscription running in several workers share the ARM limits of that
+subscription, lower max_workers when the fleet gets throttled.
+
+Shards file format (JSON):
+
+    [{"subscriptionId": "<subscription id>", "location": "eastus",
+      "resourceGroup": "anf01-rg", "subnetId": "<subnet id>"}]
+
+Usage:
+python fleet_orchestrator.py inventory shards.json [--workers 8]
+python fleet_orchestrator.py apply shards.json --manifest manifest.json
+
+"""
+
+import argparse
+import copy
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from sample_utils import console_output
+
+# Default number of results sent back to the parent at once
+DEFAULT_BATCH_SIZE = 500
+
+# Seconds between two checks of the worker processes while waiting
+_POLL_INTERVAL = 1
+
+Shard = namedtuple('Shard', ['subscription_id', 'location',
+                             'resource_group_name', 'subnet_id'])
+Shard.__new__.__defaults__ = (None,)
+Shard.__doc__ = """One subscription and region of a fleet job
+
+resource_group_name is the resource group holding the ANF accounts of the
+region and subnet_id the subnet delegated to ANF volumes in that region,
+only needed by provisioning jobs.
+"""
+
+ShardBatch = namedtuple('ShardBatch', ['shard', 'items', 'error',
+                                       'finished'])
+ShardBatch.__doc__ = """Results of a shard sent back by a worker
+
+items lists the results produced since the previous batch of the shard,
+error is the description of the exception that stopped the shard (None when
+it did not fail) and finished tells whether this is the last batch of the
+shard.
+"""
+
+FleetSummary = namedtuple('FleetSummary', ['items', 'errors', 'elapsed'])
+FleetSummary.__doc__ = """Outcome of run_fleet()
+
+items is the number of results, errors maps each failed Shard to the
+description of its error and elapsed is the wall-clock time in seconds.
+"""
+
+# Results queue and client factory of the worker process
+_worker_queue = None
+_worker_factory = None
+
+
+def _init_worker(results_queue, factory_kwargs):
+    """Initializes a worker process"""
+
+    global _worker_queue, _worker_factory # pylint: disable=global-statement
+    import client_factory
+
+    _worker_queue = results_queue
+    _worker_factory = client_factory.ClientFactory(**(factory_kwargs or {}))
+
+
+def _describe_error(ex):
+    """Describes an exception, exceptions holding responses cannot be pickled"""
+
+    return '{}: {}'.format(type(ex).__name__, ex)
+
+
+def _run_shard(job, index, shard, batch_size):
+    """Runs a job for one shard in a worker, streaming its results"""
+
+    batch = []
+    error = None
+    count = 0
+    try:
+        for item in job(_worker_factory, shard):
+            batch.append(item)
+            count += 1
+            if len(batch) >= batch_size:
+                _worker_queue.put((index, batch, None, False))
+                batch = []
+    except Exception as ex: # pylint: disable=broad-except
+        error = _describe_error(ex)
+    _worker_queue.put((index, batch, error, True))
+    return count
+
+
+def iter_fleet(job, shards, max_workers=None, batch_size=DEFAULT_BATCH_SIZE,
+               factory_kwargs=None):
+    """Runs a job for every shard in worker processes, streaming results
+
+    Args:
+        job (function): Function called in a worker with a ClientFactory and
+            a Shard, returning an iterable of picklable results. It needs to
+            be importable by the workers: a module level function or a
+            functools.partial of one
+        shards (iterable): Shard entries
+        max_workers (int): Optional. Number of worker processes, the number
+            of CPUs by default
+        batch_size (int): Optional. Maximum number of results per batch
+        factory_kwargs (dict): Optional. Picklable keyword arguments of the
+            ClientFactory of every worker
+
+    Yields:
+        ShardBatch: Yields batches of results as workers produce them
+    """
+
+    shards = list(shards)
+    if not shards:
+        return
+    max_workers = min(max_workers or os.cpu_count() or 1, len(shards))
+
+    context = multiprocessing.get_context('spawn')
+    results_queue = context.Queue()
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(results_queue,
+                                       factory_kwargs)) as executor:
+        futures = {executor.submit(_run_shard, job, index, shard,
+                                   batch_size): index
+                   for index, shard in enumerate(shards)}
+        pending = set(range(len(shards)))
+        unsent = set()
+        while pending:
+            try:
+                index, items, error, finished = results_queue.get(
+                    timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                # Workers terminated because the pool broke may have lost the
+                # last batch of a shard that completed. It is reported as
+                # failed once the queue stayed empty for two checks in a row
+                for future, index in futures.items():
+                    if index not in pending or not future.done() or \
+                            future.exception() is not None:
+                        continue
+                    if index in unsent:
+                        pending.discard(index)
+                        yield ShardBatch(shards[index], [],
+                                         'Results lost: the worker stopped '
+                                         'before sending them', True)
+                    unsent.add(index)
+            else:
+                if index in pending:
+                    if finished:
+                        pending.discard(index)
+                    yield ShardBatch(shards[index], items, error, finished)
+
+            # A worker that died (e.g. killed) never sends its last batch,
+            # its shard is reported as failed. Checked after every batch, so
+            # results streamed by other shards do not delay the detection
+            for future, index in futures.items():
+                if index in pending and future.done() and \
+                        future.exception() is not None:
+                    pending.discard(index)
+                    yield ShardBatch(shards[index], [],
+                                     _describe_error(future.exception()),
+                                     True)
+
+
+def run_fleet(job, shards, callback=None, max_workers=None,
+              batch_size=DEFAULT_BATCH_SIZE, factory_kwargs=None):
+    """Runs a job for every shard and merges the results as they arrive
+
+    Args:
+        job (function): Job function, see iter_fleet()
+        shards (iterable): Shard entries
+        callback (function): Optional. Function called in the parent with
+            the Shard and each result, as soon as the result is received
+        max_workers (int): Optional. Number of worker processes
+        batch_size (int): Optional. Maximum number of results per batch
+        factory_kwargs (dict): Optional. Keyword arguments of the
+            ClientFactory of every worker
+
+    Returns:
+        FleetSummary: Returns the number of results and the failed shards
+    """
+
+    start = time.monotonic()
+    count = 0
+    errors = {}
+    for batch in iter_fleet(job, shards, max_workers, batch_size,
+                            factory_kwargs):
+        for item in batch.items:
+            if callback is not None:
+                callback(batch.shard, item)
+            count += 1
+        if batch.error is not None:
+            errors[batch.shard] = batch.error
+            console_output('Shard {} {} failed. Error details: {}'.format(
+                batch.shard.subscription_id, batch.shard.location,
+                batch.error))
+        elif batch.finished:
+            console_output('\tShard {} {} completed'.format(
+                batch.shard.subscription_id, batch.shard.location))
+    return FleetSummary(count, errors, time.monotonic() - start)
+
+
+def inventory_job(factory, shard):
+    """Lists the volumes of the accounts of a shard region
+
+    Args:
+        factory (ClientFactory): Client factory of the worker
+        shard (Shard): Subscription, region and resource group to be listed
+
+    Returns:
+        iterator: Returns VolumeRecord entries, streamed page by page
+    """
+
+    import streaming_inventory
+    import resource_uri_utils
+
+    client = factory.netapp_client(shard.subscription_id)
+    account_names = [
+        resource_uri_utils.get_anf_account(account.id)
+        for account in client.accounts.list(shard.resource_group_name)
+        if account.location.replace(' ', '').lower() ==
+        shard.location.replace(' ', '').lower()]
+    if not account_names:
+        return iter(())
+    return streaming_inventory.stream_resource_group_volumes(
+        client, shard.resource_group_name, account_names)
+
+
+def apply_manifest_job(manifest, factory, shard):
+    """Converges a shard to a desired-state manifest
+
+    The resourceGroup, location and subnetId of the manifest are replaced by
+    those of the shard. Use functools.partial(apply_manifest_job, manifest)
+    as job.
+
+    Args:
+        manifest (dict): desired_state.py manifest shared by the shards
+        factory (ClientFactory): Client factory of the worker
+        shard (Shard): Subscription, region, resource group and subnet
+
+    Returns:
+        list: Returns (action, resource id, error) tuples, error is None for
+            applied actions
+    """
+
+    import desired_state
+
+    manifest = copy.deepcopy(manifest)
+    manifest['resourceGroup'] = shard.resource_group_name
+    manifest['location'] = shard.location
+    if shard.subnet_id:
+        manifest['subnetId'] = shard.subnet_id
+
+    client = factory.netapp_client(shard.subscription_id)
+    result = desired_state.apply(client, desired_state.plan(
+        client, manifest, shard.subscription_id))
+    return [(action.action, action.resource_id, None)
+            for action in result.applied] + \
+        [(None, resource_id, _describe_error(ex))
+         for resource_id, ex in result.failed.items()]
+
+
+def load_shards(path):
+    """Loads shards from a JSON file
+
+    Args:
+        path (string): Path of a JSON list of objects with subscriptionId,
+            location, resourceGroup and optionally subnetId
+
+    Returns:
+        list: Returns Shard entries
+    """
+
+    with open(path) as shards_file:
+        return [Shard(entry['subscriptionId'], entry['location'],
+                      entry['resourceGroup'], entry.get('subnetId'))
+                for entry in json.load(shards_file)]
+
+
+def run(command, shards_path, manifest_path=None, max_workers=None,
+        output=None):
+    """Runs the inventory or apply job over the shards of a file
+
+    Inventory rows are written as CSV while they are received.
+
+    Args:
+        command (string): "inventory" or "apply"
+        shards_path (string): Path of the JSON shards file
+        manifest_path (string): Optional. Manifest applied to every shard,
+            required by "apply"
+        max_workers (int): Optional. Number of worker processes
+        output (file): Optional. Text file of the CSV rows, stdout by default
+
+    Returns:
+        FleetSummary: Returns the summary of the run
+
+    Raises:
+        ValueError: No manifest was given to "apply"
+    """
+
+    if command == 'apply' and not manifest_path:
+        raise ValueError('apply requires a manifest')
+
+    shards = load_shards(shards_path)
+    writer = csv.writer(output or sys.stdout)
+    if command == 'apply':
+        import desired_state
+        job = partial(apply_manifest_job,
+                      desired_state.load_manifest(manifest_path))
+        writer.writerow(('subscription_id', 'location', 'action',
+                         'resource_id', 'error'))
+    else:
+        import streaming_inventory
+        job = inventory_job
+        writer.writerow(('subscription_id', 'location') +
+                        streaming_inventory.CSV_FIELDS)
+
+    def write_row(shard, item):
+        if command == 'apply':
+            row = item
+        else:
+            row = [getattr(item, field)
+                   for field in streaming_inventory.CSV_FIELDS]
+        writer.writerow([shard.subscription_id, shard.location] + list(row))
+
+    summary = run_fleet(job, shards, write_row, max_workers)
+    console_output('{} result(s) from {} shard(s), {} failed in {:.0f}s'
+                   .format(summary.items, len(shards), len(summary.errors),
+                           summary.elapsed))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=('inventory', 'apply'),
+                        help='job run for every shard')
+    parser.add_argument('shards', help='JSON file of shards')
+    parser.add_argument('--manifest', help='manifest applied to every shard')
+    parser.add_argument('--workers', type=int,
+                        help='number of worker processes, CPUs by default')
+    arguments = parser.parse_args()
+
+    summary = run(arguments.command, arguments.shards, arguments.manifest,
+                  arguments.workers)
+    sys.exit(1 if summary.errors else 0)
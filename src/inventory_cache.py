@@ -0,0 +1,219 @@
+# inventory_cache.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""inventory_cache.py code sample
+
+Inventory cache for ANF accounts, capacity pools, volumes and snapshots, it
+remembers whether a resource exists (and its last known body) for a limited
+time so repeated checks don't need a new ARM GET call.
+
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+import resource_uri_utils
+
+# Default time to live of a cache entry, in seconds
+DEFAULT_TTL = 60
+
+# Default maximum number of entries, least recently used entries are evicted
+DEFAULT_MAX_ENTRIES = 10000
+
+CacheEntry = namedtuple('CacheEntry', ['resource_id', 'exists', 'resource',
+                                       'expires_at'])
+CacheEntry.__doc__ = """One inventory cache entry
+
+exists tells whether the resource was found, resource is its last known body
+(a model, or a dict when loaded from a file, None if unknown) and expires_at
+is the time.time() value after which the entry is stale.
+"""
+
+
+def get_cache_key(resource_id):
+    """Gets the cache key of a resource id
+
+    Keys of ANF resources are the parsed ResourceId of the lower case
+    resource id, ARM resource ids are case insensitive. Other resources, such
+    as subnets, are keyed by the lower case resource id itself.
+
+    Args:
+        resource_id (string): Resource id/uri
+
+    Returns:
+        ResourceId or string: Returns the cache key
+    """
+
+    normalized_id = resource_id.strip().rstrip('/').lower()
+    rid = resource_uri_utils.parse_resource_id(normalized_id)
+    return rid if rid.is_anf else normalized_id
+
+
+def _is_in_subtree(key, root_key):
+    """Checks if a key is the root key or one of its descendants"""
+
+    depth = resource_uri_utils.ANF_RESOURCE_KINDS.index(root_key.kind)
+    # subscription, resource group, then one field per kind down to the root
+    return key[:2 + depth] == root_key[:2 + depth]
+
+
+class InventoryCache:
+    """TTL and size bounded cache of ANF resources
+
+    Entries expire ttl seconds after being stored and once max_entries is
+    reached the least recently used entries are evicted. All methods are
+    thread safe. When path is given, save() and load() persist the entries
+    to a local JSON file so they survive between runs.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 path=None, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, resource_id):
+        """Gets the fresh entry of a resource
+
+        Args:
+            resource_id (string): Resource id/uri
+
+        Returns:
+            CacheEntry: Returns the entry, None if missing or expired
+        """
+
+        key = get_cache_key(resource_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def exists(self, resource_id):
+        """Tells whether a resource exists according to the cache
+
+        Args:
+            resource_id (string): Resource id/uri
+
+        Returns:
+            boolean: Returns True or False for fresh entries, None when the
+                cache can't tell
+        """
+
+        entry = self.lookup(resource_id)
+        return None if entry is None else entry.exists
+
+    def put(self, resource_id, resource=None, exists=True, ttl=None):
+        """Stores the state of a resource
+
+        Args:
+            resource_id (string): Resource id/uri
+            resource (object): Optional. Last known body of the resource
+            exists (boolean): Optional. Whether the resource exists, default
+                is True
+            ttl (int): Optional. Time to live overriding the cache default
+        """
+
+        key = get_cache_key(resource_id)
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = CacheEntry(resource_id, exists, resource,
+                                            expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, resource_id, subtree=True):
+        """Removes the entry of a resource, typically after writing to it
+
+        Args:
+            resource_id (string): Resource id/uri
+            subtree (boolean): Optional. Also removes the entries of every
+                resource under it (e.g. the volumes of a capacity pool),
+                default is True
+        """
+
+        root_key = get_cache_key(resource_id)
+        with self._lock:
+            if not subtree or isinstance(root_key, str):
+                self._entries.pop(root_key, None)
+                return
+            for key in [key for key in self._entries
+                        if not isinstance(key, str)
+                        and _is_in_subtree(key, root_key)]:
+                del self._entries[key]
+
+    def clear(self):
+        """Removes every entry"""
+
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path=None):
+        """Persists the fresh entries to a JSON file
+
+        Resource bodies are stored through their as_dict() method.
+
+        Args:
+            path (string): Optional. File path, defaults to the cache path
+        """
+
+        path = path or self.path
+        now = self._clock()
+        with self._lock:
+            entries = [{'resourceId': entry.resource_id,
+                        'exists': entry.exists,
+                        'resource': entry.resource.as_dict()
+                                    if hasattr(entry.resource, 'as_dict')
+                                    else entry.resource,
+                        'expiresAt': entry.expires_at}
+                       for entry in self._entries.values()
+                       if entry.expires_at > now]
+
+        temp_path = '{}.tmp'.format(path)
+        with open(temp_path, 'w') as cache_file:
+            json.dump(entries, cache_file, default=str)
+        os.replace(temp_path, path)
+
+    def load(self, path=None):
+        """Loads the entries persisted by save(), skipping expired ones
+
+        Args:
+            path (string): Optional. File path, defaults to the cache path
+
+        Returns:
+            int: Returns the number of entries loaded
+        """
+
+        path = path or self.path
+        if not os.path.exists(path):
+            return 0
+
+        with open(path) as cache_file:
+            entries = json.load(cache_file)
+
+        now = self._clock()
+        loaded = 0
+        for entry in entries:
+            ttl = entry['expiresAt'] - now
+            if ttl > 0:
+                self.put(entry['resourceId'], entry['resource'],
+                         entry['exists'], ttl)
+                loaded += 1
+        return loaded
@@ -0,0 +1,243 @@
+# logging_utils.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""logging_utils.py code sample
+
+Non-blocking logging backend of console_output and print_header: records
+are put on a queue by the calling thread and formatted and written to stdout
+by one background writer thread, either as the classic console lines or as
+JSON records carrying structured fields (resource_id, phase, duration...).
+
+Notes:
+The backend is configured on first use from environment variables:
+ANF_LOG_FORMAT (console or json, default console), ANF_LOG_LEVEL (default
+INFO) and ANF_LOG_SAMPLE_<LEVEL> (fraction of the records of a level that
+are kept, e.g. ANF_LOG_SAMPLE_DEBUG=0.1). Pending records are flushed at
+exit or by shutdown_logging().
+
+Usage:
+logging_utils.configure_logging(json_output=True,
+                                sample_rates={logging.DEBUG: 0.01})
+logging_utils.log('Volume created', resource_id=volume.id, duration=12.5)
+
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = 'anf'
+
+LOGGER = logging.getLogger(LOGGER_NAME)
+
+_listener = None
+_lock = threading.Lock()
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of each level
+
+    Sampling is deterministic, with a rate of 0.1 one record out of ten is
+    kept. Levels missing from rates are not sampled.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._credits = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1:
+            return True
+        with self._lock:
+            # The first record of a level is kept, then one every 1 / rate;
+            # the tolerance absorbs the rounding of the summed rates
+            credit = self._credits.get(record.levelno, 1.0 - rate) + rate
+            keep = credit >= 1 - 1e-9
+            self._credits[record.levelno] = credit - 1 if keep else credit
+        return keep
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Formats records as the original console_output lines"""
+
+    def format(self, record):
+        message = record.getMessage()
+        if getattr(record, 'header', False):
+            return '{}\n{}'.format(message, '-' * len(message))
+        return '{}: {}'.format(datetime.fromtimestamp(record.created),
+                               message)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line
+
+    Structured fields given to log() are added at the top level.
+    """
+
+    def format(self, record):
+        document = {'time': datetime.fromtimestamp(record.created)
+                            .isoformat(),
+                    'level': record.levelname,
+                    'thread': record.threadName,
+                    'message': record.getMessage().strip()}
+        if getattr(record, 'header', False):
+            document['header'] = True
+        document.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            document['exception'] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, even when it was replaced"""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler leaving formatting to the writer thread
+
+    Only the message arguments are merged on the calling thread, so that
+    records do not hold on to mutable arguments.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level=None, json_output=None, sample_rates=None):
+    """Sets up the queue handler and the background writer thread
+
+    Reconfiguring stops the previous writer after flushing its records.
+    Arguments left to None are read from the ANF_LOG_* environment
+    variables.
+
+    Args:
+        level (int): Optional. Minimum level of the records written
+        json_output (boolean): Optional. Writes JSON records instead of
+            console lines
+        sample_rates (dict): Optional. Fraction of the records kept per
+            level, e.g. {logging.DEBUG: 0.1}
+
+    Returns:
+        QueueListener: Returns the started writer
+    """
+
+    with _lock:
+        return _configure(level, json_output, sample_rates)
+
+
+def _configure(level=None, json_output=None, sample_rates=None):
+    """Body of configure_logging(), called with _lock held"""
+
+    global _listener # pylint: disable=global-statement
+
+    if level is None:
+        level = logging.getLevelName(
+            os.environ.get('ANF_LOG_LEVEL', 'INFO').upper())
+    if json_output is None:
+        json_output = os.environ.get('ANF_LOG_FORMAT', 'console') == 'json'
+    if sample_rates is None:
+        sample_rates = {}
+        for name in ('DEBUG', 'INFO', 'WARNING'):
+            rate = os.environ.get('ANF_LOG_SAMPLE_{}'.format(name))
+            if rate is not None:
+                sample_rates[logging.getLevelName(name)] = float(rate)
+
+    writer = _StdoutHandler()
+    writer.setFormatter(JsonFormatter() if json_output
+                        else ConsoleFormatter())
+
+    records = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+    LOGGER.addHandler(queue_handler)
+    LOGGER.setLevel(level)
+    LOGGER.propagate = False
+
+    _listener = QueueListener(records, writer)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Writes the pending records and stops the writer thread"""
+
+    global _listener # pylint: disable=global-statement
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(LOGGER.handlers):
+            LOGGER.removeHandler(handler)
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger():
+    """Gets the sample logger, configuring the backend on first use
+
+    Returns:
+        Logger: Returns the anf logger
+    """
+
+    if _listener is None:
+        with _lock:
+            # Checked again under the lock, so that threads logging at the
+            # same time configure the backend only once
+            if _listener is None:
+                _configure()
+    return LOGGER
+
+
+def log(message, level=logging.INFO, **fields):
+    """Queues a record without blocking on the output
+
+    Args:
+        message (string): Message to be written
+        level (int): Optional. Level of the record, INFO by default
+        **fields: Structured fields of the record, e.g. resource_id, phase
+            or duration, written by the JSON format only
+    """
+
+    logger = get_logger()
+    if logger.isEnabledFor(level):
+        # Building the record directly skips the caller lookup of
+        # Logger.log(), which walks the stack on every call
+        logger.handle(logger.makeRecord(LOGGER_NAME, level, '', 0, message,
+                                        None, None,
+                                        extra={'fields': fields}))
+
+
+def log_header(header_string):
+    """Queues a header record, written underlined in console format"""
+
+    logger = get_logger()
+    if logger.isEnabledFor(logging.INFO):
+        logger.handle(logger.makeRecord(LOGGER_NAME, logging.INFO, '', 0,
+                                        header_string, None, None,
+                                        extra={'header': True,
+                                               'fields': {}}))
@@ -0,0 +1,315 @@
+# lro_manager.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""lro_manager.py code sample
+
+Long running operation (LRO) multiplexer: instead of pinning one thread per
+operation on poller.result() or poller.wait(), any number of begin_* calls
+are advanced by one scheduler thread and a small fixed pool of polling
+workers, exposing a concurrent.futures.Future per operation.
+
+Notes:
+The LROPoller returned by a sync begin_* call starts its own polling thread.
+Operations submitted through LROManager.submit() are started with a
+DeferredARMPolling polling method instead, which tells LROPoller there is
+nothing left to poll so no thread is started, and the manager drives the
+ARM polling protocol itself honoring Retry-After.
+
+Usage:
+with LROManager() as manager:
+    future = manager.submit(anf_client.volumes.begin_create_or_update,
+                            resource_group_name, account_name, pool_name,
+                            volume_name, volume_body,
+                            lro_options={'final-state-via':
+                                         'azure-async-operation'})
+    volume = future.result()
+
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError
+from azure.core.polling.base_polling import BadResponse, BadStatus, \
+    OperationFailed
+from azure.mgmt.core.polling.arm_polling import ARMPolling
+
+# Default seconds between two status checks when the RP sends no Retry-After
+DEFAULT_POLL_INTERVAL = 30
+
+# Default number of threads issuing status checks
+DEFAULT_POLL_WORKERS = 4
+
+
+class DeferredARMPolling(ARMPolling):
+    """ARM polling method whose polling loop is driven by an LROManager
+
+    finished() always reports True, so the LROPoller built by the begin_*
+    call does not start its own thread, and the real operation state is
+    exposed through operation_finished() and step().
+    """
+
+    def finished(self):
+        return True
+
+    def run(self):
+        pass
+
+    def operation_finished(self):
+        """boolean: True once the RP reports a terminal state"""
+        return ARMPolling.finished(self)
+
+    def next_delay(self):
+        """float: Seconds to wait before the next status check"""
+        return self._extract_delay()
+
+    def step(self):
+        """Performs one status check
+
+        Returns:
+            boolean: Returns True once the operation completed successfully
+
+        Raises:
+            HttpResponseError: If the operation failed or was canceled
+        """
+
+        try:
+            if not self.operation_finished():
+                self.update_status()
+            if not self.operation_finished():
+                return False
+
+            if self.status().lower() in ('failed', 'canceled'):
+                raise OperationFailed('Operation failed or canceled')
+
+            final_get_url = self._operation.get_final_get_url(
+                self._pipeline_response)
+            if final_get_url:
+                self._pipeline_response = self.request_status(final_get_url)
+                if self._pipeline_response.http_response.status_code >= 400:
+                    raise BadStatus('Invalid return status {}'.format(
+                        self._pipeline_response.http_response.status_code))
+            return True
+        except (BadStatus, OperationFailed) as err:
+            self._status = 'Failed'
+            raise HttpResponseError(
+                response=self._pipeline_response.http_response,
+                error=err) from err
+        except BadResponse as err:
+            self._status = 'Failed'
+            raise HttpResponseError(
+                response=self._pipeline_response.http_response,
+                message=str(err), error=err) from err
+
+
+class _Operation:
+    """One operation tracked by the manager"""
+
+    __slots__ = ('polling', 'future', 'label')
+
+    def __init__(self, polling, future, label):
+        self.polling = polling
+        self.future = future
+        self.label = label
+
+
+class LROManager:
+    """Advances many long running operations with constant thread usage
+
+    A scheduler thread keeps operations in a heap ordered by their next
+    status check and hands due checks to poll_workers threads. Futures
+    returned by submit() resolve with the final resource (or None for
+    deletes) or with the HttpResponseError of a failed operation.
+    """
+
+    def __init__(self, poll_interval=DEFAULT_POLL_INTERVAL,
+                 poll_workers=DEFAULT_POLL_WORKERS, clock=time.monotonic):
+        self.poll_interval = poll_interval
+        self.poll_workers = poll_workers
+        self._clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        # Notified when the last in-flight operation completes
+        self._idle = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._executor = None
+        self._in_flight = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def in_flight(self):
+        """int: Number of operations not completed yet"""
+        return self._in_flight
+
+    def start(self):
+        """Starts the scheduler thread and the polling workers"""
+
+        if self._thread is None:
+            self._stopped = False
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.poll_workers),
+                thread_name_prefix='anf-lro-poll')
+            self._thread = threading.Thread(target=self._run,
+                                            name='anf-lro-scheduler',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """Stops the manager
+
+        Args:
+            wait (boolean): Optional. Waits for every in-flight operation to
+                complete first, default is True
+        """
+
+        if wait and self._thread is not None:
+            with self._idle:
+                self._idle.wait_for(lambda: not self._in_flight)
+
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def polling_method(self, lro_options=None):
+        """Builds the polling method to pass as polling= to a begin_* call
+
+        Args:
+            lro_options (dict): Optional. LRO options of the operation, e.g.
+                {'final-state-via': 'azure-async-operation'}
+
+        Returns:
+            DeferredARMPolling: Returns the polling method
+        """
+
+        return DeferredARMPolling(self.poll_interval, lro_options=lro_options)
+
+    def submit(self, begin_function, *args, lro_options=None, callback=None,
+               on_start=None, **kwargs):
+        """Starts an operation and tracks it until it completes
+
+        The initial request is sent on the calling thread, every following
+        status check runs on the manager threads. An operation started by an
+        earlier process is reattached by passing its continuation_token.
+
+        Args:
+            begin_function (function): A begin_* method of a sync management
+                client, e.g. anf_client.volumes.begin_create_or_update
+            *args: Positional arguments of begin_function
+            lro_options (dict): Optional. LRO options of the operation
+            callback (function): Optional. Called with the future once the
+                operation completes
+            on_start (function): Optional. Called on the calling thread with
+                the LROPoller returned by begin_function, before any status
+                check, e.g. to save its continuation token
+            **kwargs: Keyword arguments of begin_function
+
+        Returns:
+            Future: Returns a future resolved with the operation result
+        """
+
+        polling = self.polling_method(lro_options)
+        poller = begin_function(*args, polling=polling, **kwargs)
+        if on_start is not None:
+            on_start(poller)
+
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        self._schedule(_Operation(polling, future,
+                                  getattr(begin_function, '__name__', '')),
+                       0)
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._operation_done)
+        return future
+
+    def track(self, poller, callback=None):
+        """Bridges an already started LROPoller to a future
+
+        Pollers created without the manager polling method keep their own
+        SDK thread; use submit() for thread-free tracking.
+
+        Args:
+            poller (LROPoller): Poller returned by a begin_* call
+            callback (function): Optional. Called with the future once the
+                operation completes
+
+        Returns:
+            Future: Returns a future resolved with the operation result
+        """
+
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        def on_done(polling_method):
+            try:
+                future.set_result(polling_method.resource())
+            except Exception as ex: # pylint: disable=broad-except
+                future.set_exception(ex)
+
+        poller.add_done_callback(on_done)
+        return future
+
+    def _operation_done(self, _):
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+
+    def _schedule(self, operation, delay):
+        with self._lock:
+            heapq.heappush(self._heap, (self._clock() + delay,
+                                        next(self._sequence), operation))
+        self._wakeup.set()
+
+    def _step(self, operation):
+        """Runs one status check of an operation on a polling worker"""
+
+        try:
+            if operation.polling.step():
+                operation.future.set_result(operation.polling.resource())
+                return
+        except Exception as ex: # pylint: disable=broad-except
+            operation.future.set_exception(ex)
+            return
+
+        self._schedule(operation, operation.polling.next_delay())
+
+    def _run(self):
+        """Scheduler thread loop"""
+
+        while not self._stopped:
+            now = self._clock()
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+                delay = self._heap[0][0] - now if self._heap else None
+
+            for operation in due:
+                self._executor.submit(self._step, operation)
+
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
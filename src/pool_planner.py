@@ -0,0 +1,357 @@
+# pool_planner.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""pool_planner.py code sample
+
+Capacity pool planner: packs a list of volume requests (quota, service level
+and optional throughput target) into as few capacity pools as possible, each
+one sized in whole TiB within the 4TiB to 500TiB limits, and writes the
+result as a desired_state.py manifest.
+
+Notes:
+Volumes are packed per service level with a best-fit decreasing bin-packing,
+largest volumes first, each one going to the open pool it fills the most.
+Open pools are kept sorted by free capacity, so every volume is placed with
+a binary search and thousands of volumes are planned in milliseconds.
+
+With automatic QoS a volume gets THROUGHPUT_PER_TIB MiB/s of its service
+level per TiB of quota, so the quota of a volume with a throughput target is
+raised to the quota delivering that throughput when needed.
+
+Volume requests file format (JSON):
+
+    [{"name": "vol01", "usageThreshold": 107374182400,
+      "serviceLevel": "Standard", "throughputMibps": 16}]
+
+Usage:
+python pool_planner.py volume_requests.json --resource-group anf01-rg
+    --location eastus --account account01 --subnet-id <subnet id>
+    [--output manifest.json]
+
+"""
+
+import argparse
+import json
+import math
+from bisect import bisect_left, insort
+from collections import namedtuple
+from sample_utils import console_output, get_bytes_in_tib, \
+    get_tib_in_bytes
+
+SERVICE_LEVELS = ('Standard', 'Premium', 'Ultra')
+
+# MiB/s of throughput per TiB of quota of each service level (automatic QoS)
+THROUGHPUT_PER_TIB = {'Standard': 16, 'Premium': 64, 'Ultra': 128}
+
+# Capacity pool size limits, pools are sized in increments of one TiB
+MIN_POOL_SIZE = get_tib_in_bytes(4)
+MAX_POOL_SIZE = get_tib_in_bytes(500)
+
+# Volume quota limits, quotas are sized in increments of one GiB
+MIN_VOLUME_SIZE = 107374182400  # 100GiB
+MAX_VOLUME_SIZE = get_tib_in_bytes(100)
+GIB = 1073741824
+
+MAX_VOLUMES_PER_POOL = 500
+
+VolumeRequest = namedtuple('VolumeRequest', ['name', 'usage_threshold',
+                                             'service_level',
+                                             'throughput_mibps'])
+VolumeRequest.__new__.__defaults__ = (None,)
+VolumeRequest.__doc__ = """One volume to be placed by plan_pools()
+
+usage_threshold is the requested quota in bytes and throughput_mibps an
+optional throughput target in MiB/s.
+"""
+
+VolumePlacement = namedtuple('VolumePlacement', ['request',
+                                                 'usage_threshold',
+                                                 'throughput_mibps'])
+VolumePlacement.__doc__ = """Volume assigned to a pool by plan_pools()
+
+usage_threshold is the quota to be provisioned in bytes, the requested one
+raised to meet the throughput target, and throughput_mibps the throughput
+that quota delivers.
+"""
+
+PoolPlan = namedtuple('PoolPlan', ['name', 'service_level', 'size',
+                                   'volumes'])
+PoolPlan.__doc__ = """Capacity pool planned by plan_pools()
+
+size is the pool size in bytes, a whole number of TiB, and volumes lists the
+VolumePlacement entries of the pool.
+"""
+
+
+def normalize_service_level(service_level):
+    """Gets the canonical spelling of a service level
+
+    Args:
+        service_level (string): Service level, case insensitive
+
+    Returns:
+        string: Returns "Standard", "Premium" or "Ultra"
+
+    Raises:
+        ValueError: Unknown service level
+    """
+
+    for known_level in SERVICE_LEVELS:
+        if service_level.lower() == known_level.lower():
+            return known_level
+    raise ValueError('Unknown service level {}'.format(service_level))
+
+
+def get_volume_throughput(usage_threshold, service_level):
+    """Gets the automatic QoS throughput of a volume
+
+    Args:
+        usage_threshold (long): Volume quota in bytes
+        service_level (string): Service level of the capacity pool
+
+    Returns:
+        float: Returns the throughput in MiB/s
+    """
+
+    return get_bytes_in_tib(usage_threshold) * \
+        THROUGHPUT_PER_TIB[normalize_service_level(service_level)]
+
+
+def get_required_quota(request):
+    """Gets the quota to provision for a volume request
+
+    The requested quota is rounded up to a whole GiB, raised to the minimum
+    volume size and, for requests with a throughput target, to the quota
+    delivering that throughput at the requested service level.
+
+    Args:
+        request (VolumeRequest): Volume request
+
+    Returns:
+        long: Returns the quota in bytes
+
+    Raises:
+        ValueError: The quota or throughput cannot be provided by one volume
+    """
+
+    quota = max(MIN_VOLUME_SIZE, request.usage_threshold)
+    if request.throughput_mibps:
+        per_tib = THROUGHPUT_PER_TIB[
+            normalize_service_level(request.service_level)]
+        quota = max(quota, get_tib_in_bytes(request.throughput_mibps /
+                                            per_tib))
+    quota = math.ceil(quota / GIB) * GIB
+
+    if quota > MAX_VOLUME_SIZE:
+        raise ValueError('Volume {} needs {:.1f}TiB, more than the {:.0f}TiB '
+                         'maximum volume size'.format(
+                             request.name, get_bytes_in_tib(quota),
+                             get_bytes_in_tib(MAX_VOLUME_SIZE)))
+    return quota
+
+
+def get_pool_size(used):
+    """Gets the smallest valid pool size holding a number of bytes
+
+    Args:
+        used (long): Bytes allocated to volumes
+
+    Returns:
+        long: Returns the pool size in bytes, a whole number of TiB between
+            MIN_POOL_SIZE and MAX_POOL_SIZE
+    """
+
+    return max(MIN_POOL_SIZE,
+               get_tib_in_bytes(math.ceil(get_bytes_in_tib(used))))
+
+
+def _pack(placements, max_pool_size, max_volumes):
+    """Packs placements into bins with best-fit decreasing
+
+    Returns:
+        list: Returns one list of placements per bin
+    """
+
+    bins = []
+    # (free bytes, bin index) of the bins still able to take a volume,
+    # sorted so the fullest bin fitting a volume is found by bisection
+    open_bins = []
+    for placement in sorted(placements, key=lambda placement:
+                            placement.usage_threshold, reverse=True):
+        size = placement.usage_threshold
+        position = bisect_left(open_bins, (size, -1))
+        if position < len(open_bins):
+            free, index = open_bins.pop(position)
+        else:
+            free, index = max_pool_size, len(bins)
+            bins.append([])
+
+        bins[index].append(placement)
+        free -= size
+        if free >= MIN_VOLUME_SIZE and len(bins[index]) < max_volumes:
+            insort(open_bins, (free, index))
+    return bins
+
+
+def plan_pools(requests, pool_name_prefix='pool', max_pool_size=MAX_POOL_SIZE,
+               max_volumes=MAX_VOLUMES_PER_POOL):
+    """Assigns volume requests to a minimal set of capacity pools
+
+    Args:
+        requests (iterable): VolumeRequest entries
+        pool_name_prefix (string): Optional. Pools are named
+            <prefix>-<service level>-<number>, e.g. pool-standard-01
+        max_pool_size (long): Optional. Largest pool size in bytes
+        max_volumes (int): Optional. Largest number of volumes per pool
+
+    Returns:
+        list: Returns PoolPlan entries, ordered by service level
+
+    Raises:
+        ValueError: A request has an unknown service level or cannot be
+            provided by one volume
+    """
+
+    placements = {}
+    for request in requests:
+        service_level = normalize_service_level(request.service_level)
+        quota = get_required_quota(request)
+        placements.setdefault(service_level, []).append(VolumePlacement(
+            request, quota, get_volume_throughput(quota, service_level)))
+
+    pools = []
+    for service_level in SERVICE_LEVELS:
+        bins = _pack(placements.get(service_level, ()), max_pool_size,
+                     max_volumes)
+        for number, volumes in enumerate(bins, 1):
+            pools.append(PoolPlan(
+                '{}-{}-{:02d}'.format(pool_name_prefix,
+                                      service_level.lower(), number),
+                service_level,
+                get_pool_size(sum(volume.usage_threshold
+                                  for volume in volumes)),
+                volumes))
+    return pools
+
+
+def build_manifest(pools, resource_group_name, anf_account_name, location,
+                   subnet_id, tags=None):
+    """Builds a desired_state.py manifest creating planned pools
+
+    Args:
+        pools (list): PoolPlan entries returned by plan_pools()
+        resource_group_name (string): Resource group of the account
+        anf_account_name (string): Account holding every pool
+        location (string): Azure short name of the region
+        subnet_id (string): Subnet delegated to ANF volumes
+        tags (object): Optional. Key-value pairs to tag the account
+
+    Returns:
+        dict: Returns the manifest, to be given to desired_state.plan()
+    """
+
+    account = {'name': anf_account_name, 'capacityPools': []}
+    if tags:
+        account['tags'] = tags
+
+    for pool in pools:
+        account['capacityPools'].append({
+            'name': pool.name,
+            'serviceLevel': pool.service_level,
+            'size': pool.size,
+            'volumes': [{'name': volume.request.name,
+                         'usageThreshold': volume.usage_threshold}
+                        for volume in pool.volumes]})
+
+    return {'resourceGroup': resource_group_name,
+            'location': location,
+            'subnetId': subnet_id,
+            'accounts': [account]}
+
+
+def load_volume_requests(path):
+    """Loads volume requests from a JSON file
+
+    Args:
+        path (string): Path of a JSON list of objects with name,
+            usageThreshold, serviceLevel and optionally throughputMibps
+
+    Returns:
+        list: Returns VolumeRequest entries
+    """
+
+    with open(path) as requests_file:
+        return [VolumeRequest(entry['name'], entry['usageThreshold'],
+                              entry['serviceLevel'],
+                              entry.get('throughputMibps'))
+                for entry in json.load(requests_file)]
+
+
+def summarize(pools):
+    """Prints the pools of a plan with their provisioned and used capacity"""
+
+    provisioned = sum(pool.size for pool in pools)
+    used = sum(volume.usage_threshold for pool in pools
+               for volume in pool.volumes)
+    console_output('{} capacity pool(s), {:.0f}TiB provisioned, {:.1f}TiB '
+                   'allocated to volumes ({:.1%})'.format(
+                       len(pools), get_bytes_in_tib(provisioned),
+                       get_bytes_in_tib(used),
+                       used / provisioned if provisioned else 0))
+    for pool in pools:
+        console_output('\t{}: {} {:.0f}TiB, {} volume(s), {:.0f}MiB/s'.format(
+            pool.name, pool.service_level, get_bytes_in_tib(pool.size),
+            len(pool.volumes), sum(volume.throughput_mibps
+                                   for volume in pool.volumes)))
+
+
+def run(requests_path, resource_group_name, anf_account_name, location,
+        subnet_id, output_path=None):
+    """Plans the pools of a volume requests file and writes the manifest
+
+    Args:
+        requests_path (string): Path of the JSON volume requests
+        resource_group_name (string): Resource group of the account
+        anf_account_name (string): Account holding every pool
+        location (string): Azure short name of the region
+        subnet_id (string): Subnet delegated to ANF volumes
+        output_path (string): Optional. Manifest file, the manifest is
+            printed to stdout when omitted
+
+    Returns:
+        dict: Returns the manifest
+    """
+
+    pools = plan_pools(load_volume_requests(requests_path))
+    manifest = build_manifest(pools, resource_group_name, anf_account_name,
+                              location, subnet_id)
+    if output_path:
+        with open(output_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+        summarize(pools)
+    else:
+        # stdout only gets the manifest, so it can be piped
+        print(json.dumps(manifest, indent=4))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('requests', help='JSON file of volume requests')
+    parser.add_argument('--resource-group', required=True,
+                        help='resource group of the account')
+    parser.add_argument('--location', required=True,
+                        help='region of the resources')
+    parser.add_argument('--account', required=True,
+                        help='account holding the capacity pools')
+    parser.add_argument('--subnet-id', required=True,
+                        help='subnet delegated to ANF volumes')
+    parser.add_argument('--output', help='manifest file, printed if omitted')
+    arguments = parser.parse_args()
+
+    run(arguments.requests, arguments.resource_group, arguments.account,
+        arguments.location, arguments.subnet_id, arguments.output)
@@ -0,0 +1,257 @@
+# rate_limiter.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""rate_limiter.py code sample
+
+Process wide rate limiter for ARM calls: token buckets with separate read
+and write budgets shared by every thread and asyncio task, paused for
+everyone when ARM answers 429 with a Retry-After header.
+
+Notes:
+RateLimitPolicy and AsyncRateLimitPolicy plug the limiter into the SDK
+pipeline as per-retry policies, so every attempt of every call (creations,
+waiters, cleanup) takes a token. ClientFactory adds RateLimitPolicy to every
+client it builds. Default budgets follow the ARM token bucket limits of a
+subscription and can be changed through the ANF_ARM_READ_RATE,
+ANF_ARM_READ_BURST, ANF_ARM_WRITE_RATE and ANF_ARM_WRITE_BURST environment
+variables.
+
+Usage:
+limiter = get_default_limiter()
+anf_client = NetAppManagementClient(credentials, subscription_id,
+                                    per_retry_policies=[
+                                        RateLimitPolicy(limiter)])
+
+"""
+
+import asyncio
+import os
+import threading
+import time
+from azure.core.pipeline.policies import AsyncHTTPPolicy, HTTPPolicy
+
+# ARM token bucket limits per subscription (refill per second, bucket size)
+DEFAULT_READ_RATE = 25
+DEFAULT_READ_BURST = 250
+DEFAULT_WRITE_RATE = 10
+DEFAULT_WRITE_BURST = 200
+
+# Pause applied on a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 10
+
+WRITE_METHODS = frozenset(('PUT', 'PATCH', 'POST', 'DELETE'))
+
+
+class TokenBucket:
+    """Thread safe token bucket handing out reservations
+
+    reserve() always takes a token, possibly borrowing from the future, and
+    returns how long the caller must wait before using it, so waiting
+    happens outside the lock and works for threads and tasks alike.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token
+
+        Returns:
+            float: Returns the seconds to wait before sending the call
+        """
+
+        with self._lock:
+            now = self._clock()
+            # Tokens are not refilled before the end of a pause
+            if now > self._updated_at:
+                self._tokens = min(self.capacity, self._tokens +
+                                   (now - self._updated_at) * self.rate)
+                self._updated_at = now
+            self._tokens -= 1
+
+            delay = max(0, self._paused_until - now)
+            if self._tokens < 0:
+                delay = max(delay, self._updated_at - now +
+                            -self._tokens / self.rate)
+            return delay
+
+    def pause(self, seconds):
+        """Holds every caller back for a number of seconds
+
+        The bucket is also emptied, so calls resume at the refill rate
+        instead of as a burst once the pause is over.
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0)
+            self._updated_at = max(self._updated_at, self._paused_until)
+
+
+class RateLimiter:
+    """Read and write token buckets of ARM calls
+
+    Reads are GET and HEAD calls, everything else is a write. Counters of
+    waited calls and throttled responses are kept in stats.
+    """
+
+    def __init__(self, read_rate=DEFAULT_READ_RATE,
+                 read_burst=DEFAULT_READ_BURST,
+                 write_rate=DEFAULT_WRITE_RATE,
+                 write_burst=DEFAULT_WRITE_BURST, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.read = TokenBucket(read_rate, read_burst, clock)
+        self.write = TokenBucket(write_rate, write_burst, clock)
+        self.stats = {'calls': 0, 'delayed': 0, 'throttled': 0,
+                      'waited': 0.0}
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def get_bucket(self, method):
+        """Gets the bucket of an HTTP method"""
+
+        return self.write if method.upper() in WRITE_METHODS else self.read
+
+    def _reserve(self, method):
+        delay = self.get_bucket(method).reserve()
+        with self._lock:
+            self.stats['calls'] += 1
+            if delay > 0:
+                self.stats['delayed'] += 1
+                self.stats['waited'] += delay
+        return delay
+
+    def acquire(self, method):
+        """Blocks the calling thread until a call may be sent
+
+        Args:
+            method (string): HTTP method of the call
+
+        Returns:
+            float: Returns the seconds waited
+        """
+
+        delay = self._reserve(method)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    async def acquire_async(self, method):
+        """asyncio counterpart of acquire(), only suspends the calling task"""
+
+        delay = self._reserve(method)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def throttled(self, method, retry_after=None):
+        """Records a 429 response and pauses the bucket of its method
+
+        Args:
+            method (string): HTTP method of the throttled call
+            retry_after (float): Optional. Seconds requested by ARM,
+                DEFAULT_RETRY_AFTER when missing
+        """
+
+        with self._lock:
+            self.stats['throttled'] += 1
+        self.get_bucket(method).pause(
+            DEFAULT_RETRY_AFTER if retry_after is None else retry_after)
+
+
+def get_retry_after(http_response):
+    """Gets the delay requested by a throttled response
+
+    Args:
+        http_response (HttpResponse): Response of the call
+
+    Returns:
+        float: Returns the seconds to wait, None if no header is usable
+    """
+
+    headers = http_response.headers
+    for header, scale in (('retry-after-ms', 0.001),
+                          ('x-ms-retry-after-ms', 0.001),
+                          ('retry-after', 1)):
+        value = headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                # HTTP-date values are left to the retry policy
+                continue
+    return None
+
+
+class RateLimitPolicy(HTTPPolicy):
+    """Pipeline policy taking a token before each attempt of a call
+
+    Meant to be added as a per-retry policy so retries are limited as well.
+    """
+
+    def __init__(self, limiter=None):
+        super().__init__()
+        self.limiter = limiter or get_default_limiter()
+
+    def send(self, request):
+        method = request.http_request.method
+        self.limiter.acquire(method)
+        response = self.next.send(request)
+        if response.http_response.status_code == 429:
+            self.limiter.throttled(method,
+                                   get_retry_after(response.http_response))
+        return response
+
+
+class AsyncRateLimitPolicy(AsyncHTTPPolicy):
+    """asyncio counterpart of RateLimitPolicy"""
+
+    def __init__(self, limiter=None):
+        super().__init__()
+        self.limiter = limiter or get_default_limiter()
+
+    async def send(self, request):
+        method = request.http_request.method
+        await self.limiter.acquire_async(method)
+        response = await self.next.send(request)
+        if response.http_response.status_code == 429:
+            self.limiter.throttled(method,
+                                   get_retry_after(response.http_response))
+        return response
+
+
+_DEFAULT_LIMITER = None
+_DEFAULT_LIMITER_LOCK = threading.Lock()
+
+
+def get_default_limiter():
+    """Gets the process wide rate limiter
+
+    Returns:
+        RateLimiter: Returns the limiter, built on first use from the
+            ANF_ARM_* environment variables or the default ARM budgets
+    """
+
+    global _DEFAULT_LIMITER # pylint: disable=global-statement
+    with _DEFAULT_LIMITER_LOCK:
+        if _DEFAULT_LIMITER is None:
+            _DEFAULT_LIMITER = RateLimiter(
+                float(os.environ.get('ANF_ARM_READ_RATE', DEFAULT_READ_RATE)),
+                float(os.environ.get('ANF_ARM_READ_BURST',
+                                     DEFAULT_READ_BURST)),
+                float(os.environ.get('ANF_ARM_WRITE_RATE',
+                                     DEFAULT_WRITE_RATE)),
+                float(os.environ.get('ANF_ARM_WRITE_BURST',
+                                     DEFAULT_WRITE_BURST)))
+        return _DEFAULT_LIMITER
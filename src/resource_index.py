@@ -0,0 +1,386 @@
+# resource_index.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""resource_index.py code sample
+
+Hierarchical in-memory index of ANF resources: a trie keyed by the
+subscription, resource group, account, capacity pool, volume and snapshot
+segments of the resource ids, answering "everything under this account" or
+"all snapshots of this pool" without list calls or parsing every id again.
+
+Notes:
+Insert, lookup and delete walk one trie node per segment, O(depth), and every
+node keeps the number of indexed resources of its subtree, so subtree counts
+are O(depth) as well. walk() returns the entries of a subtree top-down or
+bottom-up, the order in which cleanup_utils deletes resources. The index is
+filled from list responses with index_resource_group() or add_many(), and
+kept current by passing it as index to the example.py create_* functions and
+to cleanup_utils.
+
+Usage:
+index = index_resource_group(anf_client, 'anf01-rg', snapshots=True)
+snapshots = index.walk(pool.id, kind=resource_uri_utils.KIND_SNAPSHOT)
+
+"""
+
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import resource_uri_utils
+
+# Default maximum number of list calls sent at the same time
+DEFAULT_MAX_WORKERS = 16
+
+# Trie depth of the accounts: subscription, resource group, account
+_ACCOUNT_DEPTH = 3
+
+IndexEntry = namedtuple('IndexEntry', ['resource_id', 'resource',
+                                       'parent_id'])
+IndexEntry.__doc__ = """One resource returned by ResourceIndex.walk()
+
+resource is the indexed body (None when only the id was indexed) and
+parent_id the resource id of the closest indexed ancestor, None when no
+ancestor is indexed.
+"""
+
+
+class _Node:
+    """Trie node, holding a resource when resource_id is set"""
+
+    __slots__ = ('children', 'resource_id', 'resource', 'size')
+
+    def __init__(self):
+        self.children = {}
+        self.resource_id = None
+        self.resource = None
+        # Number of indexed resources in the subtree, this node included
+        self.size = 0
+
+
+def get_index_path(resource_id):
+    """Gets the trie path of a resource id
+
+    Args:
+        resource_id (string): ANF resource id, or a subscription or resource
+            group id to designate everything under it
+
+    Returns:
+        tuple: Returns the lower case segments, from the subscription down
+            to the resource name
+
+    Raises:
+        ValueError: The id is neither an ANF resource, a subscription nor a
+            resource group
+    """
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+    if rid.is_anf:
+        depth = _ACCOUNT_DEPTH - 1 + \
+            resource_uri_utils.ANF_RESOURCE_KINDS.index(rid.kind)
+    elif rid.subscription is not None and \
+            len(resource_id.strip().strip('/').split('/')) == \
+            (2 if rid.resource_group is None else 4):
+        depth = 1 if rid.resource_group is None else 2
+    else:
+        raise ValueError('Not an ANF resource id: {}'.format(resource_id))
+    return tuple(segment.lower() for segment in rid[:depth])
+
+
+class ResourceIndex:
+    """Trie of ANF resources keyed by their resource id segments
+
+    Keys are case insensitive, as ARM resource ids. All methods are thread
+    safe, walk() returns a list built under the lock rather than a live
+    iterator.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._root.size
+
+    def __contains__(self, resource_id):
+        path = get_index_path(resource_id)
+        with self._lock:
+            return self._find(path, True) is not None
+
+    def _find(self, path, indexed_only=False):
+        node = self._root
+        for segment in path:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        if indexed_only and node.resource_id is None:
+            return None
+        return node
+
+    def _add(self, path, resource_id, resource):
+        nodes = [self._root]
+        node = self._root
+        for segment in path:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+            nodes.append(node)
+
+        added = node.resource_id is None
+        if added:
+            for ancestor in nodes:
+                ancestor.size += 1
+        node.resource_id = resource_id
+        node.resource = resource
+        return added
+
+    def add(self, resource_id, resource=None):
+        """Indexes a resource, replacing the entry of the same id
+
+        Args:
+            resource_id (string): ANF resource id
+            resource (object): Optional. Body of the resource
+
+        Returns:
+            boolean: Returns True when the resource was not indexed yet
+
+        Raises:
+            ValueError: The id is not an ANF resource id
+        """
+
+        path = get_index_path(resource_id)
+        if len(path) < _ACCOUNT_DEPTH:
+            raise ValueError('Not an ANF resource id: {}'.format(resource_id))
+        with self._lock:
+            return self._add(path, resource_id, resource)
+
+    def add_many(self, resources):
+        """Indexes the resources of list responses
+
+        Ids are parsed with the bulk parser, which is much faster than
+        parsing them one by one for large inventories.
+
+        Args:
+            resources (iterable): Resource bodies with an id attribute, e.g.
+                the Volume objects returned by volumes.list(), or ids
+
+        Returns:
+            int: Returns the number of resources not indexed before
+        """
+
+        resources = list(resources)
+        resource_ids = [resource if isinstance(resource, str)
+                        else resource.id for resource in resources]
+        columns = resource_uri_utils.parse_resource_ids(resource_ids)
+
+        added = 0
+        with self._lock:
+            for resource_id, resource, kind, row in zip(
+                    resource_ids, resources, columns.kind,
+                    zip(*columns[:-1])):
+                if kind == 0:
+                    raise ValueError('Not an ANF resource id: {}'.format(
+                        resource_id))
+                path = tuple(segment.lower()
+                             for segment in row[:_ACCOUNT_DEPTH - 1 + kind])
+                added += self._add(path, resource_id,
+                                   None if resource is resource_id
+                                   else resource)
+        return added
+
+    def get(self, resource_id):
+        """Gets the indexed body of a resource
+
+        Args:
+            resource_id (string): ANF resource id
+
+        Returns:
+            object: Returns the body given when indexing, None if the
+                resource or its body is not indexed
+        """
+
+        path = get_index_path(resource_id)
+        with self._lock:
+            node = self._find(path, True)
+            return None if node is None else node.resource
+
+    def count(self, resource_id=None):
+        """Counts the indexed resources of a subtree
+
+        Args:
+            resource_id (string): Optional. Root of the subtree, an ANF
+                resource, resource group or subscription id, everything by
+                default
+
+        Returns:
+            int: Returns the number of indexed resources, the root included
+        """
+
+        path = () if resource_id is None else get_index_path(resource_id)
+        with self._lock:
+            node = self._find(path)
+            return 0 if node is None else node.size
+
+    def remove(self, resource_id, subtree=True):
+        """Removes a resource from the index
+
+        Args:
+            resource_id (string): ANF resource, resource group or
+                subscription id
+            subtree (boolean): Optional. Also removes every resource under
+                it, default is True
+
+        Returns:
+            int: Returns the number of resources removed
+        """
+
+        path = get_index_path(resource_id)
+        with self._lock:
+            nodes = [self._root]
+            for segment in path:
+                node = nodes[-1].children.get(segment)
+                if node is None:
+                    return 0
+                nodes.append(node)
+
+            node = nodes[-1]
+            if subtree:
+                removed = node.size
+                node.children.clear()
+                node.size = 0
+            else:
+                removed = 0 if node.resource_id is None else 1
+                node.size -= removed
+            node.resource_id = None
+            node.resource = None
+
+            for ancestor in nodes[:-1]:
+                ancestor.size -= removed
+            # Prunes the nodes left without any resource
+            for depth in range(len(path), 0, -1):
+                if nodes[depth].size or nodes[depth].children:
+                    break
+                del nodes[depth - 1].children[path[depth - 1]]
+            return removed
+
+    def walk(self, resource_id=None, kind=None, bottom_up=False):
+        """Lists the indexed resources of a subtree
+
+        Args:
+            resource_id (string): Optional. Root of the subtree, an ANF
+                resource, resource group or subscription id, everything by
+                default
+            kind (string): Optional. Only lists resources of this kind, one
+                of resource_uri_utils.ANF_RESOURCE_KINDS
+            bottom_up (boolean): Optional. Lists children before their
+                parents instead of parents first
+
+        Returns:
+            list: Returns IndexEntry entries, the root included
+        """
+
+        path = () if resource_id is None else get_index_path(resource_id)
+        kind_depth = None if kind is None else _ACCOUNT_DEPTH - 1 + \
+            resource_uri_utils.ANF_RESOURCE_KINDS.index(kind)
+
+        entries = []
+        with self._lock:
+            node = self._find(path)
+            if node is None:
+                return entries
+
+            # Closest indexed ancestor of the root
+            parent_id = None
+            ancestor = self._root
+            for segment in path[:-1]:
+                ancestor = ancestor.children[segment]
+                parent_id = ancestor.resource_id or parent_id
+
+            # Iterative depth first traversal, (node, depth, parent id,
+            # expanded) entries, expanded nodes are emitted bottom-up
+            stack = [(node, len(path), parent_id, False)]
+            while stack:
+                node, depth, parent_id, expanded = stack.pop()
+                emit = node.resource_id is not None and \
+                    (kind_depth is None or depth == kind_depth)
+                if expanded:
+                    entries.append(IndexEntry(node.resource_id, node.resource,
+                                              parent_id))
+                    continue
+                if emit and not bottom_up:
+                    entries.append(IndexEntry(node.resource_id, node.resource,
+                                              parent_id))
+                elif emit:
+                    stack.append((node, depth, parent_id, True))
+                if kind_depth is not None and depth >= kind_depth:
+                    continue
+                child_parent_id = node.resource_id or parent_id
+                stack.extend((child, depth + 1, child_parent_id, False)
+                             for child in node.children.values())
+        return entries
+
+    def clear(self):
+        """Removes every resource"""
+
+        with self._lock:
+            self._root = _Node()
+
+
+def index_resource_group(client, resource_group_name, account_names=None,
+                         snapshots=False, index=None,
+                         max_workers=DEFAULT_MAX_WORKERS):
+    """Fills an index from the list responses of a resource group
+
+    Pools of every account, volumes of every pool and optionally snapshots
+    of every volume are listed in parallel.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Optional. Accounts to be listed, all the
+            accounts of the resource group by default
+        snapshots (boolean): Optional. Also lists the snapshots of every
+            volume, one more list call per volume
+        index (ResourceIndex): Optional. Index to be filled, a new one by
+            default
+        max_workers (int): Optional. Maximum number of list calls at once
+
+    Returns:
+        ResourceIndex: Returns the filled index
+    """
+
+    index = ResourceIndex() if index is None else index
+    if account_names is not None:
+        account_names = {name.lower() for name in account_names}
+
+    accounts = [account for account in client.accounts.list(
+                    resource_group_name)
+                if account_names is None or
+                resource_uri_utils.get_anf_account(account.id).lower()
+                in account_names]
+    index.add_many(accounts)
+
+    def list_children(parent):
+        rid = resource_uri_utils.parse_resource_id(parent.id)
+        if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+            return list(client.pools.list(resource_group_name, rid.account))
+        if rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+            return list(client.volumes.list(resource_group_name, rid.account,
+                                            rid.pool))
+        return list(client.snapshots.list(resource_group_name, rid.account,
+                                          rid.pool, rid.volume))
+
+    parents = accounts
+    levels = 3 if snapshots else 2
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for _ in range(levels):
+            parents = [child for children in executor.map(list_children,
+                                                          parents)
+                       for child in children]
+            index.add_many(parents)
+    return index
@@ -11,6 +11,104 @@ Resource URI related utilities to be consumed by the example.py sample code.
 
 """
 
+import re
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+
+# Maximum number of distinct resource ids kept by parse_resource_id
+PARSE_CACHE_SIZE = 4096
+
+ANF_PROVIDER_NAMESPACE = 'microsoft.netapp'
+
+# ANF resource kinds, from the outermost to the innermost resource. The
+# position of each kind in this tuple is also its numeric kind code.
+KIND_ACCOUNT = 'account'
+KIND_CAPACITY_POOL = 'capacityPool'
+KIND_VOLUME = 'volume'
+KIND_SNAPSHOT = 'snapshot'
+ANF_RESOURCE_KINDS = (None, KIND_ACCOUNT, KIND_CAPACITY_POOL, KIND_VOLUME,
+                      KIND_SNAPSHOT)
+
+# Lower case resource type segment -> (ResourceId field, ANF resource kind)
+_SEGMENT_FIELDS = {
+    'subscriptions': ('subscription', None),
+    'resourcegroups': ('resource_group', None),
+    'netappaccounts': ('account', KIND_ACCOUNT),
+    'capacitypools': ('pool', KIND_CAPACITY_POOL),
+    'volumes': ('volume', KIND_VOLUME),
+    'snapshots': ('snapshot', KIND_SNAPSHOT),
+}
+
+
+class ResourceId(namedtuple('_ResourceIdBase', ['subscription',
+                                                'resource_group',
+                                                'account',
+                                                'pool',
+                                                'volume',
+                                                'snapshot',
+                                                'kind'])):
+    """Parsed Azure NetApp Files resource id/uri
+
+    Immutable value holding every segment of an ANF resource id, produced by
+    parse_resource_id() in a single pass over the uri. Segments not present
+    in the uri are None, kind is one of ANF_RESOURCE_KINDS and it is None
+    when the uri does not reference an account, capacity pool, volume or
+    snapshot.
+    """
+
+    __slots__ = ()
+
+    @property
+    def is_anf(self):
+        """boolean: True if the uri references an ANF resource"""
+        return self.kind is not None
+
+
+EMPTY_RESOURCE_ID = ResourceId(None, None, None, None, None, None, None)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_resource_id(resource_uri):
+    """Parses a resource id/uri into its segments
+
+    Function that walks the resource id/uri once, collecting subscription,
+    resource group and ANF account/pool/volume/snapshot names together with
+    the kind of the referenced resource. Results are kept in a bounded LRU
+    cache, so parsing the same id again is a dictionary lookup.
+
+    Args:
+        resource_uri (string): resource id/uri
+
+    Returns:
+        ResourceId: Returns the parsed resource id
+    """
+
+    segments = resource_uri.strip().strip('/').split('/')
+    if len(segments) < 2:
+        return EMPTY_RESOURCE_ID
+
+    values = {}
+    kind = None
+    in_anf_provider = False
+    for index in range(0, len(segments) - 1, 2):
+        segment_type = segments[index].lower()
+        segment_value = segments[index + 1]
+        if segment_type == 'providers':
+            in_anf_provider = segment_value.lower() == ANF_PROVIDER_NAMESPACE
+            kind = None
+            continue
+
+        field, segment_kind = _SEGMENT_FIELDS.get(segment_type, (None, None))
+        if segment_kind is not None and not in_anf_provider:
+            field = None
+        if field is not None and field not in values:
+            values[field] = segment_value
+        kind = segment_kind if field is not None else None
+
+    return EMPTY_RESOURCE_ID._replace(kind=kind, **values)
+
+
 def get_resource_value(resource_uri, resource_name):
     """Gets the resource name based on resource type
 
@@ -88,7 +186,7 @@ def get_resource_group(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/resourceGroups')
+    return parse_resource_id(resource_uri).resource_group
 
 
 def get_subscription(resource_uri):
@@ -106,7 +204,7 @@ def get_subscription(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/subscriptions')
+    return parse_resource_id(resource_uri).subscription
 
 
 def get_anf_account(resource_uri):
@@ -124,7 +222,7 @@ def get_anf_account(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/netAppAccounts')
+    return parse_resource_id(resource_uri).account
 
 
 def get_anf_capacity_pool(resource_uri):
@@ -142,7 +240,7 @@ def get_anf_capacity_pool(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/capacityPools')
+    return parse_resource_id(resource_uri).pool
 
 
 def get_anf_volume(resource_uri):
@@ -160,7 +258,7 @@ def get_anf_volume(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/volumes')
+    return parse_resource_id(resource_uri).volume
 
 
 def get_anf_snapshot(resource_uri):
@@ -178,7 +276,59 @@ def get_anf_snapshot(resource_uri):
     if not resource_uri.strip():
         return None
 
-    return get_resource_value(resource_uri, '/snapshots')
+    return parse_resource_id(resource_uri).snapshot
+
+
+def build_anf_resource_id(subscription, resource_group, account, pool=None,
+                          volume=None, snapshot=None):
+    """Builds the resource id of an ANF resource
+
+    Args:
+        subscription (string): Subscription id (GUID)
+        resource_group (string): Resource group name
+        account (string): Account name
+        pool (string): Optional. Capacity pool name
+        volume (string): Optional. Volume name, requires pool
+        snapshot (string): Optional. Snapshot name, requires volume
+
+    Returns:
+        string: Returns the resource id of the innermost resource given
+    """
+
+    resource_uri = ('/subscriptions/{}/resourceGroups/{}'
+                    '/providers/Microsoft.NetApp/netAppAccounts/{}').format(
+                        subscription, resource_group, account)
+    for segment, name in (('capacityPools', pool), ('volumes', volume),
+                          ('snapshots', snapshot)):
+        if name is None:
+            break
+        resource_uri += '/{}/{}'.format(segment, name)
+
+    return resource_uri
+
+
+def get_anf_parent_id(resource_uri):
+    """Gets the resource id of the parent of an ANF resource
+
+    Function that returns the id of the account holding a capacity pool, the
+    capacity pool holding a volume or the volume holding a snapshot.
+
+    Args:
+        resource_uri (string): resource id/uri
+
+    Returns:
+        string: Returns the parent resource id, None for accounts and non ANF
+            resources
+    """
+
+    if not resource_uri.strip():
+        return None
+
+    kind = parse_resource_id(resource_uri).kind
+    if kind in (None, KIND_ACCOUNT):
+        return None
+
+    return resource_uri.strip().rstrip('/').rsplit('/', 2)[0]
 
 
 def is_anf_resource(resource_uri):
@@ -197,7 +347,7 @@ def is_anf_resource(resource_uri):
     if not resource_uri.strip():
         return False
 
-    return resource_uri.find('/providers/Microsoft.NetApp/netAppAccounts') > -1
+    return parse_resource_id(resource_uri).account is not None
 
 
 def is_anf_snapshot(resource_uri):
@@ -213,10 +363,10 @@ def is_anf_snapshot(resource_uri):
         boolean: Returns true if resource is a snapshot
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return resource_uri.rfind('/snapshots/') > -1
+    return parse_resource_id(resource_uri).kind == KIND_SNAPSHOT
 
 
 def is_anf_volume(resource_uri):
@@ -232,11 +382,10 @@ def is_anf_volume(resource_uri):
         boolean: Returns true if resource is a volume
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return (not is_anf_snapshot(resource_uri)) \
-        and (resource_uri.rfind('/volumes/') > -1)
+    return parse_resource_id(resource_uri).kind == KIND_VOLUME
 
 
 def is_anf_capacity_pool(resource_uri):
@@ -252,12 +401,10 @@ def is_anf_capacity_pool(resource_uri):
         boolean: Returns true if resource is a capacity pool
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return (not is_anf_snapshot(resource_uri)) \
-        and (not is_anf_volume(resource_uri)) \
-        and (resource_uri.rfind('/capacityPools/') > -1)
+    return parse_resource_id(resource_uri).kind == KIND_CAPACITY_POOL
 
 
 def is_anf_account(resource_uri):
@@ -273,11 +420,138 @@ def is_anf_account(resource_uri):
         boolean: Returns true if resource is an account
     """
 
-    if (not resource_uri.strip()) or (not is_anf_resource(resource_uri)):
+    if not resource_uri.strip():
         return False
 
-    return (not is_anf_snapshot(resource_uri)) \
-        and (not is_anf_volume(resource_uri)) \
-        and (not is_anf_capacity_pool(resource_uri)) \
-        and (resource_uri.rfind('/backupPolicies/') == -1) \
-        and (resource_uri.rfind('/netAppAccounts/') > -1)
+    return parse_resource_id(resource_uri).kind == KIND_ACCOUNT
+
+
+# Fast path used by the bulk parser, it matches well formed ANF resource ids
+# and the index of the last matched group maps to the kind code (group 3 is
+# the account, kind code 1).
+_ANF_RESOURCE_ID_PATTERN = re.compile(
+    r'/?subscriptions/([^/]+)/resourceGroups/([^/]+)'
+    r'/providers/Microsoft\.NetApp/netAppAccounts/([^/]+)'
+    r'(?:/capacityPools/([^/]+)'
+    r'(?:/volumes/([^/]+)'
+    r'(?:/snapshots/([^/]+))?)?)?/?',
+    re.IGNORECASE)
+
+_RESOURCE_ID_SEGMENT_FIELDS = ResourceId._fields[:-1]
+
+ResourceIdColumns = namedtuple('ResourceIdColumns',
+                               _RESOURCE_ID_SEGMENT_FIELDS + ('kind',))
+ResourceIdColumns.__doc__ = """Columnar result of parse_resource_ids
+
+Every segment field is a list with one entry per parsed resource id (None
+when the segment is not present) and kind is an array('b') of kind codes,
+the index of the kind in ANF_RESOURCE_KINDS.
+"""
+
+
+def parse_resource_ids(resource_uris):
+    """Parses many resource ids/uris into columns
+
+    Function that parses a batch of resource ids/uris with a single compiled
+    regular expression per id instead of scanning each id once per segment.
+    Ids that are not well formed ANF resource ids fall back to
+    parse_resource_id() semantics, without filling its cache.
+
+    Args:
+        resource_uris (iterable): resource ids/uris
+
+    Returns:
+        ResourceIdColumns: Returns parallel columns of segments and kind codes
+    """
+
+    fullmatch = _ANF_RESOURCE_ID_PATTERN.fullmatch
+    parse = parse_resource_id.__wrapped__
+    kind_codes = {kind: code for code, kind in enumerate(ANF_RESOURCE_KINDS)}
+
+    rows = []
+    kinds = array('b')
+    for resource_uri in resource_uris:
+        match = fullmatch(resource_uri)
+        if match is not None:
+            rows.append(match.groups())
+            kinds.append(match.lastindex - 2)
+        else:
+            rid = parse(resource_uri)
+            rows.append(rid[:-1])
+            kinds.append(kind_codes[rid.kind])
+
+    if not rows:
+        return ResourceIdColumns(*([] for _ in _RESOURCE_ID_SEGMENT_FIELDS),
+                                 kind=kinds)
+
+    return ResourceIdColumns(*(list(column) for column in zip(*rows)),
+                             kind=kinds)
+
+
+def iter_resource_id_lines(resource_ids_file):
+    """Reads the resource ids/uris of a text file one line at a time
+
+    The file is iterated lazily, so large files and stdin are parsed while
+    they are read, without holding their whole content. Blank lines are
+    skipped.
+
+    Args:
+        resource_ids_file (file): Text file, e.g. sys.stdin
+
+    Returns:
+        iterator: Returns the resource ids/uris without line endings
+    """
+
+    return (line for line in (raw_line.rstrip('\r\n')
+                              for raw_line in resource_ids_file) if line)
+
+
+def parse_resource_ids_file(path):
+    """Parses a file with one resource id/uri per line into columns
+
+    Blank lines are skipped.
+
+    Args:
+        path (string): Path of the file holding the resource ids/uris
+
+    Returns:
+        ResourceIdColumns: Returns parallel columns of segments and kind codes
+    """
+
+    with open(path) as resource_ids_file:
+        return parse_resource_ids(iter_resource_id_lines(resource_ids_file))
+
+
+def as_structured_array(columns):
+    """Converts parsed columns into a NumPy structured array
+
+    Segment fields become fixed width unicode fields (missing segments are
+    empty strings) and kind becomes an int8 field.
+
+    Args:
+        columns (ResourceIdColumns): Result of parse_resource_ids()
+
+    Returns:
+        numpy.ndarray: Returns a structured array with one record per id
+    """
+
+    # numpy is only needed here and is slow to import, so it is imported on
+    # first use rather than with the module
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required to build structured '
+                          'arrays') from None
+
+    segments = [numpy.array([value or '' for value in column], dtype=str)
+                for column in columns[:-1]]
+    dtype = [(field, 'U{}'.format(max(segment.dtype.itemsize // 4, 1)))
+             for field, segment in zip(_RESOURCE_ID_SEGMENT_FIELDS, segments)]
+    dtype.append(('kind', 'i1'))
+
+    result = numpy.empty(len(columns.kind), dtype=dtype)
+    for field, segment in zip(_RESOURCE_ID_SEGMENT_FIELDS, segments):
+        if len(segment):
+            result[field] = segment
+    result['kind'] = numpy.frombuffer(columns.kind, dtype='i1')
+    return result
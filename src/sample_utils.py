@@ -11,44 +11,122 @@ SDK related functions to be consumed by the example.py sample code.
 
 """
 
+import asyncio
 import os
 import json
+import logging
+import random
 import time
-from datetime import datetime
+from collections import namedtuple
+from functools import lru_cache
 from azure.core.exceptions import HttpResponseError, \
     ResourceNotFoundError
-from azure.identity import ClientSecretCredential
+import logging_utils
 import resource_uri_utils
+import tracing
+
+BYTES_PER_TIB = 1099511627776
+
+# (resource type, API version) pairs answering 405 to HEAD, existence checks
+# of these resources go straight to GET instead of paying for the HEAD call
+_HEAD_UNSUPPORTED = set()
 
 def print_header(header_string):
     """Prints a header output
 
+    The header is queued to the logging_utils writer thread.
+
     Args:
         header_string (string): String value to output
     """
-    print(header_string)
-    print('-' * len(header_string))
+    logging_utils.log_header(header_string)
+
+
+@lru_cache(maxsize=None)
+def read_credential_info(credential_file):
+    """Reads and parses a service principal credential file once
+
+    Args:
+        credential_file (string): Path of the azureauth.json file
+
+    Returns:
+        dict: Returns the parsed credential file contents
+    """
+
+    with open(credential_file) as credential_file_contents:
+        return json.load(credential_file_contents)
+
 
+@lru_cache(maxsize=None)
+def _build_credentials(credential_file, persist_token_cache):
+    """Builds the Service Principal credential of a credential file"""
 
-def get_credentials():
+    # azure.identity takes a few hundred milliseconds to import, commands
+    # that never authenticate should not pay for it
+    from azure.identity import ClientSecretCredential, \
+        TokenCachePersistenceOptions
+
+    credential_info = read_credential_info(credential_file)
+
+    kwargs = {}
+    if persist_token_cache:
+        kwargs['cache_persistence_options'] = TokenCachePersistenceOptions(
+            name='anf-sample', allow_unencrypted_storage=True)
+
+    credentials = ClientSecretCredential(
+        tenant_id=credential_info['tenantId'],
+        client_id=credential_info['clientId'],
+        client_secret=credential_info['clientSecret'],
+        **kwargs
+    )
+    return credentials, credential_info['subscriptionId']
+
+
+def get_credentials(persist_token_cache=False):
     """Gets the file system secured secret
 
     Gets the service principal credential file from a folder path defined the
-    AZURE_AUTH_LOCATION environment variable to perform authentication.
+    AZURE_AUTH_LOCATION environment variable to perform authentication. The
+    file is read once per process and the same credential object, with its
+    in memory access token cache, is returned on every call.
+
+    Args:
+        persist_token_cache (boolean): Optional. Persists access tokens to
+            the local token cache shared between runs, requires
+            msal-extensions, default is False
 
     Returns:
         ServicePrincipalCredentials: Returns the Service Principal Credential object
         string: Returns the subscription id associated by default to the service principal
     """
 
-    credential_file = os.environ.get('AZURE_AUTH_LOCATION')
+    return _build_credentials(os.environ.get('AZURE_AUTH_LOCATION'),
+                              persist_token_cache)
 
-    with open(credential_file) as credential_file_contents:
-        credential_info = json.load(credential_file_contents)
+
+def get_credentials_async():
+    """Gets the file system secured secret as an asyncio credential
+
+    Same as get_credentials() but returns a new credential from
+    azure.identity.aio, bound to the running event loop, to be used with the
+    azure.mgmt.*.aio clients.
+
+    Returns:
+        ClientSecretCredential: Returns the asyncio Service Principal
+            Credential object
+        string: Returns the subscription id associated by default to the
+            service principal
+    """
+
+    from azure.identity.aio import ClientSecretCredential as \
+        AsyncClientSecretCredential
+
+    credential_info = read_credential_info(
+        os.environ.get('AZURE_AUTH_LOCATION'))
 
     subscription_id = credential_info['subscriptionId']
 
-    credentials = ClientSecretCredential(
+    credentials = AsyncClientSecretCredential(
         tenant_id=credential_info['tenantId'],
         client_id=credential_info['clientId'],
         client_secret=credential_info['clientSecret']
@@ -56,21 +134,26 @@ def get_credentials():
     return credentials, subscription_id
 
 
-def console_output(message):
+def console_output(message, level=logging.INFO, **fields):
     """Outputs a string to the console
 
-    Outputs a string with date/time
+    Outputs a string with date/time. The record is queued to the
+    logging_utils writer thread, so the caller never blocks on stdout.
 
     Args:
         message (string): String value to be displayed
+        level (int): Optional. Logging level, INFO by default
+        **fields: Optional. Structured fields (resource_id, phase,
+            duration...) written when ANF_LOG_FORMAT=json
     """
-    print('{}: {}'.format(datetime.now(), message))
+    logging_utils.log(message, level, **fields)
 
 
 def get_bytes_in_tib(size):
     """Converts a value from bytes to TiB
 
-    This function converts a value in bytes into TiB
+    This function converts a value in bytes into TiB, with a single division
+    so it also converts whole NumPy arrays (see capacity_report.py)
 
     Args:
         size (long): Size in bytes
@@ -78,13 +161,14 @@ def get_bytes_in_tib(size):
     Returns:
         int: Returns value in TiB
     """
-    return size / 1024 / 1024 / 1024 / 1024
+    return size / BYTES_PER_TIB
 
 
 def get_tib_in_bytes(size):
     """Converts a value from TiB to bytes
 
-    This function converts a value in bytes into TiB
+    This function converts a value in TiB into bytes, with a single
+    multiplication so it also converts whole NumPy arrays
 
     Args:
         size (int): Size in TiB
@@ -92,108 +176,465 @@ def get_tib_in_bytes(size):
     Returns:
         long: Returns value in bytes
     """
-    return size * 1024 * 1024 * 1024 * 1024
+    return size * BYTES_PER_TIB
+
+
+def get_anf_resource_getter(client, resource_id):
+    """Builds a function that retrieves a specific anf resource
 
+    The resource id is parsed once and the returned function issues the GET
+    call matching the resource kind, so pollers don't need to parse the
+    resource id on every check.
 
-def wait_for_no_anf_resource(client, resource_id, interval_in_sec=10,
-                             retries=60):
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be retrieved
+
+    Returns:
+        function: Returns a function without arguments that performs the GET
+            call, or None if resource id is not an ANF resource
+    """
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+
+    if rid.kind == resource_uri_utils.KIND_SNAPSHOT:
+        return lambda: client.snapshots.get(
+            rid.resource_group, rid.account, rid.pool, rid.volume,
+            rid.snapshot)
+    if rid.kind == resource_uri_utils.KIND_VOLUME:
+        return lambda: client.volumes.get(
+            rid.resource_group, rid.account, rid.pool, rid.volume)
+    if rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        return lambda: client.pools.get(
+            rid.resource_group, rid.account, rid.pool)
+    if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+        return lambda: client.accounts.get(rid.resource_group, rid.account)
+    return None
+
+
+def get_anf_resource_deleter(client, resource_id):
+    """Builds a function that starts the deletion of a specific anf resource
+
+    Same as get_anf_resource_getter() but for the begin_delete call.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be deleted
+
+    Returns:
+        function: Returns a function that calls begin_delete, passing it its
+            keyword arguments (e.g. polling), and returns its poller, or None
+            if resource id is not an ANF resource
+    """
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+
+    if rid.kind == resource_uri_utils.KIND_SNAPSHOT:
+        return lambda **kwargs: client.snapshots.begin_delete(
+            rid.resource_group, rid.account, rid.pool, rid.volume,
+            rid.snapshot, **kwargs)
+    if rid.kind == resource_uri_utils.KIND_VOLUME:
+        return lambda **kwargs: client.volumes.begin_delete(
+            rid.resource_group, rid.account, rid.pool, rid.volume, **kwargs)
+    if rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        return lambda **kwargs: client.pools.begin_delete(
+            rid.resource_group, rid.account, rid.pool, **kwargs)
+    if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+        return lambda **kwargs: client.accounts.begin_delete(
+            rid.resource_group, rid.account, **kwargs)
+    return None
+
+
+WaitResult = namedtuple('WaitResult', ['succeeded', 'attempts', 'elapsed'])
+WaitResult.__doc__ = """Outcome of a wait function
+
+succeeded is True when the expected state was observed, False when the
+strategy ran out of attempts or reached its deadline, attempts is the number
+of checks performed and elapsed the wall-clock seconds spent waiting.
+"""
+
+
+class WaitStrategy:
+    """Exponential backoff with jitter used by the wait functions
+
+    The first check happens after initial_delay seconds (immediately by
+    default), then each interval is the previous one multiplied by
+    multiplier, capped at max_interval and randomized by +/- jitter (a
+    fraction of the interval). Waiting stops after max_attempts checks or
+    once deadline seconds have elapsed, whichever happens first; None
+    disables either limit.
+
+    Any object exposing a delays() generator and a deadline attribute can be
+    used as a wait strategy.
+    """
+
+    def __init__(self, initial_delay=0, interval=2, max_interval=30,
+                 multiplier=2, jitter=0.2, deadline=600, max_attempts=None):
+        self.initial_delay = initial_delay
+        self.interval = interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+
+    def delays(self):
+        """Yields the number of seconds to sleep before each check"""
+
+        attempt = 0
+        delay = self.initial_delay
+        interval = self.interval
+        while self.max_attempts is None or attempt < self.max_attempts:
+            if self.jitter and delay:
+                delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            yield delay
+            attempt += 1
+            delay = interval
+            interval = min(interval * self.multiplier, self.max_interval)
+
+
+def fixed_interval_strategy(interval_in_sec=10, retries=60):
+    """Builds the original fixed interval wait strategy
+
+    Args:
+        interval_in_sec (int): Interval used before and between checks
+        retries (int): Number of times a poll will be performed
+
+    Returns:
+        WaitStrategy: Returns a strategy without backoff, jitter or deadline
+    """
+
+    return WaitStrategy(initial_delay=interval_in_sec,
+                        interval=interval_in_sec,
+                        max_interval=interval_in_sec,
+                        multiplier=1,
+                        jitter=0,
+                        deadline=None,
+                        max_attempts=retries)
+
+
+# Default strategies per ANF resource kind, accounts and pools usually show
+# up (or disappear) within seconds while volumes and snapshots take longer.
+WAIT_STRATEGY_PRIORS = {
+    resource_uri_utils.KIND_ACCOUNT: WaitStrategy(interval=1, max_interval=10,
+                                                  deadline=300),
+    resource_uri_utils.KIND_CAPACITY_POOL: WaitStrategy(interval=2,
+                                                        max_interval=15,
+                                                        deadline=600),
+    resource_uri_utils.KIND_VOLUME: WaitStrategy(interval=5, max_interval=30,
+                                                 deadline=1800),
+    resource_uri_utils.KIND_SNAPSHOT: WaitStrategy(interval=2,
+                                                   max_interval=20,
+                                                   deadline=900),
+}
+
+DEFAULT_WAIT_STRATEGY = WaitStrategy()
+
+
+def get_wait_strategy(resource_id, interval_in_sec=None, retries=None,
+                      strategy=None):
+    """Resolves the wait strategy for a resource
+
+    An explicit strategy wins, then an explicit interval/retries pair (the
+    original fixed interval behavior), then the prior for the resource kind.
+
+    Args:
+        resource_id (string): Resource Id of the resource to be checked upon
+        interval_in_sec (int): Optional. Fixed interval used between checks
+        retries (int): Optional. Number of times a poll will be performed
+        strategy (WaitStrategy): Optional. Strategy to be used
+
+    Returns:
+        WaitStrategy: Returns the strategy to be used
+    """
+
+    if strategy is not None:
+        return strategy
+    if interval_in_sec is not None or retries is not None:
+        return fixed_interval_strategy(
+            10 if interval_in_sec is None else interval_in_sec,
+            60 if retries is None else retries)
+
+    kind = resource_uri_utils.parse_resource_id(resource_id).kind
+    return WAIT_STRATEGY_PRIORS.get(kind, DEFAULT_WAIT_STRATEGY)
+
+
+def _log_poll(attempts, elapsed):
+    """Logs an unsuccessful wait check, at DEBUG level as they are noisy"""
+
+    if logging_utils.LOGGER.isEnabledFor(logging.DEBUG):
+        console_output('\t\tCheck {} not satisfied after {:.1f}s'.format(
+            attempts, elapsed), logging.DEBUG, phase='poll',
+                       attempt=attempts, duration=elapsed)
+
+
+def wait_until(check, strategy, sleep=time.sleep, clock=time.monotonic):
+    """Polls a check function following a wait strategy
+
+    Args:
+        check (function): Function without arguments returning True once the
+            expected state is observed
+        strategy (WaitStrategy): Strategy defining delays and deadline
+        sleep (function): Optional. Function used to sleep, time.sleep by
+            default
+        clock (function): Optional. Monotonic clock, time.monotonic by
+            default
+
+    Returns:
+        WaitResult: Returns whether the wait succeeded or timed out
+    """
+
+    start = clock()
+    attempts = 0
+    for delay in strategy.delays():
+        if strategy.deadline is not None:
+            remaining = strategy.deadline - (clock() - start)
+            if remaining <= 0:
+                break
+            delay = min(delay, remaining)
+        if delay > 0:
+            sleep(delay)
+            tracing.record('sleep_time', delay)
+        attempts += 1
+        tracing.record('polls')
+        if check():
+            return WaitResult(True, attempts, clock() - start)
+        _log_poll(attempts, clock() - start)
+
+    return WaitResult(False, attempts, clock() - start)
+
+
+def anf_resource_exists(get_resource):
+    """Runs a GET function and reports whether the resource was found
+
+    Args:
+        get_resource (function): Function returned by get_anf_resource_getter
+
+    Returns:
+        boolean: Returns False if the GET call raised ResourceNotFoundError,
+            None if it was still throttled (429) after the SDK retries so
+            waiters keep waiting instead of failing
+    """
+
+    try:
+        get_resource()
+        return True
+    except ResourceNotFoundError:
+        return False
+    except HttpResponseError as ex:
+        if ex.status_code == 429:
+            return None
+        raise
+
+
+def wait_for_no_anf_resource(client, resource_id, interval_in_sec=None,
+                             retries=None, strategy=None, cache=None):
     """Waits for specific anf resource don't exist
 
     This function checks if a specific ANF resource that was recently delete
     stops existing. It breaks the wait if resource is not found anymore or
-    if polling reached out maximum retries.
+    if the wait strategy gives up. The first check happens right away unless
+    interval_in_sec/retries are given, which restores the original fixed
+    interval polling.
 
     Args:
         client (NetAppManagementClient): Azure Resource Provider
             Client designed to interact with ANF resources
         resource_id (string): Resource Id of the resource to be checked upon
-        interval_in_sec (int): Interval used between checks
-        retires (int): Number of times a poll will be performed
+        interval_in_sec (int): Optional. Fixed interval used between checks
+        retries (int): Optional. Number of times a poll will be performed
+        strategy (WaitStrategy): Optional. Strategy to be used, defaults to
+            the prior for the resource kind in WAIT_STRATEGY_PRIORS
+        cache (InventoryCache): Optional. Inventory cache answering the
+            wait without any GET call when it already knows the outcome and
+            recording the outcome otherwise
+
+    Returns:
+        WaitResult: Returns whether the resource is gone or the wait timed out
     """
 
-    for _ in range(0, retries):
-        time.sleep(interval_in_sec)
-        try:
-            if resource_uri_utils.is_anf_snapshot(resource_id):
-                client.snapshots.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id),
-                    resource_uri_utils.get_anf_snapshot(resource_id)
-                )
-            elif resource_uri_utils.is_anf_volume(resource_id):
-                client.volumes.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id)
-                )
-            elif resource_uri_utils.is_anf_capacity_pool(resource_id):
-                client.pools.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id)
-                )
-            elif resource_uri_utils.is_anf_account(resource_id):
-                client.accounts.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id)
-                )
-        except ResourceNotFoundError:
-            break
-
-
-def wait_for_anf_resource(client, resource_id, interval_in_sec=10, retries=60):
+    get_resource = get_anf_resource_getter(client, resource_id)
+    if get_resource is None:
+        return WaitResult(False, 0, 0.0)
+
+    if cache is not None and cache.exists(resource_id) is False:
+        return WaitResult(True, 0, 0.0)
+
+    wait_result = wait_until(
+        lambda: anf_resource_exists(get_resource) is False,
+        get_wait_strategy(resource_id, interval_in_sec, retries, strategy))
+
+    if cache is not None and wait_result.succeeded:
+        cache.invalidate(resource_id)
+        cache.put(resource_id, exists=False)
+    return wait_result
+
+
+def wait_for_anf_resource(client, resource_id, interval_in_sec=None,
+                          retries=None, strategy=None, cache=None):
     """Waits for specific anf resource start existing
 
     This function checks if a specific ANF resource that was recently created
     is already being able to be polled. It breaks the wait if resource is found
-    or if polling reached out maximum retries.
+    or if the wait strategy gives up. The first check happens right away
+    unless interval_in_sec/retries are given, which restores the original
+    fixed interval polling.
 
     Args:
         client (NetAppManagementClient): Azure Resource Provider
             Client designed to interact with ANF resources
         resource_id (string): Resource Id of the resource to be checked upon
-        interval_in_sec (int): Interval used between checks
-        retires (int): Number of times a poll will be performed
+        interval_in_sec (int): Optional. Fixed interval used between checks
+        retries (int): Optional. Number of times a poll will be performed
+        strategy (WaitStrategy): Optional. Strategy to be used, defaults to
+            the prior for the resource kind in WAIT_STRATEGY_PRIORS
+        cache (InventoryCache): Optional. Inventory cache answering the
+            wait without any GET call when it already knows the outcome and
+            recording the outcome otherwise
+
+    Returns:
+        WaitResult: Returns whether the resource was found or the wait timed
+            out
     """
 
-    for _ in range(0, retries):
-        time.sleep(interval_in_sec)
-        try:
-            if resource_uri_utils.is_anf_snapshot(resource_id):
-                client.snapshots.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id),
-                    resource_uri_utils.get_anf_snapshot(resource_id)
-                )
-            elif resource_uri_utils.is_anf_volume(resource_id):
-                client.volumes.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id),
-                    resource_uri_utils.get_anf_volume(resource_id)
-                )
-            elif resource_uri_utils.is_anf_capacity_pool(resource_id):
-                client.pools.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id),
-                    resource_uri_utils.get_anf_capacity_pool(resource_id)
-                )
-            elif resource_uri_utils.is_anf_account(resource_id):
-                client.accounts.get(
-                    resource_uri_utils.get_resource_group(resource_id),
-                    resource_uri_utils.get_anf_account(resource_id)
-                )
-            break
-        except ResourceNotFoundError:
-            pass
-
-
-def resource_exists(resource_client, resource_id, api_version):
+    get_resource = get_anf_resource_getter(client, resource_id)
+    if get_resource is None:
+        return WaitResult(False, 0, 0.0)
+
+    if cache is not None and cache.exists(resource_id):
+        return WaitResult(True, 0, 0.0)
+
+    wait_result = wait_until(lambda: anf_resource_exists(get_resource),
+                             get_wait_strategy(resource_id, interval_in_sec,
+                                               retries, strategy))
+
+    if cache is not None and wait_result.succeeded:
+        cache.put(resource_id)
+    return wait_result
+
+
+async def wait_until_async(check, strategy, clock=time.monotonic):
+    """Polls a coroutine check function following a wait strategy
+
+    asyncio counterpart of wait_until(), sleeping with asyncio.sleep so many
+    waits can share one event loop.
+
+    Args:
+        check (function): Coroutine function without arguments returning True
+            once the expected state is observed
+        strategy (WaitStrategy): Strategy defining delays and deadline
+        clock (function): Optional. Monotonic clock, time.monotonic by
+            default
+
+    Returns:
+        WaitResult: Returns whether the wait succeeded or timed out
+    """
+
+    start = clock()
+    attempts = 0
+    for delay in strategy.delays():
+        if strategy.deadline is not None:
+            remaining = strategy.deadline - (clock() - start)
+            if remaining <= 0:
+                break
+            delay = min(delay, remaining)
+        if delay > 0:
+            await asyncio.sleep(delay)
+            tracing.record('sleep_time', delay)
+        attempts += 1
+        tracing.record('polls')
+        if await check():
+            return WaitResult(True, attempts, clock() - start)
+        _log_poll(attempts, clock() - start)
+
+    return WaitResult(False, attempts, clock() - start)
+
+
+async def anf_resource_exists_async(get_resource):
+    """asyncio counterpart of anf_resource_exists()
+
+    Args:
+        get_resource (function): Function returned by get_anf_resource_getter
+            for an azure.mgmt.netapp.aio client
+
+    Returns:
+        boolean: Returns False if the GET call raised ResourceNotFoundError,
+            None if it was still throttled (429) after the SDK retries
+    """
+
+    try:
+        await get_resource()
+        return True
+    except ResourceNotFoundError:
+        return False
+    except HttpResponseError as ex:
+        if ex.status_code == 429:
+            return None
+        raise
+
+
+async def wait_for_no_anf_resource_async(client, resource_id,
+                                         interval_in_sec=None, retries=None,
+                                         strategy=None):
+    """asyncio counterpart of wait_for_no_anf_resource()
+
+    Args:
+        client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure Resource
+            Provider asyncio Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be checked upon
+        interval_in_sec (int): Optional. Fixed interval used between checks
+        retries (int): Optional. Number of times a poll will be performed
+        strategy (WaitStrategy): Optional. Strategy to be used, defaults to
+            the prior for the resource kind in WAIT_STRATEGY_PRIORS
+
+    Returns:
+        WaitResult: Returns whether the resource is gone or the wait timed out
+    """
+
+    get_resource = get_anf_resource_getter(client, resource_id)
+    if get_resource is None:
+        return WaitResult(False, 0, 0.0)
+
+    async def check():
+        return await anf_resource_exists_async(get_resource) is False
+
+    return await wait_until_async(check,
+                                  get_wait_strategy(resource_id,
+                                                    interval_in_sec, retries,
+                                                    strategy))
+
+
+async def wait_for_anf_resource_async(client, resource_id,
+                                      interval_in_sec=None, retries=None,
+                                      strategy=None):
+    """asyncio counterpart of wait_for_anf_resource()
+
+    Args:
+        client (azure.mgmt.netapp.aio.NetAppManagementClient): Azure Resource
+            Provider asyncio Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be checked upon
+        interval_in_sec (int): Optional. Fixed interval used between checks
+        retries (int): Optional. Number of times a poll will be performed
+        strategy (WaitStrategy): Optional. Strategy to be used, defaults to
+            the prior for the resource kind in WAIT_STRATEGY_PRIORS
+
+    Returns:
+        WaitResult: Returns whether the resource was found or the wait timed
+            out
+    """
+
+    get_resource = get_anf_resource_getter(client, resource_id)
+    if get_resource is None:
+        return WaitResult(False, 0, 0.0)
+
+    return await wait_until_async(
+        lambda: anf_resource_exists_async(get_resource),
+        get_wait_strategy(resource_id, interval_in_sec, retries, strategy))
+
+
+def resource_exists(resource_client, resource_id, api_version, cache=None):
     """Generic function to check for existing Azure function
 
     This function checks if a specific Azure resource exists based on its
@@ -203,16 +644,118 @@ def resource_exists(resource_client, resource_id, api_version):
         client (ResourceManagementClient): Azure Resource Manager Client
         resource_id (string): Resource Id of the resource to be checked upon
         api_version (string): Resource provider specific API version
+        cache (InventoryCache): Optional. Inventory cache answering without
+            any call when it holds a fresh entry for the resource
+    """
+
+    if cache is not None:
+        exists = cache.exists(resource_id)
+        if exists is not None:
+            return exists
+
+    exists = check_resource_existence(resource_client, resource_id,
+                                      api_version)
+    if cache is not None:
+        cache.put(resource_id, exists=exists)
+    return exists
+
+
+def get_head_support_key(resource_id, api_version):
+    """Gets the key under which HEAD support of a resource is remembered
+
+    HEAD support depends on the resource provider, resource type and API
+    version, not on the resource itself.
+
+    Args:
+        resource_id (string): Resource Id of the resource to be checked upon
+        api_version (string): Resource provider specific API version
+
+    Returns:
+        tuple: Returns the lower case resource type, e.g.
+            microsoft.network/virtualnetworks/subnets, and the API version
+    """
+
+    segments = resource_id.strip().strip('/').lower().split('/')
+    if 'providers' not in segments:
+        return None, api_version
+    position = len(segments) - 1 - segments[::-1].index('providers')
+    types = segments[position + 1:position + 2] + segments[position + 2::2]
+    return '/'.join(types), api_version
+
+
+def is_head_supported(resource_id, api_version):
+    """Tells if existence checks of a resource still try HEAD first
+
+    Args:
+        resource_id (string): Resource Id of the resource to be checked upon
+        api_version (string): Resource provider specific API version
+
+    Returns:
+        boolean: Returns False once a resource of the same type answered 405
+            to HEAD with that API version
     """
 
+    return get_head_support_key(resource_id, api_version) not in \
+        _HEAD_UNSUPPORTED
+
+
+def check_resource_existence(resource_client, resource_id, api_version):
+    """Checks for an existing Azure resource without any cache
+
+    HEAD is tried first, resource types and API versions answering 405 are
+    remembered so the next checks of the process only send the GET call.
+
+    Args:
+        client (ResourceManagementClient): Azure Resource Manager Client
+        resource_id (string): Resource Id of the resource to be checked upon
+        api_version (string): Resource provider specific API version
+    """
+
+    key = get_head_support_key(resource_id, api_version)
+    if key not in _HEAD_UNSUPPORTED:
+        try:
+            return resource_client.resources.check_existence_by_id(
+                resource_id, api_version)
+        except HttpResponseError as e:
+            if e.status_code != 405: # If not 405, not expected
+                raise
+            # HEAD not supported
+            _HEAD_UNSUPPORTED.add(key)
+
+    try:
+        resource_client.resources.get_by_id(resource_id, api_version)
+        return True
+    except HttpResponseError as e:
+        if e.status_code == 404:
+            return False
+        raise
+
+
+async def resource_exists_async(resource_client, resource_id, api_version):
+    """asyncio counterpart of resource_exists()
+
+    Args:
+        client (azure.mgmt.resource.resources.aio.ResourceManagementClient):
+            Azure Resource Manager asyncio Client
+        resource_id (string): Resource Id of the resource to be checked upon
+        api_version (string): Resource provider specific API version
+    """
+
+    key = get_head_support_key(resource_id, api_version)
+    if key not in _HEAD_UNSUPPORTED:
+        try:
+            return await resource_client.resources.check_existence_by_id(
+                resource_id, api_version)
+        except HttpResponseError as e:
+            if e.status_code != 405: # If not 405, not expected
+                raise
+            # HEAD not supported
+            _HEAD_UNSUPPORTED.add(key)
+
     try:
-        return resource_client.resources.check_existence_by_id(resource_id, api_version)
+        await resource_client.resources.get_by_id(resource_id, api_version)
+        return True
     except HttpResponseError as e:
-        if e.status_code == 405: # HEAD not supported
-            try:
-                resource_client.resources.get_by_id(resource_id, api_version)
-                return True
-            except HttpResponseError as ie:
-                if ie.status_code == 404:
-                    return False
-        raise # If not 405 or 404, not expected
+        if e.status_code == 404:
+            return False
+        raise
@@ -0,0 +1,265 @@
+# status_poller.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""status_poller.py code sample
+
+Coalesced status polling: pending waits are grouped by parent resource
+(resource group for accounts, account for capacity pools, capacity pool for
+volumes and volume for snapshots) and a single list call per parent and tick
+resolves every wait of the group, instead of one GET per waited resource.
+
+Usage:
+with CoalescedPoller(anf_client) as poller:
+    futures = [poller.register(volume.id) for volume in volumes]
+    results = [future.result() for future in futures]
+
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from azure.core.exceptions import ResourceNotFoundError
+import sample_utils
+import resource_uri_utils
+
+# Default seconds between two list calls for the same parent
+DEFAULT_INTERVAL = 5
+
+# Default seconds after which a wait gives up
+DEFAULT_TIMEOUT = 1800
+
+
+class _PendingWait:
+    """One registered wait"""
+
+    __slots__ = ('resource_key', 'exists', 'deadline', 'started', 'attempts',
+                 'future')
+
+    def __init__(self, resource_key, exists, deadline, started):
+        self.resource_key = resource_key
+        self.exists = exists
+        self.deadline = deadline
+        self.started = started
+        self.attempts = 0
+        self.future = Future()
+
+
+def get_parent_lister(client, resource_id):
+    """Builds a function listing the siblings of an ANF resource
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_id (string): Resource Id of the resource to be waited upon
+
+    Returns:
+        string: Returns the lower case id of the parent (the resource group
+            id for accounts)
+        function: Returns a function without arguments returning the
+            resources under that parent
+    """
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+
+    if rid.kind == resource_uri_utils.KIND_ACCOUNT:
+        parent_id = '/subscriptions/{}/resourceGroups/{}'.format(
+            rid.subscription, rid.resource_group)
+        lister = lambda: client.accounts.list(rid.resource_group)
+    elif rid.kind == resource_uri_utils.KIND_CAPACITY_POOL:
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        lister = lambda: client.pools.list(rid.resource_group, rid.account)
+    elif rid.kind == resource_uri_utils.KIND_VOLUME:
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        lister = lambda: client.volumes.list(rid.resource_group, rid.account,
+                                             rid.pool)
+    elif rid.kind == resource_uri_utils.KIND_SNAPSHOT:
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        lister = lambda: client.snapshots.list(rid.resource_group,
+                                               rid.account, rid.pool,
+                                               rid.volume)
+    else:
+        raise ValueError('Not an ANF resource id: {}'.format(resource_id))
+
+    return parent_id.lower(), lister
+
+
+class CoalescedPoller:
+    """Shared background poller resolving waits with one list per parent
+
+    register() returns a concurrent.futures.Future resolved with a
+    sample_utils.WaitResult once the resource shows up (or disappears, when
+    waiting for a deletion) or its timeout expires. A background thread
+    issues at most one list call per parent every interval seconds, the
+    first one right after the first wait of a parent is registered.
+    """
+
+    def __init__(self, client, interval=DEFAULT_INTERVAL,
+                 clock=time.monotonic):
+        self.client = client
+        self.interval = interval
+        self._clock = clock
+        self._groups = {}
+        self._listers = {}
+        self._next_poll = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.list_calls = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """Starts the background polling thread"""
+
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run,
+                                            name='anf-status-poller',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the background polling thread
+
+        Waits still pending are resolved as timed out.
+        """
+
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._lock:
+            groups, self._groups = self._groups, {}
+            self._listers.clear()
+            self._next_poll.clear()
+        for waits in groups.values():
+            for pending in waits:
+                self._resolve(pending, False)
+
+    def register(self, resource_id, exists=True, timeout=DEFAULT_TIMEOUT):
+        """Registers a wait for a resource
+
+        Args:
+            resource_id (string): Resource Id of the resource to be waited
+                upon
+            exists (boolean): Optional. True to wait for the resource to
+                exist, False to wait for it to be gone, default is True
+            timeout (int): Optional. Seconds after which the wait gives up
+
+        Returns:
+            Future: Returns a future resolved with a WaitResult
+        """
+
+        parent_key, lister = get_parent_lister(self.client, resource_id)
+        now = self._clock()
+        pending = _PendingWait(resource_id.strip().rstrip('/').lower(),
+                               exists,
+                               None if timeout is None else now + timeout,
+                               now)
+
+        with self._lock:
+            if parent_key not in self._groups:
+                self._groups[parent_key] = []
+                self._listers[parent_key] = lister
+                self._next_poll[parent_key] = now
+            self._groups[parent_key].append(pending)
+        self._wakeup.set()
+
+        return pending.future
+
+    def wait_for_anf_resource(self, resource_id, timeout=DEFAULT_TIMEOUT):
+        """Blocks until a resource exists, see register()"""
+
+        return self.register(resource_id, True, timeout).result()
+
+    def wait_for_no_anf_resource(self, resource_id, timeout=DEFAULT_TIMEOUT):
+        """Blocks until a resource is gone, see register()"""
+
+        return self.register(resource_id, False, timeout).result()
+
+    def poll_once(self):
+        """Lists every parent due for a poll and resolves its waits
+
+        Returns:
+            float: Returns the seconds until the next parent is due, None if
+                there are no pending waits
+        """
+
+        now = self._clock()
+        with self._lock:
+            due = [(key, self._listers[key]) for key, next_poll
+                   in self._next_poll.items() if next_poll <= now]
+
+        for parent_key, lister in due:
+            try:
+                self.list_calls += 1
+                resource_keys = {resource.id.lower() for resource in lister()}
+            except ResourceNotFoundError:
+                resource_keys = set()
+            except Exception: # pylint: disable=broad-except
+                # Transient list failures are retried on the next tick
+                resource_keys = None
+            self._resolve_group(parent_key, resource_keys)
+
+        with self._lock:
+            if not self._next_poll:
+                return None
+            return max(0, min(self._next_poll.values()) - self._clock())
+
+    def _resolve_group(self, parent_key, resource_keys):
+        """Resolves the waits of a parent from its listed children"""
+
+        now = self._clock()
+        resolved = []
+        with self._lock:
+            remaining = []
+            for pending in self._groups.get(parent_key, []):
+                if resource_keys is not None:
+                    pending.attempts += 1
+                    if (pending.resource_key in resource_keys) == \
+                            pending.exists:
+                        resolved.append((pending, True))
+                        continue
+                if pending.deadline is not None and now >= pending.deadline:
+                    resolved.append((pending, False))
+                    continue
+                remaining.append(pending)
+
+            if remaining:
+                self._groups[parent_key] = remaining
+                self._next_poll[parent_key] = now + self.interval
+            else:
+                self._groups.pop(parent_key, None)
+                self._listers.pop(parent_key, None)
+                self._next_poll.pop(parent_key, None)
+
+        for pending, succeeded in resolved:
+            self._resolve(pending, succeeded)
+
+    def _resolve(self, pending, succeeded):
+        """Completes the future of a wait"""
+
+        if not pending.future.done():
+            pending.future.set_result(sample_utils.WaitResult(
+                succeeded, pending.attempts,
+                self._clock() - pending.started))
+
+    def _run(self):
+        """Background thread loop"""
+
+        while not self._stopped:
+            delay = self.poll_once()
+            self._wakeup.wait(self.interval if delay is None else delay)
+            self._wakeup.clear()
@@ -0,0 +1,274 @@
+# streaming_inventory.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""streaming_inventory.py code sample
+
+Memory-compact streaming listing of ANF volumes: list responses are consumed
+one page at a time and every Volume model is projected into a small
+VolumeRecord holding only its id, quota, service level, provisioning state
+and throughput, so listing tens of thousands of volumes does not keep their
+export policies, mount targets and tags in memory.
+
+Notes:
+Pages are yielded lazily by generators. While the caller processes a page,
+the next one is fetched, deserialized and projected by a background thread,
+so at most two pages of models are alive at any time and the list calls
+overlap with the processing.
+
+Usage:
+python streaming_inventory.py --resource-group anf01-rg [--account account01]
+
+for page in stream_volume_pages(anf_client, 'anf01-rg', 'account01',
+                                'pool01'):
+    for record in page:
+        print(record.id, record.usage_threshold)
+
+"""
+
+import argparse
+import csv
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import resource_uri_utils
+
+# Page size used to split list results not exposing by_page()
+DEFAULT_PAGE_SIZE = 100
+
+_END = object()
+
+CSV_FIELDS = ('id', 'usage_threshold', 'service_level', 'provisioning_state',
+              'throughput_mibps')
+
+
+class VolumeRecord:
+    """Fields of a listed volume needed by inventories and reports
+
+    usage_threshold is the quota in bytes and throughput_mibps the throughput
+    set with manual QoS, None with automatic QoS.
+    """
+
+    __slots__ = ('id', 'usage_threshold', 'service_level',
+                 'provisioning_state', 'throughput_mibps')
+
+    def __init__(self, resource_id, usage_threshold, service_level=None,
+                 provisioning_state=None, throughput_mibps=None):
+        self.id = resource_id
+        self.usage_threshold = usage_threshold
+        self.service_level = service_level
+        self.provisioning_state = provisioning_state
+        self.throughput_mibps = throughput_mibps
+
+    @classmethod
+    def from_volume(cls, volume):
+        """Projects a Volume model, or a resource body dict, into a record
+
+        Args:
+            volume (object): Volume returned by volumes.list() or
+                volumes.get()
+
+        Returns:
+            VolumeRecord: Returns the record
+        """
+
+        if isinstance(volume, dict):
+            properties = volume.get('properties', volume)
+            return cls(volume['id'], properties.get('usageThreshold'),
+                       properties.get('serviceLevel'),
+                       properties.get('provisioningState'),
+                       properties.get('throughputMibps'))
+        return cls(volume.id, volume.usage_threshold, volume.service_level,
+                   volume.provisioning_state, volume.throughput_mibps)
+
+    def __repr__(self):
+        return 'VolumeRecord({!r}, {!r}, {!r}, {!r}, {!r})'.format(
+            self.id, self.usage_threshold, self.service_level,
+            self.provisioning_state, self.throughput_mibps)
+
+
+def iter_pages(items, page_size=DEFAULT_PAGE_SIZE):
+    """Splits a list result into pages without reading it ahead
+
+    Args:
+        items (iterable): ItemPaged returned by a list call, or any iterable
+        page_size (int): Optional. Page size of iterables not exposing
+            by_page()
+
+    Returns:
+        iterator: Returns an iterator of pages, each page an iterable of
+            items
+    """
+
+    if hasattr(items, 'by_page'):
+        return items.by_page()
+
+    iterator = iter(items)
+    return iter(lambda: list(islice(iterator, page_size)), [])
+
+
+def prefetch_pages(pages, project=None):
+    """Yields pages while the next one is fetched in the background
+
+    Args:
+        pages (iterator): Iterator of pages, fetching a page on next()
+        project (function): Optional. Function applied to every item of a
+            page by the background thread, e.g. VolumeRecord.from_volume
+
+    Yields:
+        list: Yields the items of each page, projected when project is set
+    """
+
+    pages = iter(pages)
+
+    def fetch():
+        page = next(pages, _END)
+        if page is _END:
+            return page
+        return [project(item) for item in page] if project else list(page)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch)
+        while True:
+            page = future.result()
+            if page is _END:
+                return
+            # The next page is on its way while this one is processed
+            future = executor.submit(fetch)
+            yield page
+
+
+def stream_volume_pages(client, resource_group_name, anf_account_name,
+                        capacitypool_name, prefetch=True):
+    """Lists the volumes of a capacity pool one page of records at a time
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group of the account
+        anf_account_name (string): Account holding the capacity pool
+        capacitypool_name (string): Capacity pool holding the volumes
+        prefetch (boolean): Optional. Fetches the next page while the current
+            one is processed, default is True
+
+    Yields:
+        list: Yields the VolumeRecord entries of each page
+    """
+
+    pages = iter_pages(client.volumes.list(
+        resource_group_name, anf_account_name, capacitypool_name))
+    if prefetch:
+        yield from prefetch_pages(pages, VolumeRecord.from_volume)
+        return
+    for page in pages:
+        yield [VolumeRecord.from_volume(volume) for volume in page]
+
+
+def stream_volumes(client, resource_group_name, anf_account_name,
+                   capacitypool_name, prefetch=True):
+    """Lists the volumes of a capacity pool as records
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group of the account
+        anf_account_name (string): Account holding the capacity pool
+        capacitypool_name (string): Capacity pool holding the volumes
+        prefetch (boolean): Optional. Fetches the next page while the current
+            one is processed, default is True
+
+    Yields:
+        VolumeRecord: Yields one record per volume
+    """
+
+    for page in stream_volume_pages(client, resource_group_name,
+                                    anf_account_name, capacitypool_name,
+                                    prefetch):
+        yield from page
+
+
+def stream_resource_group_volumes(client, resource_group_name,
+                                  account_names=None, prefetch=True):
+    """Lists the volumes of every capacity pool of a resource group
+
+    Pools are listed one after the other, so memory use is bounded by two
+    pages of volumes whatever the size of the inventory.
+
+    Args:
+        client (NetAppManagementClient): Azure Resource Provider
+            Client designed to interact with ANF resources
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Optional. Accounts to be listed, all the
+            accounts of the resource group by default
+        prefetch (boolean): Optional. Fetches the next page while the current
+            one is processed, default is True
+
+    Yields:
+        VolumeRecord: Yields one record per volume
+    """
+
+    if account_names is not None:
+        account_names = {name.lower() for name in account_names}
+
+    for account in client.accounts.list(resource_group_name):
+        account_name = resource_uri_utils.get_anf_account(account.id)
+        if account_names is not None and \
+                account_name.lower() not in account_names:
+            continue
+        for pool in client.pools.list(resource_group_name, account_name):
+            yield from stream_volumes(
+                client, resource_group_name, account_name,
+                resource_uri_utils.get_anf_capacity_pool(pool.id), prefetch)
+
+
+def write_csv(records, output=None):
+    """Writes volume records as CSV rows while they are listed
+
+    Args:
+        records (iterable): VolumeRecord entries
+        output (file): Optional. Text file, stdout by default
+
+    Returns:
+        int: Returns the number of rows written
+    """
+
+    writer = csv.writer(output or sys.stdout)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow([getattr(record, field) for field in CSV_FIELDS])
+        count += 1
+    return count
+
+
+def run(resource_group_name, account_names=None, output=None):
+    """Streams the volumes of a resource group of the credentials subscription
+
+    Args:
+        resource_group_name (string): Resource group holding the accounts
+        account_names (iterable): Optional. Accounts to be listed
+        output (file): Optional. Text file of the CSV rows, stdout by default
+
+    Returns:
+        int: Returns the number of volumes listed
+    """
+
+    import client_factory
+
+    anf_client = client_factory.get_default_factory().netapp_client()
+    return write_csv(stream_resource_group_volumes(
+        anf_client, resource_group_name, account_names), output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resource-group', required=True,
+                        help='resource group holding the accounts')
+    parser.add_argument('--account', action='append',
+                        help='account to be listed, all by default')
+    arguments = parser.parse_args()
+
+    run(arguments.resource_group, arguments.account)
@@ -0,0 +1,223 @@
+# subnet_prevalidation.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""subnet_prevalidation.py code sample
+
+Subnet prevalidation stage: the subnets of a deployment, or of a whole batch
+of deployments, are deduplicated and checked concurrently before any ANF
+resource is created, verifying that each subnet exists and is delegated to
+Microsoft.NetApp/volumes. Results are kept for the rest of the run.
+
+Notes:
+With delegation checks, one GET of the subnet answers both questions. Without
+them the existence check tries HEAD first and, since ARM answers 405 to HEAD
+for subnets, sample_utils remembers the resource types and API versions not
+supporting HEAD so later checks skip straight to GET.
+
+Usage:
+validator = SubnetValidator(resources_client, '2018-11-01')
+checks = validator.validate(spec.subnet_id for spec in specs)
+invalid = [check for check in checks.values() if not check.valid]
+
+"""
+
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from azure.core.exceptions import HttpResponseError
+import sample_utils
+
+# Service a subnet needs to be delegated to in order to host ANF volumes
+NETAPP_DELEGATION = 'Microsoft.NetApp/volumes'
+
+# Default maximum number of subnets checked at the same time
+DEFAULT_MAX_WORKERS = 16
+
+
+class SubnetCheck(namedtuple('_SubnetCheckBase', ['subnet_id', 'exists',
+                                                  'delegated', 'error'])):
+    """Outcome of the prevalidation of one subnet
+
+    delegated is None when delegations were not checked or the subnet does
+    not exist, error is the exception raised by an unexpected failure of the
+    check (None otherwise).
+    """
+
+    __slots__ = ()
+
+    @property
+    def valid(self):
+        """boolean: True when the subnet can host ANF volumes"""
+        return self.error is None and self.exists and \
+            self.delegated is not False
+
+    @property
+    def reason(self):
+        """string: Why the subnet is not valid, None when it is valid"""
+        if self.error is not None:
+            return 'Subnet {} could not be checked. Error details: {}'.format(
+                self.subnet_id, self.error)
+        if not self.exists:
+            return 'Subnet {} not found'.format(self.subnet_id)
+        if self.delegated is False:
+            return 'Subnet {} is not delegated to {}'.format(
+                self.subnet_id, NETAPP_DELEGATION)
+        return None
+
+
+def is_delegated_to_netapp(subnet):
+    """Checks the delegations of a subnet
+
+    Args:
+        subnet (object): GenericResource returned by resources.get_by_id(),
+            or the subnet body as a dict
+
+    Returns:
+        boolean: Returns True when one delegation is Microsoft.NetApp/volumes
+    """
+
+    if isinstance(subnet, dict):
+        properties = subnet.get('properties')
+    else:
+        properties = subnet.properties
+    for delegation in (properties or {}).get('delegations') or ():
+        service_name = (delegation.get('properties') or {}).get(
+            'serviceName') or delegation.get('serviceName') or ''
+        if service_name.lower() == NETAPP_DELEGATION.lower():
+            return True
+    return False
+
+
+def check_subnet(resource_client, subnet_id, api_version,
+                 check_delegation=True):
+    """Checks that a subnet exists and is delegated to ANF volumes
+
+    Args:
+        resource_client (ResourceManagementClient): Azure Resource Manager
+            Client
+        subnet_id (string): Resource id of the subnet
+        api_version (string): Microsoft.Network API version of subnets
+        check_delegation (boolean): Optional. Also checks the delegation,
+            default is True
+
+    Returns:
+        SubnetCheck: Returns the outcome, unexpected errors are recorded in
+            it rather than raised
+    """
+
+    try:
+        if not check_delegation:
+            exists = sample_utils.check_resource_existence(
+                resource_client, subnet_id, api_version)
+            return SubnetCheck(subnet_id, exists, None, None)
+        try:
+            subnet = resource_client.resources.get_by_id(subnet_id,
+                                                         api_version)
+        except HttpResponseError as ex:
+            if ex.status_code == 404:
+                return SubnetCheck(subnet_id, False, None, None)
+            raise
+        return SubnetCheck(subnet_id, True, is_delegated_to_netapp(subnet),
+                           None)
+    except Exception as ex: # pylint: disable=broad-except
+        return SubnetCheck(subnet_id, None, None, ex)
+
+
+class SubnetValidator:
+    """Checks subnets once per run, concurrently and without duplicates
+
+    Results are cached by lower case subnet id for the lifetime of the
+    validator, a subnet being checked by one caller is awaited by the others
+    instead of being checked twice. Checks that failed with an unexpected
+    error are not cached.
+    """
+
+    def __init__(self, resource_client, api_version, check_delegation=True,
+                 max_workers=DEFAULT_MAX_WORKERS):
+        self.resource_client = resource_client
+        self.api_version = api_version
+        self.check_delegation = check_delegation
+        self.max_workers = max_workers
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._checks)
+
+    def _claim(self, subnet_id):
+        """Gets the future of a subnet, True when the caller has to check it"""
+
+        key = subnet_id.strip().rstrip('/').lower()
+        with self._lock:
+            future = self._checks.get(key)
+            if future is not None:
+                return key, future, False
+            future = self._checks[key] = Future()
+            return key, future, True
+
+    def _run(self, key, future, subnet_id):
+        result = check_subnet(self.resource_client, subnet_id,
+                              self.api_version, self.check_delegation)
+        if result.error is not None:
+            with self._lock:
+                del self._checks[key]
+        future.set_result(result)
+        return result
+
+    def check(self, subnet_id):
+        """Checks one subnet, answered from the cache when already checked
+
+        Args:
+            subnet_id (string): Resource id of the subnet
+
+        Returns:
+            SubnetCheck: Returns the outcome
+        """
+
+        key, future, owner = self._claim(subnet_id)
+        if owner:
+            return self._run(key, future, subnet_id)
+        return future.result()
+
+    def validate(self, subnet_ids):
+        """Checks many subnets concurrently
+
+        Args:
+            subnet_ids (iterable): Subnet resource ids, duplicates are only
+                checked once
+
+        Returns:
+            dict: Returns subnet id -> SubnetCheck, one entry per distinct
+                subnet id given
+        """
+
+        futures = {}
+        to_run = []
+        for subnet_id in subnet_ids:
+            if subnet_id in futures:
+                continue
+            key, future, owner = self._claim(subnet_id)
+            futures[subnet_id] = future
+            if owner:
+                to_run.append((key, future, subnet_id))
+
+        if len(to_run) == 1:
+            self._run(*to_run[0])
+        elif to_run:
+            with ThreadPoolExecutor(max_workers=max(1, min(
+                    self.max_workers, len(to_run)))) as executor:
+                for arguments in to_run:
+                    executor.submit(self._run, *arguments)
+
+        return {subnet_id: future.result()
+                for subnet_id, future in futures.items()}
+
+    def clear(self):
+        """Forgets every result"""
+
+        with self._lock:
+            self._checks.clear()
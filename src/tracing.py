@@ -0,0 +1,312 @@
+# tracing.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""tracing.py code sample
+
+Per-phase timing instrumentation: span() measures a phase of a provisioning
+run together with the number of ARM calls, retries, wait polls and the time
+spent sleeping inside it, and finished spans are handed to the configured
+exporters (JSON lines file, OpenTelemetry).
+
+Notes:
+ARM calls and retries are counted by the pipeline policies returned by
+get_client_policies(), which ClientFactory adds to every client. Setting the
+ANF_TRACE_FILE environment variable enables a JSON lines exporter writing to
+that file.
+
+Usage:
+with tracing.span('create_volume', volume=volume_name):
+    ...
+
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+COUNTERS = ('arm_calls', 'retries', 'polls', 'sleep_time')
+
+# Response headers of long running operations pointing to status URLs
+LRO_HEADERS = ('azure-asyncoperation', 'location')
+
+# Maximum number of operation URLs remembered by ArmCallCounterPolicy
+LRO_SPANS_SIZE = 1024
+
+_current_span = contextvars.ContextVar('anf_current_span', default=None)
+_exporters = []
+_exporters_lock = threading.Lock()
+
+
+class Span:
+    """One measured phase
+
+    Counters of a span include the ones of its child spans.
+    """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent', 'attributes',
+                 'start_time', 'duration', 'counters', 'error', '_lock',
+                 '_start_clock')
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.duration = None
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.error = None
+        self._lock = threading.Lock()
+        self._start_clock = time.perf_counter()
+
+    def add(self, counter, value=1):
+        """Adds a value to a counter of this span and its ancestors"""
+
+        current = self
+        while current is not None:
+            with current._lock: # pylint: disable=protected-access
+                current.counters[counter] += value
+            current = current.parent
+
+    def end(self):
+        """Sets the span duration"""
+
+        self.duration = time.perf_counter() - self._start_clock
+
+    def as_dict(self):
+        """dict: JSON serializable representation of the span"""
+        return {'name': self.name,
+                'traceId': self.trace_id,
+                'spanId': self.span_id,
+                'parentId': self.parent.span_id if self.parent else None,
+                'start': self.start_time,
+                'duration': self.duration,
+                'attributes': self.attributes,
+                'counters': dict(self.counters),
+                'error': self.error}
+
+
+def get_current_span():
+    """Gets the span of the running phase
+
+    Returns:
+        Span: Returns the innermost open span, None if there is none
+    """
+
+    return _current_span.get()
+
+
+def record(counter, value=1):
+    """Adds a value to a counter of the current span, if any
+
+    Args:
+        counter (string): One of COUNTERS
+        value (number): Optional. Value to be added, default is 1
+    """
+
+    current = _current_span.get()
+    if current is not None:
+        current.add(counter, value)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Measures a phase
+
+    Spans nest following the execution context, threads started with a
+    copy of the context (contextvars.copy_context()) keep the parent span.
+
+    Args:
+        name (string): Phase name
+        **attributes: Attributes of the phase, e.g. resource_id
+
+    Yields:
+        Span: Returns the open span
+    """
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as ex:
+        current.error = '{}: {}'.format(type(ex).__name__, ex)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+        _export(current)
+
+
+def add_exporter(exporter):
+    """Registers an exporter called with every finished span
+
+    Args:
+        exporter (object): Object with an export(span) method
+    """
+
+    with _exporters_lock:
+        _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    """Unregisters an exporter"""
+
+    with _exporters_lock:
+        if exporter in _exporters:
+            _exporters.remove(exporter)
+
+
+def _export(finished_span):
+    for exporter in list(_exporters):
+        exporter.export(finished_span)
+
+
+class JsonLinesExporter:
+    """Appends each finished span as one JSON line to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a')
+
+    def export(self, finished_span):
+        line = json.dumps(finished_span.as_dict(), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        """Closes the trace file"""
+
+        with self._lock:
+            self._file.close()
+
+
+class OpenTelemetryExporter:
+    """Re-emits finished spans through an OpenTelemetry tracer
+
+    Requires opentelemetry-api, spans are sent to whatever tracer provider
+    the application configured. Children finish before their parents, so the
+    span hierarchy is carried by the anf.trace_id, anf.span_id and
+    anf.parent_id attributes.
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer('anf-sample')
+
+    def export(self, finished_span):
+        attributes = {key: str(value) for key, value
+                      in finished_span.attributes.items()}
+        attributes.update({'anf.{}'.format(key): value for key, value
+                           in finished_span.counters.items()})
+        attributes['anf.trace_id'] = finished_span.trace_id
+        attributes['anf.span_id'] = finished_span.span_id
+        if finished_span.parent is not None:
+            attributes['anf.parent_id'] = finished_span.parent.span_id
+
+        start_ns = int(finished_span.start_time * 1e9)
+        otel_span = self._tracer.start_span(finished_span.name,
+                                            start_time=start_ns,
+                                            attributes=attributes)
+        if finished_span.error:
+            otel_span.set_status(self._trace.Status(
+                self._trace.StatusCode.ERROR, finished_span.error))
+        otel_span.end(end_time=start_ns + int(finished_span.duration * 1e9))
+
+
+class ArmCallCounterPolicy(SansIOHTTPPolicy):
+    """Counts ARM calls in the current span, runs once per call
+
+    Status checks of long running operations are issued by SDK polling
+    threads without the caller context, so the operation URLs returned by
+    the initial request are remembered and later calls to them are counted
+    in the span that started the operation.
+    """
+
+    def __init__(self, max_operations=LRO_SPANS_SIZE):
+        self.max_operations = max_operations
+        self._operation_spans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_request(self, request):
+        current = _current_span.get()
+        if current is None:
+            with self._lock:
+                current = self._operation_spans.get(
+                    _strip_query(request.http_request.url))
+        request.context['anf_span'] = current
+        if current is not None:
+            current.add('arm_calls')
+
+    def on_response(self, request, response):
+        current = request.context.get('anf_span')
+        headers = response.http_response.headers
+        if current is None or not any(header in headers
+                                      for header in LRO_HEADERS):
+            return
+
+        urls = [headers[header] for header in LRO_HEADERS
+                if header in headers]
+        urls.append(request.http_request.url)
+        with self._lock:
+            for url in urls:
+                self._operation_spans[_strip_query(url)] = current
+            while len(self._operation_spans) > self.max_operations:
+                self._operation_spans.popitem(last=False)
+
+
+class ArmAttemptCounterPolicy(SansIOHTTPPolicy):
+    """Counts retries in the span of the call, runs once per attempt"""
+
+    def on_request(self, request):
+        context = request.context
+        if context.get('anf_attempted'):
+            current = context.get('anf_span', _current_span.get())
+            if current is not None:
+                current.add('retries')
+        context['anf_attempted'] = True
+
+
+def _strip_query(url):
+    return url.split('?', 1)[0].lower()
+
+
+def get_client_policies():
+    """Gets the keyword arguments adding the counting policies to a client
+
+    Returns:
+        dict: Returns per_call_policies and per_retry_policies entries to be
+            passed to a management client constructor
+    """
+
+    return {'per_call_policies': [ArmCallCounterPolicy()],
+            'per_retry_policies': [ArmAttemptCounterPolicy()]}
+
+
+def configure_from_environment():
+    """Enables the JSON lines exporter when ANF_TRACE_FILE is set
+
+    Returns:
+        JsonLinesExporter: Returns the exporter, None if not enabled
+    """
+
+    path = os.environ.get('ANF_TRACE_FILE')
+    if not path:
+        return None
+
+    exporter = JsonLinesExporter(path)
+    add_exporter(exporter)
+    return exporter
@@ -0,0 +1,154 @@
+# volume_sizing.py Code Sample
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""volume_sizing.py code sample
+
+Throughput-driven volume sizing: given a throughput target in MiB/s and a
+capacity floor, finds the cheapest service level and quota delivering that
+throughput, so capacity is not over-bought only to reach a throughput.
+
+Notes:
+With automatic QoS a volume gets THROUGHPUT_PER_TIB MiB/s per TiB of quota
+(Standard 16, Premium 64, Ultra 128), so each service level needs a
+different quota for the same throughput. Capacity is priced with
+PRICE_PER_GIB_MONTH, approximate pay-as-you-go list prices in USD, which can
+be replaced by the prices of a region or agreement. The result can be
+provisioned with example.create_volume_from_sizing(), in a capacity pool of
+the selected service level.
+
+ANF bills provisioned capacity pools, not volume quotas. By default the
+volume gets a new pool of its own and the whole pool_size is priced, so a
+small quota still costs at least the 4TiB minimum pool. With existing_pool
+(--existing-pool) the volume is placed into a pool of the service level
+that has room for it, and only the quota it takes from that pool is priced.
+
+Usage:
+python volume_sizing.py --throughput 250 [--min-capacity 107374182400]
+    [--existing-pool]
+
+"""
+
+import argparse
+from collections import namedtuple
+from sample_utils import console_output, get_bytes_in_tib
+from pool_planner import GIB, MIN_VOLUME_SIZE, SERVICE_LEVELS, \
+    VolumeRequest, get_pool_size, get_required_quota, get_volume_throughput
+
+# Approximate capacity price of each service level, USD per GiB and month
+PRICE_PER_GIB_MONTH = {'Standard': 0.14746, 'Premium': 0.29419,
+                       'Ultra': 0.39274}
+
+# Highest throughput of a single regular volume
+MAX_VOLUME_THROUGHPUT = 4500
+
+VolumeSizing = namedtuple('VolumeSizing', ['service_level', 'usage_threshold',
+                                           'throughput_mibps',
+                                           'monthly_cost', 'pool_size'])
+VolumeSizing.__doc__ = """Service level and quota of a volume
+
+usage_threshold is the quota in bytes, throughput_mibps the throughput it
+delivers with automatic QoS, pool_size the smallest capacity pool, in bytes,
+able to hold the volume and monthly_cost the price of that pool, or of the
+quota alone when sized for an existing pool.
+"""
+
+
+def get_sizing_options(throughput_mibps, min_capacity=MIN_VOLUME_SIZE,
+                       prices=None, existing_pool=False):
+    """Gets every service level able to meet a throughput target
+
+    Args:
+        throughput_mibps (float): Throughput target in MiB/s
+        min_capacity (long): Optional. Minimum quota in bytes, 100GiB by
+            default
+        prices (dict): Optional. Service level -> price per GiB and month,
+            PRICE_PER_GIB_MONTH by default
+        existing_pool (boolean): Optional. Prices only the quota, for a
+            volume placed into an existing pool with room for it; the new
+            pool sized for the volume is priced by default
+
+    Returns:
+        list: Returns VolumeSizing entries from the cheapest to the most
+            expensive, service levels needing a quota larger than the
+            maximum volume size are left out
+    """
+
+    prices = prices or PRICE_PER_GIB_MONTH
+    options = []
+    if throughput_mibps > MAX_VOLUME_THROUGHPUT:
+        return options
+
+    for service_level in SERVICE_LEVELS:
+        try:
+            quota = get_required_quota(VolumeRequest(
+                None, min_capacity, service_level, throughput_mibps))
+        except ValueError:
+            continue
+        pool_size = get_pool_size(quota)
+        billed = quota if existing_pool else pool_size
+        options.append(VolumeSizing(
+            service_level, quota,
+            get_volume_throughput(quota, service_level),
+            billed / GIB * prices[service_level], pool_size))
+
+    # Equal costs are settled with the lower service level, listed first
+    options.sort(key=lambda option: option.monthly_cost)
+    return options
+
+
+def size_volume(throughput_mibps, min_capacity=MIN_VOLUME_SIZE, prices=None,
+                existing_pool=False):
+    """Gets the cheapest service level and quota meeting a throughput target
+
+    Args:
+        throughput_mibps (float): Throughput target in MiB/s
+        min_capacity (long): Optional. Minimum quota in bytes, 100GiB by
+            default
+        prices (dict): Optional. Service level -> price per GiB and month,
+            PRICE_PER_GIB_MONTH by default
+        existing_pool (boolean): Optional. Prices only the quota, for a
+            volume placed into an existing pool with room for it; the new
+            pool sized for the volume is priced by default
+
+    Returns:
+        VolumeSizing: Returns the cheapest sizing
+
+    Raises:
+        ValueError: No single volume can deliver the throughput with the
+            capacity floor
+    """
+
+    options = get_sizing_options(throughput_mibps, min_capacity, prices,
+                                 existing_pool)
+    if not options:
+        raise ValueError('No service level delivers {}MiB/s with at least '
+                         '{:.1f}TiB in one volume'.format(
+                             throughput_mibps, get_bytes_in_tib(min_capacity)))
+    return options[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--throughput', type=float, required=True,
+                        help='throughput target in MiB/s')
+    parser.add_argument('--min-capacity', type=int, default=MIN_VOLUME_SIZE,
+                        help='minimum quota in bytes')
+    parser.add_argument('--existing-pool', action='store_true',
+                        help='price only the quota, placed into an existing '
+                        'pool')
+    arguments = parser.parse_args()
+
+    cheapest = size_volume(arguments.throughput, arguments.min_capacity,
+                           existing_pool=arguments.existing_pool)
+    for option in get_sizing_options(arguments.throughput,
+                                     arguments.min_capacity,
+                                     existing_pool=arguments.existing_pool):
+        console_output('{}{}: {:.2f}TiB quota, {:.0f}MiB/s, {:.2f} USD/month'
+                       .format('* ' if option == cheapest else '  ',
+                               option.service_level,
+                               get_bytes_in_tib(option.usage_threshold),
+                               option.throughput_mibps, option.monthly_cost))
@@ -0,0 +1,104 @@
+# test_anf_emulator.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of anf_emulator.py through the real SDK client"""
+
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+import anf_emulator
+import example
+import resource_uri_utils
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000001'
+RESOURCE_GROUP_NAME = 'anf01-rg'
+ACCOUNT_NAME = 'account01'
+POOL_NAME = 'pool01'
+VOLUME_NAME = 'volume01'
+
+
+@pytest.fixture
+def emulator():
+    """Emulator whose operations take a tenth of a second"""
+
+    profile = anf_emulator.build_profile(provisioning_delay=1,
+                                         time_scale=0.1)
+    with anf_emulator.ANFEmulator(profile=profile,
+                                  poll_interval=0.1) as running:
+        yield running
+
+
+def build_client(emulator):
+    """Builds a real SDK client talking to the emulator"""
+
+    from azure.mgmt.netapp import NetAppManagementClient
+    return NetAppManagementClient(object(), SUBSCRIPTION_ID,
+                                  **emulator.client_kwargs())
+
+
+def test_create_list_delete_round_trip(emulator):
+    client = build_client(emulator)
+    subnet_id = example.build_subnet_id(SUBSCRIPTION_ID, RESOURCE_GROUP_NAME,
+                                        'vnet-01', 'anf-sn')
+
+    account = client.accounts.begin_create_or_update(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME,
+        example.build_account_body(example.LOCATION)).result()
+    pool = client.pools.begin_create_or_update(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME,
+        example.build_capacitypool_body('Standard', example.CAPACITYPOOL_SIZE,
+                                        example.LOCATION)).result()
+    volume = client.volumes.begin_create_or_update(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME, VOLUME_NAME,
+        example.build_volume_body(VOLUME_NAME, example.VOLUME_USAGE_QUOTA,
+                                  'Standard', subnet_id,
+                                  example.LOCATION)).result()
+
+    assert account.id == resource_uri_utils.build_anf_resource_id(
+        SUBSCRIPTION_ID, RESOURCE_GROUP_NAME, ACCOUNT_NAME)
+    assert resource_uri_utils.get_anf_parent_id(volume.id) == pool.id
+    assert volume.name == '{}/{}/{}'.format(ACCOUNT_NAME, POOL_NAME,
+                                            VOLUME_NAME)
+    assert volume.provisioning_state == 'Succeeded'
+    assert volume.usage_threshold == example.VOLUME_USAGE_QUOTA
+    assert volume.subnet_id == subnet_id
+
+    assert [listed.id for listed in client.accounts.list(
+        RESOURCE_GROUP_NAME)] == [account.id]
+    assert [listed.id for listed in client.pools.list(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME)] == [pool.id]
+    listed = list(client.volumes.list(RESOURCE_GROUP_NAME, ACCOUNT_NAME,
+                                      POOL_NAME))
+    assert [resource.id for resource in listed] == [volume.id]
+    assert listed[0].creation_token == VOLUME_NAME
+
+    client.volumes.begin_delete(RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME,
+                                VOLUME_NAME).result()
+
+    with pytest.raises(ResourceNotFoundError):
+        client.volumes.get(RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME,
+                           VOLUME_NAME)
+    assert list(client.volumes.list(RESOURCE_GROUP_NAME, ACCOUNT_NAME,
+                                    POOL_NAME)) == []
+
+    stats = emulator.stats
+    assert (stats['PUT'], stats['DELETE']) == (3, 1)
+    assert '429' not in stats
+    # One kept-alive connection carried every request
+    assert stats['connections'] == 1
+
+
+def test_missing_parent_is_not_found(emulator):
+    client = build_client(emulator)
+
+    with pytest.raises(ResourceNotFoundError):
+        client.pools.begin_create_or_update(
+            RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME,
+            example.build_capacitypool_body(
+                'Standard', example.CAPACITYPOOL_SIZE,
+                example.LOCATION)).result()
+    with pytest.raises(ResourceNotFoundError):
+        client.accounts.get(RESOURCE_GROUP_NAME, ACCOUNT_NAME)
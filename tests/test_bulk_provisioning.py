@@ -0,0 +1,107 @@
+# test_bulk_provisioning.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of bulk_provisioning.py against the simulated clients"""
+
+import threading
+import bulk_provisioning
+import example
+import fake_clients
+import resource_uri_utils
+import sample_utils
+
+TIME_SCALE = 0.001
+RESOURCE_GROUP_NAME = 'anf01-rg'
+ACCOUNT_NAME = 'account01'
+POOL_NAME = 'pool01'
+
+
+def create_pool(simulation):
+    """Creates an account and a capacity pool, returns the NetApp client"""
+
+    client = fake_clients.FakeNetAppManagementClient(simulation)
+    example.create_account(client, RESOURCE_GROUP_NAME, ACCOUNT_NAME,
+                           example.LOCATION)
+    example.create_capacitypool_async(
+        client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME, 'Standard',
+        example.CAPACITYPOOL_SIZE, example.LOCATION)
+    return client
+
+
+def test_create_volumes_waits_with_the_given_strategy(monkeypatch):
+    # Constant latencies, every volume takes 60 simulated seconds to create
+    # and 5 more to become visible
+    profile = fake_clients.SimulationProfile(time_scale=0.005, seed=1)
+    simulation = fake_clients.Simulation(profile._replace(
+        create_latency=dict(profile.create_latency, **{
+            resource_uri_utils.KIND_VOLUME: fake_clients.LatencyModel(60, 0)}),
+        visibility_delay=fake_clients.LatencyModel(5, 0)))
+    client = create_pool(simulation)
+    subnet_id = example.build_subnet_id(simulation.subscription_id,
+                                        RESOURCE_GROUP_NAME, 'vnet-01',
+                                        'anf-sn')
+    specs = [bulk_provisioning.VolumeSpec(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME,
+        'volume-{:02d}'.format(index), example.VOLUME_USAGE_QUOTA,
+        'Standard', subnet_id, example.LOCATION) for index in range(10)]
+    strategy = fake_clients.scale_strategy(
+        sample_utils.WAIT_STRATEGY_PRIORS[resource_uri_utils.KIND_VOLUME],
+        simulation.profile.time_scale)
+
+    lock = threading.Lock()
+    in_flight = [0, 0]
+    create_volume_from_spec = bulk_provisioning.create_volume_from_spec
+
+    def counting_create_volume_from_spec(*args, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        try:
+            return create_volume_from_spec(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    monkeypatch.setattr(bulk_provisioning, 'create_volume_from_spec',
+                        counting_create_volume_from_spec)
+    result = bulk_provisioning.create_volumes(client, specs, concurrency=5,
+                                              clock=simulation.now,
+                                              strategy=strategy)
+
+    assert len(result.succeeded) == 10
+    assert all(volume_result.wait_result.succeeded
+               for volume_result in result.succeeded)
+    assert in_flight == [0, 5]
+    # Elapsed is measured in simulated seconds: two waves of 5 volumes take
+    # at least 2 * 65s, serial creations would take 650s and the default
+    # volume strategy, in unscaled seconds, thousands
+    assert 130 <= result.elapsed < 400
+    assert all(65 <= volume_result.elapsed < 200
+               for volume_result in result.succeeded)
+
+
+def test_create_volume_from_spec_passes_the_strategy(monkeypatch):
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=TIME_SCALE, seed=1))
+    client = create_pool(simulation)
+    spec = bulk_provisioning.VolumeSpec(
+        RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME, 'volume-01',
+        example.VOLUME_USAGE_QUOTA, 'Standard', 'subnet', example.LOCATION)
+    strategy = sample_utils.fixed_interval_strategy(0.001, 5000)
+    strategies = []
+
+    def wait_for_anf_resource(client, resource_id, strategy=None):
+        strategies.append(strategy)
+        return sample_utils.WaitResult(True, 1, 0.0)
+
+    monkeypatch.setattr(sample_utils, 'wait_for_anf_resource',
+                        wait_for_anf_resource)
+    result = bulk_provisioning.create_volume_from_spec(client, spec,
+                                                       strategy=strategy)
+
+    assert result.error is None
+    assert strategies == [strategy]
@@ -0,0 +1,160 @@
+# test_capacity_report.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of capacity_report.py compute_report() on a fixed inventory"""
+
+from types import SimpleNamespace
+import numpy
+import pytest
+import capacity_report
+import pool_planner
+import resource_uri_utils
+from sample_utils import get_bytes_in_tib, get_tib_in_bytes
+from streaming_inventory import VolumeRecord
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+GIB = 1024 ** 3
+
+
+def pool_id(name):
+    return resource_uri_utils.build_anf_resource_id(
+        SUBSCRIPTION_ID, 'anf01-rg', 'account01', name)
+
+
+def volume_id(pool_name, name):
+    return resource_uri_utils.build_anf_resource_id(
+        SUBSCRIPTION_ID, 'anf01-rg', 'account01', pool_name, name)
+
+
+def build_pool(name, service_level, size, qos_type='Auto',
+               throughput=None):
+    return SimpleNamespace(id=pool_id(name), service_level=service_level,
+                           size=size, qos_type=qos_type,
+                           total_throughput_mibps=throughput)
+
+
+POOLS = [
+    build_pool('auto', 'Standard', get_tib_in_bytes(4)),
+    build_pool('manual', 'premium', get_tib_in_bytes(8), 'Manual', 300.0),
+    build_pool('empty', 'Ultra', 0),
+    build_pool('unused', 'Standard', get_tib_in_bytes(4)),
+]
+
+# Volumes of different pools are interleaved, as listed in parallel
+VOLUMES = [
+    VolumeRecord(volume_id('auto', 'vol01'), get_tib_in_bytes(1)),
+    VolumeRecord(volume_id('manual', 'vol02'), get_tib_in_bytes(2),
+                 throughput_mibps=100.0),
+    VolumeRecord(volume_id('auto', 'vol03'), 512 * GIB),
+    VolumeRecord(volume_id('manual', 'vol04'), get_tib_in_bytes(1)),
+    VolumeRecord(volume_id('empty', 'vol05'), 100 * GIB),
+    VolumeRecord(volume_id('missing', 'vol06'), get_tib_in_bytes(1)),
+]
+
+
+@pytest.fixture
+def report():
+    return capacity_report.compute_report(
+        capacity_report.build_inventory(POOLS, VOLUMES))
+
+
+def test_volumes_of_unknown_pools_are_left_out(report):
+    assert report.volumes['volume_id'] == [volume.id
+                                           for volume in VOLUMES[:5]]
+    assert report.volumes['pool_id'] == [
+        pool_id(name) for name in ('auto', 'manual', 'auto', 'manual',
+                                   'empty')]
+
+
+def test_volume_throughput_follows_the_qos_type(report):
+    throughput = report.volumes['throughput_mibps'].tolist()
+
+    # Automatic QoS: quota times the throughput per TiB of the level
+    assert throughput[0] == 16.0
+    assert throughput[2] == 8.0
+    assert throughput[4] == pytest.approx(100 / 1024 * 128)
+    # Manual QoS: the assigned throughput, nothing when unassigned
+    assert throughput[1] == 100.0
+    assert throughput[3] == 0.0
+
+
+def test_volume_columns_match_the_scalar_helpers(report):
+    for index, volume in enumerate(VOLUMES[:5]):
+        pool = next(pool for pool in POOLS
+                    if pool.id == report.volumes['pool_id'][index])
+        level = pool_planner.normalize_service_level(pool.service_level)
+        if pool.qos_type == 'Manual':
+            throughput = volume.throughput_mibps or 0.0
+        else:
+            throughput = pool_planner.get_volume_throughput(
+                volume.usage_threshold, level)
+
+        assert report.volumes['service_level'][index] == level
+        assert report.volumes['quota_tib'][index] == \
+            get_bytes_in_tib(volume.usage_threshold)
+        assert report.volumes['throughput_mibps'][index] == \
+            pytest.approx(throughput)
+        assert report.volumes['pool_share'][index] == pytest.approx(
+            volume.usage_threshold / pool.size if pool.size else 0.0)
+
+
+def test_pool_columns_match_the_scalar_helpers(report):
+    volume_throughput = dict(zip(report.volumes['volume_id'],
+                                 report.volumes['throughput_mibps']))
+    for index, pool in enumerate(POOLS):
+        volumes = [volume for volume in VOLUMES
+                   if resource_uri_utils.get_anf_parent_id(volume.id) ==
+                   pool.id]
+        allocated = sum(volume.usage_threshold for volume in volumes)
+        level = pool_planner.normalize_service_level(pool.service_level)
+        if pool.qos_type == 'Manual':
+            throughput = pool.total_throughput_mibps
+        else:
+            throughput = pool_planner.get_volume_throughput(pool.size, level)
+
+        assert report.pools['pool_id'][index] == pool.id
+        assert report.pools['service_level'][index] == level
+        assert report.pools['qos_type'][index] == pool.qos_type
+        assert report.pools['size_tib'][index] == get_bytes_in_tib(pool.size)
+        assert report.pools['allocated_tib'][index] == \
+            pytest.approx(get_bytes_in_tib(allocated))
+        assert report.pools['unallocated_tib'][index] == pytest.approx(
+            get_bytes_in_tib(pool.size - allocated))
+        assert report.pools['utilization'][index] == pytest.approx(
+            allocated / pool.size if pool.size else 0.0)
+        assert report.pools['volume_count'][index] == len(volumes)
+        assert report.pools['throughput_mibps'][index] == \
+            pytest.approx(throughput)
+        assert report.pools['allocated_throughput_mibps'][index] == \
+            pytest.approx(sum(volume_throughput[volume.id]
+                              for volume in volumes))
+
+
+def test_bincount_aggregates_interleaved_volumes(report):
+    assert report.pools['volume_count'].tolist() == [2, 2, 1, 0]
+    assert report.pools['allocated_tib'].tolist() == \
+        pytest.approx([1.5, 3, 100 / 1024, 0])
+    assert report.pools['allocated_throughput_mibps'].tolist() == \
+        pytest.approx([24, 100, 12.5, 0])
+    assert report.pools['utilization'].tolist() == \
+        pytest.approx([0.375, 0.375, 0, 0])
+
+
+def test_zero_size_pools_do_not_divide_by_zero(report):
+    assert numpy.isfinite(report.pools['utilization']).all()
+    assert numpy.isfinite(report.volumes['pool_share']).all()
+    assert report.pools['unallocated_tib'][2] == pytest.approx(-100 / 1024)
+
+
+def test_empty_inventory():
+    report = capacity_report.compute_report(
+        capacity_report.build_inventory([], []))
+
+    for columns in (report.pools, report.volumes):
+        assert all(len(column) == 0 for column in columns.values())
+    assert report.pools['size_tib'].sum() == 0
+    assert report.pools['allocated_throughput_mibps'].sum() == 0
@@ -0,0 +1,244 @@
+# test_checkpoint_journal.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of checkpoint_journal.py"""
+
+import json
+import os
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+import anf_emulator
+import checkpoint_journal
+import example
+import lro_manager
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000001'
+RESOURCE_GROUP_NAME = 'anf01-rg'
+ACCOUNT_NAME = 'account01'
+POOL_NAME = 'pool01'
+VOLUME_NAME = 'volume01'
+
+
+@pytest.fixture
+def emulator():
+    """Emulator whose creations take half a second"""
+
+    profile = anf_emulator.build_profile(provisioning_delay=5,
+                                         time_scale=0.1)
+    with anf_emulator.ANFEmulator(profile=profile,
+                                  poll_interval=1) as running:
+        yield running
+
+
+class FakePoller:
+    """Poller of an operation completing right away with a resource"""
+
+    def __init__(self, resource_id, continuation_token):
+        self.resource_id = resource_id
+        self.token = continuation_token
+
+    def continuation_token(self):
+        return self.token
+
+    def result(self):
+        return type('Resource', (), {'id': self.resource_id})()
+
+
+class FakeBeginFunction:
+    """begin_* function recording its calls"""
+
+    def __init__(self, resource_id):
+        self.resource_id = resource_id
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return FakePoller(self.resource_id,
+                          'token-{}'.format(len(self.calls)))
+
+
+def build_client(emulator):
+    """Builds a real SDK client talking to the emulator"""
+
+    from azure.mgmt.netapp import NetAppManagementClient
+    return NetAppManagementClient(object(), SUBSCRIPTION_ID,
+                                  **emulator.client_kwargs())
+
+
+def create_volume(client, journal, manager):
+    """Creates the volume the way run_example does"""
+
+    subnet_id = example.build_subnet_id(SUBSCRIPTION_ID, RESOURCE_GROUP_NAME,
+                                        'vnet-01', 'anf-sn')
+    return example.create_volume(
+        client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME, VOLUME_NAME,
+        example.VOLUME_USAGE_QUOTA, 'Standard', subnet_id, example.LOCATION,
+        journal=journal, manager=manager)
+
+
+def test_restart_reattaches_to_the_managed_operation(emulator, tmp_path):
+    client = build_client(emulator)
+    example.create_account(client, RESOURCE_GROUP_NAME, ACCOUNT_NAME,
+                           example.LOCATION)
+    example.create_capacitypool_async(
+        client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, POOL_NAME, 'Standard',
+        example.CAPACITYPOOL_SIZE, example.LOCATION)
+    puts = emulator.stats['PUT']
+    path = str(tmp_path / 'run.journal')
+    step = 'create_volume/{}/{}/{}'.format(ACCOUNT_NAME, POOL_NAME,
+                                           VOLUME_NAME)
+
+    # The run dies once the operation is started, before it completes
+    journal = checkpoint_journal.CheckpointJournal(path)
+    manager = lro_manager.LROManager(poll_interval=0.05)
+    manager.start()
+    create_volume(client, journal, manager)
+    manager.stop(wait=False)
+    journal.close()
+    record = checkpoint_journal.CheckpointJournal(path).get(step)
+    assert record.state == checkpoint_journal.STATE_STARTED
+    assert record.continuation_token
+
+    journal = checkpoint_journal.CheckpointJournal(path)
+    with lro_manager.LROManager(poll_interval=0.05) as manager:
+        volume = create_volume(client, journal, manager).result(timeout=30)
+    journal.close()
+
+    assert volume.name.endswith(VOLUME_NAME)
+    assert journal.get(step).state == checkpoint_journal.STATE_DONE
+    assert emulator.stats['PUT'] - puts == 1
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'run.journal')
+    journal = checkpoint_journal.CheckpointJournal(path)
+    journal.record('step1', checkpoint_journal.STATE_DONE,
+                   resource_id='/id/1')
+    journal.record('step2', checkpoint_journal.STATE_STARTED,
+                   continuation_token='token')
+    journal.close()
+
+    # Crash while the last record was being written
+    with open(path) as journal_file:
+        lines = journal_file.readlines()
+    with open(path, 'w') as journal_file:
+        journal_file.write(lines[0] + lines[1][:len(lines[1]) // 2])
+
+    journal = checkpoint_journal.CheckpointJournal(path)
+    assert journal.resumed
+    assert len(journal) == 1
+    assert journal.get('step1').resource_id == '/id/1'
+    assert journal.get('step2') is None
+    journal.record('step2', checkpoint_journal.STATE_INTENT)
+    journal.close()
+
+    with open(path) as journal_file:
+        entries = [json.loads(line) for line in journal_file]
+    assert [entry['step'] for entry in entries] == ['step1', 'step2']
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_corrupted_middle_line_is_an_error(tmp_path):
+    path = tmp_path / 'run.journal'
+    path.write_text('{"step": "step1", "state": "done"}\n{"step\n'
+                    '{"step": "step2", "state": "done"}\n')
+
+    with pytest.raises(ValueError):
+        checkpoint_journal.CheckpointJournal(str(path))
+
+
+def test_records_are_on_disk_when_acknowledged(tmp_path, monkeypatch):
+    path = str(tmp_path / 'run.journal')
+    journal = checkpoint_journal.CheckpointJournal(path)
+    synced = []
+    fsync = os.fsync
+
+    def recording_fsync(fd):
+        # The line was flushed to the file before being fsync'd
+        with open(path) as journal_file:
+            synced.append(len(journal_file.readlines()))
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', recording_fsync)
+    journal.record('step1', checkpoint_journal.STATE_INTENT)
+    journal.record('step1', checkpoint_journal.STATE_DONE)
+    journal.close()
+
+    assert synced == [1, 2]
+
+
+def test_values_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'run.journal')
+    names = iter(['account-1', 'account-2'])
+    journal = checkpoint_journal.CheckpointJournal(path)
+    assert journal.get_value('account_name') is None
+    assert journal.get_value('account_name', 'default') == 'default'
+    assert journal.setdefault('account_name', lambda: next(names)) == \
+        'account-1'
+    assert journal.setdefault('account_name', lambda: next(names)) == \
+        'account-1'
+    journal.set_value('sizes', [1, 2])
+    journal.close()
+
+    journal = checkpoint_journal.CheckpointJournal(path)
+    assert journal.setdefault('account_name', lambda: next(names)) == \
+        'account-1'
+    assert journal.get_value('sizes') == [1, 2]
+    journal.finish()
+    assert not os.path.exists(path)
+
+
+def test_run_operation_skips_completed_steps(tmp_path):
+    path = str(tmp_path / 'run.journal')
+    begin_function = FakeBeginFunction('/id/volume01')
+    journal = checkpoint_journal.CheckpointJournal(path)
+
+    result = checkpoint_journal.run_operation(journal, 'create',
+                                              begin_function, 'rg', 'body')
+    assert result.id == '/id/volume01'
+    assert begin_function.calls == [(('rg', 'body'), {})]
+    journal.close()
+
+    with open(path) as journal_file:
+        states = [json.loads(line)['state'] for line in journal_file]
+    assert states == [checkpoint_journal.STATE_INTENT,
+                      checkpoint_journal.STATE_STARTED,
+                      checkpoint_journal.STATE_DONE]
+
+    journal = checkpoint_journal.CheckpointJournal(path)
+    resource = object()
+    assert checkpoint_journal.run_operation(
+        journal, 'create', begin_function, 'rg', 'body',
+        resource_getter=lambda: resource) is resource
+    assert len(begin_function.calls) == 1
+
+    # Without a getter, or with the resource gone, the step runs again
+    def missing_resource():
+        raise ResourceNotFoundError('gone')
+
+    checkpoint_journal.run_operation(journal, 'create', begin_function, 'rg',
+                                     'body', resource_getter=missing_resource)
+    checkpoint_journal.run_operation(journal, 'create', begin_function, 'rg',
+                                     'body')
+    assert len(begin_function.calls) == 3
+    journal.close()
+
+
+def test_run_operation_reattaches_started_steps(tmp_path):
+    path = str(tmp_path / 'run.journal')
+    journal = checkpoint_journal.CheckpointJournal(path)
+    journal.record('create', checkpoint_journal.STATE_STARTED,
+                   continuation_token='token-0')
+    begin_function = FakeBeginFunction('/id/volume01')
+
+    checkpoint_journal.run_operation(journal, 'create', begin_function, 'rg',
+                                     'body')
+    journal.close()
+
+    assert begin_function.calls == [
+        (('rg', 'body'), {'continuation_token': 'token-0'})]
+    assert journal.get('create').state == checkpoint_journal.STATE_DONE
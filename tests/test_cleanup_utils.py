@@ -0,0 +1,130 @@
+# test_cleanup_utils.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of cleanup_utils.py against the simulated clients"""
+
+import threading
+import cleanup_utils
+import example
+import fake_clients
+import resource_uri_utils
+import sample_utils
+
+TIME_SCALE = 0.0005
+RESOURCE_GROUP_NAME = 'anf01-rg'
+ACCOUNT_NAME = 'account01'
+
+
+def create_resources(simulation, pool_count=2, volume_count=3):
+    """Creates an account with pools of volumes, returns the client and ids"""
+
+    client = fake_clients.FakeNetAppManagementClient(simulation)
+    subnet_id = example.build_subnet_id(simulation.subscription_id,
+                                        RESOURCE_GROUP_NAME, 'vnet-01',
+                                        'anf-sn')
+    resource_ids = [example.create_account(
+        client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, example.LOCATION).id]
+    for pool_index in range(pool_count):
+        pool_name = 'pool{:02d}'.format(pool_index)
+        resource_ids.append(example.create_capacitypool_async(
+            client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, pool_name, 'Standard',
+            example.CAPACITYPOOL_SIZE, example.LOCATION).id)
+        for volume_index in range(volume_count):
+            resource_ids.append(example.create_volume(
+                client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, pool_name,
+                'volume{:02d}'.format(volume_index),
+                example.VOLUME_USAGE_QUOTA, 'Standard', subnet_id,
+                example.LOCATION).id)
+    return client, resource_ids
+
+
+class RecordingDeleter:
+    """Delete function recording when each deletion starts and ends"""
+
+    def __init__(self, fail=()):
+        self.events = []
+        self.fail = set(fail)
+        self._lock = threading.Lock()
+
+    def _record(self, event, resource_id):
+        with self._lock:
+            self.events.append((event, resource_id))
+
+    def __call__(self, client, resource_id):
+        self._record('start', resource_id)
+        try:
+            if resource_id in self.fail:
+                raise RuntimeError('cannot delete {}'.format(resource_id))
+            sample_utils.get_anf_resource_deleter(client, resource_id)().wait()
+            wait_result = sample_utils.wait_for_no_anf_resource(
+                client, resource_id, strategy=fake_clients.scale_strategy(
+                    sample_utils.get_wait_strategy(resource_id), TIME_SCALE))
+            assert wait_result.succeeded
+        finally:
+            self._record('end', resource_id)
+
+    def position(self, event, resource_id):
+        return self.events.index((event, resource_id))
+
+
+def test_children_are_deleted_before_their_parent():
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=TIME_SCALE, seed=1))
+    client, resource_ids = create_resources(simulation)
+    deleter = RecordingDeleter()
+
+    result = cleanup_utils.delete_anf_resources(
+        client, reversed(resource_ids), delete_function=deleter)
+
+    assert sorted(result.deleted) == sorted(resource_ids)
+    assert not result.failed and not result.skipped
+    for resource_id in resource_ids:
+        parent_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        if parent_id:
+            assert deleter.position('end', resource_id) < \
+                deleter.position('start', parent_id)
+
+
+def test_volume_deletes_are_serialized_per_pool():
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=TIME_SCALE, seed=1))
+    client, resource_ids = create_resources(simulation, volume_count=4)
+    deleter = RecordingDeleter()
+
+    cleanup_utils.delete_anf_resources(client, resource_ids,
+                                       delete_function=deleter)
+
+    running = {}
+    overlapped_pools = False
+    for event, resource_id in deleter.events:
+        if not resource_uri_utils.is_anf_volume(resource_id):
+            continue
+        pool_id = resource_uri_utils.get_anf_parent_id(resource_id)
+        if event == 'start':
+            assert pool_id not in running
+            running[pool_id] = resource_id
+            overlapped_pools = overlapped_pools or len(running) > 1
+        else:
+            del running[pool_id]
+    # Volumes of different pools are still deleted in parallel
+    assert overlapped_pools
+
+
+def test_failed_deletion_skips_its_ancestors():
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=TIME_SCALE, seed=1))
+    client, resource_ids = create_resources(simulation)
+    account_id, pool_id, failing_id = resource_ids[:3]
+    deleter = RecordingDeleter(fail=[failing_id])
+
+    result = cleanup_utils.delete_anf_resources(client, resource_ids,
+                                                delete_function=deleter)
+
+    assert list(result.failed) == [failing_id]
+    assert sorted(result.skipped) == sorted([pool_id, account_id])
+    # The other pool is deleted anyway
+    assert resource_ids[5] in result.deleted
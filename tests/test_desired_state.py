@@ -0,0 +1,192 @@
+# test_desired_state.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of desired_state.py plan/apply against the simulated clients"""
+
+import copy
+import pytest
+import desired_state
+import example
+import fake_clients
+import resource_uri_utils
+import sample_utils
+
+TIME_SCALE = 0.001
+RESOURCE_GROUP_NAME = 'anf01-rg'
+SUBNET_ID = '/subscriptions/00000000-0000-0000-0000-000000000000/' \
+    'resourceGroups/anf01-rg/providers/Microsoft.Network/virtualNetworks/' \
+    'vnet-01/subnets/anf-sn'
+
+MANIFEST = {
+    'resourceGroup': RESOURCE_GROUP_NAME,
+    'location': example.LOCATION,
+    'subnetId': SUBNET_ID,
+    'accounts': [{
+        'name': 'account01',
+        'tags': {'dept': 'IT'},
+        'capacityPools': [{
+            'name': 'pool01',
+            'serviceLevel': 'Standard',
+            'size': example.CAPACITYPOOL_SIZE,
+            'volumes': [{'name': 'vol01',
+                         'usageThreshold': example.VOLUME_USAGE_QUOTA},
+                        {'name': 'vol02',
+                         'usageThreshold': example.VOLUME_USAGE_QUOTA}]
+        }]
+    }]
+}
+
+
+@pytest.fixture(autouse=True)
+def fast_waits(monkeypatch):
+    """Scales the wait strategies of the creations to the simulation"""
+
+    for kind, strategy in list(sample_utils.WAIT_STRATEGY_PRIORS.items()):
+        monkeypatch.setitem(sample_utils.WAIT_STRATEGY_PRIORS, kind,
+                            fake_clients.scale_strategy(strategy, TIME_SCALE))
+
+
+@pytest.fixture
+def simulation():
+    return fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=TIME_SCALE, seed=1))
+
+
+def converge(simulation, manifest):
+    """Plans and applies a manifest, returns the client and the result"""
+
+    client = fake_clients.FakeNetAppManagementClient(simulation)
+    result = desired_state.apply(client, desired_state.plan(
+        client, manifest, simulation.subscription_id))
+    assert not result.failed and not result.skipped
+    return client, result
+
+
+def kinds(actions):
+    return [resource_uri_utils.parse_resource_id(action.resource_id).kind
+            for action in actions]
+
+
+def test_is_subset_ignores_unset_fields_and_casing():
+    assert desired_state._is_subset(
+        {'location': 'EastUS', 'rules': [{'index': 1, 'nfsv41': None}]},
+        {'location': 'eastus', 'rules': [{'index': 1, 'nfsv41': True}],
+         'provisioning_state': 'Succeeded'})
+    assert not desired_state._is_subset({'rules': [{'index': 1}]},
+                                        {'rules': []})
+    assert not desired_state._is_subset({'size': 1}, {'size': 2})
+    assert desired_state._is_subset({'rules': None}, None)
+
+
+def test_plan_creates_parents_first_then_converges(simulation):
+    client = fake_clients.FakeNetAppManagementClient(simulation)
+    actions = desired_state.plan(client, MANIFEST,
+                                 simulation.subscription_id)
+
+    assert {action.action for action in actions} == \
+        {desired_state.ACTION_CREATE}
+    assert kinds(actions) == [resource_uri_utils.KIND_ACCOUNT,
+                              resource_uri_utils.KIND_CAPACITY_POOL,
+                              resource_uri_utils.KIND_VOLUME,
+                              resource_uri_utils.KIND_VOLUME]
+
+    result = desired_state.apply(client, actions)
+    assert len(result.applied) == 4 and not result.failed
+    # Read-only and default fields returned by the RP are not changes
+    assert desired_state.plan(client, MANIFEST,
+                              simulation.subscription_id) == []
+
+
+def test_tags_and_size_changes_are_patched(simulation):
+    client, _ = converge(simulation, MANIFEST)
+    manifest = copy.deepcopy(MANIFEST)
+    account = manifest['accounts'][0]
+    del account['tags']
+    account['capacityPools'][0]['volumes'][0]['usageThreshold'] *= 2
+    account['capacityPools'][0]['volumes'][1]['tags'] = {'tier': 'gold'}
+
+    actions = desired_state.plan(client, manifest,
+                                 simulation.subscription_id)
+    assert [(action.action, action.changes) for action in actions] == [
+        (desired_state.ACTION_UPDATE, ['tags']),
+        (desired_state.ACTION_UPDATE, ['usage_threshold']),
+        (desired_state.ACTION_UPDATE, ['tags'])]
+
+    puts = simulation.stats['put']
+    result = desired_state.apply(client, actions)
+    assert len(result.applied) == 3 and not result.failed
+    assert simulation.stats['put'] == puts
+    assert simulation.stats['patch'] == 3
+
+    account = client.accounts.get(RESOURCE_GROUP_NAME, 'account01')
+    assert account.tags == {}
+    volume01 = client.volumes.get(RESOURCE_GROUP_NAME, 'account01', 'pool01',
+                                  'vol01')
+    volume02 = client.volumes.get(RESOURCE_GROUP_NAME, 'account01', 'pool01',
+                                  'vol02')
+    assert volume01.usage_threshold == 2 * example.VOLUME_USAGE_QUOTA
+    assert volume02.tags == {'tier': 'gold'}
+    # The patch of the tags carries the size, never the patch model default
+    assert volume02.usage_threshold == example.VOLUME_USAGE_QUOTA
+    assert desired_state.plan(client, manifest,
+                              simulation.subscription_id) == []
+
+
+def test_build_patch_keeps_the_pool_size():
+    body = example.build_capacitypool_body('Premium', 8 * 1024 ** 4,
+                                           example.LOCATION)
+    pool_id = resource_uri_utils.build_anf_resource_id(
+        '00000000-0000-0000-0000-000000000000', RESOURCE_GROUP_NAME,
+        'account01', 'pool01')
+
+    patch = desired_state.build_patch(pool_id, body, ['tags'])
+
+    assert patch.tags == {}
+    assert patch.size == 8 * 1024 ** 4
+
+
+def test_plan_rejects_changes_of_immutable_fields(simulation):
+    client, _ = converge(simulation, MANIFEST)
+    manifest = copy.deepcopy(MANIFEST)
+    pool = manifest['accounts'][0]['capacityPools'][0]
+    pool['serviceLevel'] = 'Premium'
+    pool['volumes'][0]['subnetId'] = SUBNET_ID.replace('anf-sn', 'other-sn')
+
+    with pytest.raises(ValueError) as error:
+        desired_state.plan(client, manifest, simulation.subscription_id)
+
+    message = str(error.value)
+    assert 'pool01 (service_level)' in message
+    assert 'vol01 (service_level, subnet_id)' in message
+    assert simulation.stats['patch'] == 0
+
+
+def test_prune_deletes_after_creates_and_updates(simulation):
+    client, _ = converge(simulation, MANIFEST)
+    manifest = copy.deepcopy(MANIFEST)
+    manifest['prune'] = True
+    pool = manifest['accounts'][0]['capacityPools'][0]
+    pool['tags'] = {'dept': 'IT'}
+    pool['volumes'] = [pool['volumes'][0],
+                       {'name': 'vol03',
+                        'usageThreshold': example.VOLUME_USAGE_QUOTA}]
+
+    actions = desired_state.plan(client, manifest,
+                                 simulation.subscription_id)
+    assert [(action.action, kind) for action, kind in
+            zip(actions, kinds(actions))] == [
+                (desired_state.ACTION_UPDATE,
+                 resource_uri_utils.KIND_CAPACITY_POOL),
+                (desired_state.ACTION_CREATE, resource_uri_utils.KIND_VOLUME),
+                (desired_state.ACTION_DELETE, resource_uri_utils.KIND_VOLUME)]
+    assert actions[-1].resource_id.endswith('/volumes/vol02')
+
+    result = desired_state.apply(client, actions)
+    assert len(result.applied) == 3 and not result.failed
+    assert sorted(volume.name for volume in client.volumes.list(
+        RESOURCE_GROUP_NAME, 'account01', 'pool01')) == \
+        ['account01/pool01/vol01', 'account01/pool01/vol03']
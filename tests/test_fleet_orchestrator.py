@@ -0,0 +1,90 @@
+# test_fleet_orchestrator.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of fleet_orchestrator.py with worker processes"""
+
+import os
+from collections import defaultdict
+import fleet_orchestrator
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+
+
+def dummy_job(factory, shard):
+    """Job run by the workers, behaving as told by the shard location
+
+    "raise" yields two results then raises, "exit" kills its worker and any
+    other location yields five results.
+    """
+
+    if shard.location == 'exit':
+        os._exit(1) # pylint: disable=protected-access
+    for index in range(5):
+        if shard.location == 'raise' and index == 2:
+            raise ValueError('shard failed')
+        yield '{}-{}'.format(shard.resource_group_name, index)
+
+
+def build_shards(*locations):
+    return [fleet_orchestrator.Shard(SUBSCRIPTION_ID, location,
+                                     'rg-{:02d}'.format(index))
+            for index, location in enumerate(locations)]
+
+
+def collect(shards, **kwargs):
+    """Runs iter_fleet, returns the items, errors and finished batches"""
+
+    items, errors, finished = defaultdict(list), {}, defaultdict(int)
+    for batch in fleet_orchestrator.iter_fleet(dummy_job, shards, **kwargs):
+        items[batch.shard].extend(batch.items)
+        if batch.error is not None:
+            errors[batch.shard] = batch.error
+        finished[batch.shard] += batch.finished
+    return items, errors, finished
+
+
+def test_a_raising_shard_does_not_stop_the_others():
+    shards = build_shards('eastus', 'raise', 'westus')
+
+    items, errors, finished = collect(shards, max_workers=2, batch_size=2)
+
+    assert items[shards[0]] == ['rg-00-{}'.format(index)
+                                for index in range(5)]
+    assert items[shards[2]] == ['rg-02-{}'.format(index)
+                                for index in range(5)]
+    # Results produced before the error are still delivered
+    assert items[shards[1]] == ['rg-01-0', 'rg-01-1']
+    assert errors == {shards[1]: 'ValueError: shard failed'}
+    assert all(finished[shard] == 1 for shard in shards)
+
+
+def test_a_killed_worker_fails_its_shard():
+    shards = build_shards('exit')
+
+    items, errors, finished = collect(shards)
+
+    assert items[shards[0]] == []
+    assert 'BrokenProcessPool' in errors[shards[0]]
+    assert finished[shards[0]] == 1
+
+
+def test_run_fleet_reports_every_unfinished_shard():
+    shards = build_shards('eastus', 'exit', 'westus')
+    results = []
+
+    summary = fleet_orchestrator.run_fleet(
+        dummy_job, shards, lambda shard, item: results.append(item),
+        max_workers=3)
+
+    # Shards that did not complete before the pool broke are failed, none
+    # is lost or reported twice
+    assert shards[1] in summary.errors
+    for shard in shards:
+        shard_results = [item for item in results
+                         if item.startswith(shard.resource_group_name)]
+        assert (shard in summary.errors) != (len(shard_results) == 5)
+    assert summary.items == len(results)
@@ -0,0 +1,100 @@
+# test_inventory_cache.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of inventory_cache.py TTL expiry and invalidation"""
+
+import inventory_cache
+import resource_uri_utils
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+SUBNET_ID = '/subscriptions/{}/resourceGroups/anf01-rg/providers/' \
+    'Microsoft.Network/virtualNetworks/vnet-01/subnets/anf-sn'.format(
+        SUBSCRIPTION_ID)
+
+
+class FakeClock:
+    """Clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_id(*names):
+    return resource_uri_utils.build_anf_resource_id(SUBSCRIPTION_ID,
+                                                    'anf01-rg', *names)
+
+
+def test_entries_expire_after_their_ttl():
+    clock = FakeClock()
+    cache = inventory_cache.InventoryCache(ttl=60, clock=clock)
+    account_id = build_id('account01')
+    pool_id = build_id('account01', 'pool01')
+    cache.put(account_id)
+    cache.put(pool_id, exists=False, ttl=10)
+
+    clock.now += 9.9
+    assert cache.exists(account_id) is True
+    assert cache.exists(pool_id) is False
+
+    clock.now += 0.1
+    assert cache.exists(pool_id) is None
+    assert cache.exists(account_id.upper() + '/') is True
+    assert len(cache) == 1
+
+    clock.now += 50
+    assert cache.lookup(account_id) is None
+    assert len(cache) == 0
+
+
+def test_saved_entries_keep_their_expiry(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'cache.json')
+    cache = inventory_cache.InventoryCache(ttl=60, path=path, clock=clock)
+    cache.put(build_id('account01'), {'name': 'account01'})
+    cache.put(build_id('account02'), ttl=5)
+    cache.save()
+
+    clock.now += 30
+    loaded = inventory_cache.InventoryCache(ttl=60, path=path, clock=clock)
+    assert loaded.load() == 1
+    assert loaded.lookup(build_id('account01')).resource == \
+        {'name': 'account01'}
+
+    clock.now += 30
+    assert loaded.exists(build_id('account01')) is None
+
+
+def test_invalidate_removes_the_subtree_only():
+    cache = inventory_cache.InventoryCache(clock=FakeClock())
+    resource_ids = [build_id('account01'),
+                    build_id('account01', 'pool01'),
+                    build_id('account01', 'pool01', 'vol01'),
+                    build_id('account01', 'pool01', 'vol01', 'snap01'),
+                    build_id('account01', 'pool010'),
+                    build_id('account01', 'pool010', 'vol01'),
+                    build_id('account010'),
+                    SUBNET_ID]
+    for resource_id in resource_ids:
+        cache.put(resource_id)
+
+    cache.invalidate(build_id('ACCOUNT01', 'Pool01'))
+
+    # Pools and accounts sharing a name prefix are not descendants
+    assert [cache.exists(resource_id) for resource_id in resource_ids] == \
+        [True, None, None, None, True, True, True, True]
+
+    cache.invalidate(build_id('account01'), subtree=False)
+    assert cache.exists(build_id('account01')) is None
+    assert cache.exists(build_id('account01', 'pool010', 'vol01')) is True
+
+    cache.invalidate(build_id('account01'))
+    cache.invalidate(SUBNET_ID.upper())
+    assert [cache.exists(resource_id) for resource_id in resource_ids] == \
+        [None] * 6 + [True, None]
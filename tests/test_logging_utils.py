@@ -0,0 +1,102 @@
+# test_logging_utils.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of logging_utils.py"""
+
+import json
+import logging
+import threading
+import time
+import pytest
+import logging_utils
+
+
+@pytest.fixture(autouse=True)
+def stopped_backend():
+    """Starts and ends every test without a configured backend"""
+
+    logging_utils.shutdown_logging()
+    yield
+    logging_utils.shutdown_logging()
+
+
+def make_record(level, message, **fields):
+    return logging_utils.LOGGER.makeRecord(
+        logging_utils.LOGGER_NAME, level, '', 0, message, None, None,
+        extra={'fields': fields})
+
+
+def test_sampling_filter_keeps_one_record_in_ten():
+    sampling_filter = logging_utils.SamplingFilter({logging.DEBUG: 0.1})
+
+    kept = [sampling_filter.filter(make_record(logging.DEBUG, str(index)))
+            for index in range(100)]
+
+    assert sum(kept) == 10
+    assert [index for index, keep in enumerate(kept) if keep][:3] == \
+        [0, 10, 20]
+    # Levels without a rate are all kept
+    assert all(sampling_filter.filter(make_record(logging.INFO, 'info'))
+               for _ in range(10))
+
+
+def test_json_formatter_writes_the_fields():
+    record = make_record(logging.WARNING, '  Volume created ',
+                         resource_id='/id/volume01', duration=12.5)
+
+    document = json.loads(logging_utils.JsonFormatter().format(record))
+
+    assert document['level'] == 'WARNING'
+    assert document['message'] == 'Volume created'
+    assert document['resource_id'] == '/id/volume01'
+    assert document['duration'] == 12.5
+    assert document['thread'] == threading.current_thread().name
+    assert 'time' in document and 'header' not in document
+
+
+def test_shutdown_flushes_pending_records(capsys):
+    logging_utils.configure_logging(level=logging.DEBUG, json_output=True,
+                                    sample_rates={logging.DEBUG: 0.5})
+    for index in range(200):
+        logging_utils.log('record {}'.format(index), index=index)
+        logging_utils.log('debug {}'.format(index), logging.DEBUG)
+    logging_utils.log_header('Done')
+    logging_utils.shutdown_logging()
+
+    documents = [json.loads(line)
+                 for line in capsys.readouterr().out.splitlines()]
+    assert [document.get('index') for document in documents
+            if document['level'] == 'INFO' and 'header' not in document] == \
+        list(range(200))
+    assert sum(document['level'] == 'DEBUG' for document in documents) == 100
+    assert documents[-1]['header'] and documents[-1]['message'] == 'Done'
+
+
+def test_get_logger_configures_once(monkeypatch):
+    configure = logging_utils._configure
+    calls = []
+
+    def slow_configure(*args, **kwargs):
+        calls.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return configure(*args, **kwargs)
+
+    monkeypatch.setattr(logging_utils, '_configure', slow_configure)
+    barrier = threading.Barrier(8)
+
+    def get_logger():
+        barrier.wait()
+        logging_utils.get_logger()
+
+    threads = [threading.Thread(target=get_logger) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(logging_utils.LOGGER.handlers) == 1
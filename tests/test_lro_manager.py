@@ -0,0 +1,153 @@
+# test_lro_manager.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of lro_manager.py with a fake polling method"""
+
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from azure.core.exceptions import HttpResponseError
+import lro_manager
+
+
+class FakePolling:
+    """Polling method completing after a number of status checks"""
+
+    def __init__(self, name, steps, delay, log, error=None):
+        self.name = name
+        self.steps = steps
+        self.delay = delay
+        self.log = log
+        self.error = error
+        self.release = None
+
+    def step(self):
+        if self.release is not None:
+            self.release.wait()
+        self.log.append((self.name, time.monotonic()))
+        self.steps -= 1
+        if self.steps > 0:
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+    def next_delay(self):
+        return self.delay
+
+    def resource(self):
+        return self.name
+
+
+def submit(manager, polling, **kwargs):
+    """Submits an operation tracked with a given polling method"""
+
+    manager.polling_method = lambda lro_options=None: polling
+    started = []
+    future = manager.submit(lambda polling: started.append(polling) or
+                            'poller', **kwargs)
+    assert started == [polling]
+    return future
+
+
+def test_operations_are_polled_in_next_check_order():
+    log = []
+    with lro_manager.LROManager(poll_workers=2) as manager:
+        slow = submit(manager, FakePolling('slow', 3, 0.15, log))
+        fast = submit(manager, FakePolling('fast', 3, 0.01, log))
+        assert fast.result(timeout=5) == 'fast'
+        assert not slow.done()
+        assert slow.result(timeout=5) == 'slow'
+
+    slow_checks = [at for name, at in log if name == 'slow']
+    assert len(slow_checks) == 3
+    # Checks of an operation are spaced by the delay it asked for
+    assert all(later - earlier >= 0.14 for earlier, later in
+               zip(slow_checks, slow_checks[1:]))
+
+
+def test_on_start_receives_the_poller():
+    log = []
+    pollers = []
+    with lro_manager.LROManager() as manager:
+        future = submit(manager, FakePolling('op', 1, 0, log),
+                        on_start=pollers.append)
+        assert future.result(timeout=5) == 'op'
+    assert pollers == ['poller']
+
+
+def test_failed_operation_and_failing_callback():
+    log = []
+    error = HttpResponseError(message='Operation failed')
+    called = []
+
+    def failing_callback(future):
+        called.append(future)
+        raise RuntimeError('callback error')
+
+    with lro_manager.LROManager() as manager:
+        failed = submit(manager, FakePolling('failed', 2, 0, log, error),
+                        callback=failing_callback)
+        with pytest.raises(HttpResponseError):
+            failed.result(timeout=5)
+        # A callback raising does not break the manager
+        other = submit(manager, FakePolling('other', 1, 0, log))
+        assert other.result(timeout=5) == 'other'
+    assert called == [failed]
+    assert manager.in_flight == 0
+
+
+def test_stop_waits_for_in_flight_operations():
+    log = []
+    manager = lro_manager.LROManager()
+    manager.start()
+    future = submit(manager, FakePolling('op', 3, 0.05, log))
+
+    manager.stop()
+
+    assert future.done() and future.result() == 'op'
+    assert manager.in_flight == 0
+
+
+def test_stop_without_wait_returns_right_away():
+    log = []
+    polling = FakePolling('op', 1, 0, log)
+    polling.release = threading.Event()
+    manager = lro_manager.LROManager()
+    manager.start()
+    future = submit(manager, polling)
+
+    stopper = threading.Thread(target=manager.stop, args=(False,))
+    stopper.start()
+    time.sleep(0.1)
+    # The running status check is the only thing stop() waits for
+    assert stopper.is_alive()
+    polling.release.set()
+    stopper.join(timeout=5)
+    assert not stopper.is_alive()
+    assert future.result(timeout=5) == 'op'
+
+
+def test_deferred_polling_leaves_the_loop_to_the_manager():
+    polling = lro_manager.DeferredARMPolling(7)
+
+    assert polling.finished()
+    assert polling.run() is None
+
+
+@pytest.mark.parametrize('headers, delay', [
+    ({'retry-after': '3'}, 3),
+    ({'retry-after-ms': '250'}, 0.25),
+    ({}, 7),
+])
+def test_next_delay_honors_retry_after(headers, delay):
+    polling = lro_manager.DeferredARMPolling(7)
+    polling._pipeline_response = SimpleNamespace( # pylint: disable=protected-access
+        http_response=SimpleNamespace(headers=headers))
+
+    assert polling.next_delay() == pytest.approx(delay)
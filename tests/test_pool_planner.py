@@ -0,0 +1,75 @@
+# test_pool_planner.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of the bin packing of pool_planner.py"""
+
+import random
+import pytest
+import pool_planner
+from sample_utils import BYTES_PER_TIB
+
+
+def random_requests(count, seed=1):
+    """Builds volume requests of random sizes, levels and throughputs"""
+
+    generator = random.Random(seed)
+    return [pool_planner.VolumeRequest(
+        'volume-{:04d}'.format(index),
+        generator.randint(pool_planner.MIN_VOLUME_SIZE, 60 * BYTES_PER_TIB),
+        generator.choice(pool_planner.SERVICE_LEVELS),
+        generator.choice((None, 50, 400))) for index in range(count)]
+
+
+def check_plan(pools, requests, max_volumes=pool_planner.MAX_VOLUMES_PER_POOL):
+    """Checks the constraints every planned pool has to meet"""
+
+    placed = []
+    for pool in pools:
+        used = sum(volume.usage_threshold for volume in pool.volumes)
+        assert pool.size >= used
+        assert pool.size % BYTES_PER_TIB == 0
+        assert pool_planner.MIN_POOL_SIZE <= pool.size <= \
+            pool_planner.MAX_POOL_SIZE
+        assert 0 < len(pool.volumes) <= max_volumes
+        for volume in pool.volumes:
+            assert pool_planner.normalize_service_level(
+                volume.request.service_level) == pool.service_level
+            assert volume.usage_threshold >= volume.request.usage_threshold
+            if volume.request.throughput_mibps:
+                assert volume.throughput_mibps >= \
+                    volume.request.throughput_mibps
+            placed.append(volume.request)
+    assert sorted(placed) == sorted(requests)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_random_requests_fit_their_pools(seed):
+    requests = random_requests(300, seed)
+
+    check_plan(pool_planner.plan_pools(requests), requests)
+
+
+def test_volume_count_limit_opens_new_pools():
+    requests = [pool_planner.VolumeRequest(
+        'volume-{:04d}'.format(index), pool_planner.MIN_VOLUME_SIZE,
+        'Standard') for index in range(1200)]
+
+    pools = pool_planner.plan_pools(requests)
+
+    check_plan(pools, requests)
+    assert [len(pool.volumes) for pool in pools] == [500, 500, 200]
+
+
+def test_small_volumes_get_the_minimum_pool():
+    requests = [pool_planner.VolumeRequest('volume', 1, 'premium')]
+
+    pools = pool_planner.plan_pools(requests)
+
+    assert [(pool.service_level, pool.size) for pool in pools] == \
+        [('Premium', pool_planner.MIN_POOL_SIZE)]
+    assert pools[0].volumes[0].usage_threshold == \
+        pool_planner.MIN_VOLUME_SIZE
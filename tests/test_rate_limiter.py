@@ -0,0 +1,73 @@
+# test_rate_limiter.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of the token buckets of rate_limiter.py"""
+
+import pytest
+import rate_limiter
+
+
+class ManualClock:
+    """Clock only moving forward when told to"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_refill_rate():
+    clock = ManualClock()
+    bucket = rate_limiter.TokenBucket(rate=10, capacity=5, clock=clock)
+
+    assert [bucket.reserve() for _ in range(5)] == [0] * 5
+    # Further calls borrow from the future, one token every 1/rate seconds
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+
+    clock.now += 1
+    assert bucket.reserve() == 0
+
+
+def test_refill_is_capped_at_capacity():
+    clock = ManualClock()
+    bucket = rate_limiter.TokenBucket(rate=10, capacity=3, clock=clock)
+
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(3)] == [0] * 3
+    assert bucket.reserve() == pytest.approx(0.1)
+
+
+def test_pause_empties_the_bucket():
+    clock = ManualClock()
+    bucket = rate_limiter.TokenBucket(rate=10, capacity=5, clock=clock)
+
+    bucket.pause(2)
+    assert bucket.reserve() == pytest.approx(2.1)
+
+    clock.now += 5
+    assert bucket.reserve() == 0
+
+
+def test_limiter_splits_reads_and_writes():
+    clock = ManualClock()
+    sleeps = []
+    limiter = rate_limiter.RateLimiter(read_rate=1, read_burst=1,
+                                       write_rate=1, write_burst=1,
+                                       clock=clock, sleep=sleeps.append)
+
+    assert limiter.acquire('GET') == 0
+    assert limiter.acquire('PUT') == 0
+    assert limiter.acquire('HEAD') == pytest.approx(1)
+    assert limiter.acquire('DELETE') == pytest.approx(1)
+
+    limiter.throttled('GET', 3)
+    assert limiter.acquire('GET') > 3
+    assert limiter.stats['calls'] == 5
+    assert limiter.stats['throttled'] == 1
+    assert len(sleeps) == 3
@@ -0,0 +1,105 @@
+# test_resource_index.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of resource_index.py against the simulated clients"""
+
+import example
+import fake_clients
+import resource_index
+import resource_uri_utils
+
+RESOURCE_GROUP_NAME = 'anf01-rg'
+ACCOUNT_NAME = 'account01'
+
+
+def build_index(pool_count=2, volume_count=3):
+    """Creates resources in a simulation and indexes them from list calls"""
+
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=0.0001, seed=1))
+    client = fake_clients.FakeNetAppManagementClient(simulation)
+    subnet_id = example.build_subnet_id(simulation.subscription_id,
+                                        RESOURCE_GROUP_NAME, 'vnet-01',
+                                        'anf-sn')
+    account = example.create_account(client, RESOURCE_GROUP_NAME,
+                                     ACCOUNT_NAME, example.LOCATION)
+    pool_ids = []
+    for pool_index in range(pool_count):
+        pool_name = 'pool{:02d}'.format(pool_index)
+        pool_ids.append(example.create_capacitypool_async(
+            client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, pool_name, 'Standard',
+            example.CAPACITYPOOL_SIZE, example.LOCATION).id)
+        for volume_index in range(volume_count):
+            example.create_volume(
+                client, RESOURCE_GROUP_NAME, ACCOUNT_NAME, pool_name,
+                'volume{:02d}'.format(volume_index),
+                example.VOLUME_USAGE_QUOTA, 'Standard', subnet_id,
+                example.LOCATION)
+    # Lets the creations become visible to list calls
+    simulation.sleep(600)
+
+    index = resource_index.index_resource_group(client, RESOURCE_GROUP_NAME)
+    return index, account.id, pool_ids
+
+
+def test_index_resource_group_builds_the_tree():
+    index, account_id, pool_ids = build_index()
+
+    assert len(index) == 1 + 2 + 6
+    assert index.count(account_id) == 9
+    assert index.count(pool_ids[0]) == 4
+    assert [entry.parent_id for entry in index.walk(
+        pool_ids[0], kind=resource_uri_utils.KIND_VOLUME)] == \
+        [pool_ids[0]] * 3
+
+
+def test_subtree_remove_drops_every_descendant():
+    index, account_id, pool_ids = build_index()
+
+    # Resource ids are case insensitive
+    assert index.remove(pool_ids[0].upper()) == 4
+
+    assert pool_ids[0] not in index
+    assert index.walk(pool_ids[0]) == []
+    assert index.count(account_id) == 5
+    assert len(index) == 5
+    assert all(not entry.resource_id.startswith(pool_ids[0] + '/')
+               for entry in index.walk())
+    assert index.remove(pool_ids[0]) == 0
+
+
+def test_remove_without_subtree_keeps_the_children():
+    index, account_id, pool_ids = build_index()
+
+    assert index.remove(pool_ids[1], subtree=False) == 1
+
+    assert pool_ids[1] not in index
+    assert index.count(pool_ids[1]) == 3
+    # Volumes are now attached to the account, their closest ancestor
+    assert {entry.parent_id for entry in index.walk(
+        pool_ids[1], kind=resource_uri_utils.KIND_VOLUME)} == {account_id}
+
+
+def test_walk_bottom_up_lists_children_first():
+    index, account_id, _ = build_index()
+
+    entries = index.walk(account_id, bottom_up=True)
+    positions = {entry.resource_id: position
+                 for position, entry in enumerate(entries)}
+
+    assert entries[-1].resource_id == account_id
+    for entry in entries:
+        if entry.parent_id is not None:
+            assert positions[entry.resource_id] < positions[entry.parent_id]
+
+
+def test_remove_resource_group_clears_the_index():
+    index, account_id, _ = build_index()
+
+    resource_group_id = account_id.split('/providers/')[0]
+    assert index.remove(resource_group_id) == 9
+    assert len(index) == 0
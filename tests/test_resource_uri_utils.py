@@ -0,0 +1,78 @@
+# test_resource_uri_utils.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of resource_uri_utils.py resource id files"""
+
+import sys
+from types import SimpleNamespace
+import cli
+import resource_uri_utils
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+RESOURCE_IDS = [
+    resource_uri_utils.build_anf_resource_id(SUBSCRIPTION_ID, 'anf01-rg',
+                                             'account01'),
+    resource_uri_utils.build_anf_resource_id(SUBSCRIPTION_ID, 'anf01-rg',
+                                             'account01', 'pool01', 'vol01'),
+]
+
+
+class CountingLines:
+    """Text file stand-in counting the lines read from it"""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self.read_count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self._lines)
+        self.read_count += 1
+        return line
+
+    def read(self):
+        raise AssertionError('The whole file must not be read at once')
+
+
+def test_lines_are_read_lazily():
+    resource_ids_file = CountingLines([RESOURCE_IDS[0] + '\r\n', '\n',
+                                       RESOURCE_IDS[1]])
+
+    lines = resource_uri_utils.iter_resource_id_lines(resource_ids_file)
+
+    assert resource_ids_file.read_count == 0
+    assert next(lines) == RESOURCE_IDS[0]
+    assert resource_ids_file.read_count == 1
+    assert list(lines) == [RESOURCE_IDS[1]]
+
+
+def test_parse_resource_ids_file_skips_blank_lines(tmp_path):
+    path = tmp_path / 'resource_ids.txt'
+    path.write_bytes('\r\n'.join([RESOURCE_IDS[0], '', RESOURCE_IDS[1],
+                                  '']).encode())
+
+    columns = resource_uri_utils.parse_resource_ids_file(str(path))
+
+    assert columns.account == ['account01', 'account01']
+    assert columns.volume == [None, 'vol01']
+    assert list(columns.kind) == [
+        resource_uri_utils.ANF_RESOURCE_KINDS.index(kind)
+        for kind in (resource_uri_utils.KIND_ACCOUNT,
+                     resource_uri_utils.KIND_VOLUME)]
+
+
+def test_parse_ids_reads_stdin_lazily(monkeypatch, capsys):
+    stdin = CountingLines([resource_id + '\n' for resource_id in RESOURCE_IDS])
+    monkeypatch.setattr(sys, 'stdin', stdin)
+
+    cli.parse_ids(SimpleNamespace(path='-', csv=True))
+
+    assert stdin.read_count == 2
+    output = capsys.readouterr().out
+    assert 'vol01' in output and 'account01' in output
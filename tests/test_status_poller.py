@@ -0,0 +1,128 @@
+# test_status_poller.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of status_poller.py list call coalescing"""
+
+from collections import Counter
+from types import SimpleNamespace
+import resource_uri_utils
+import status_poller
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+RESOURCE_GROUP_NAME = 'anf01-rg'
+
+
+class FakeClock:
+    """Clock advanced by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeOperations:
+    """Operation group listing the existing children of a parent"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def list(self, *names):
+        self._client.list_calls[names] += 1
+        return [SimpleNamespace(id=resource_id)
+                for resource_id in self._client.existing
+                if get_names(resource_id)[:-1] == names]
+
+
+def get_names(resource_id):
+    """Gets the resource group and resource names of an ANF resource id"""
+
+    rid = resource_uri_utils.parse_resource_id(resource_id)
+    return tuple(name for name in (rid.resource_group, rid.account, rid.pool,
+                                   rid.volume) if name)
+
+
+class FakeClient:
+    """NetApp client recording the list calls of each parent"""
+
+    def __init__(self):
+        self.existing = set()
+        self.list_calls = Counter()
+        self.accounts = self.pools = self.volumes = FakeOperations(self)
+
+
+def build_id(*names):
+    return resource_uri_utils.build_anf_resource_id(
+        SUBSCRIPTION_ID, RESOURCE_GROUP_NAME, *names)
+
+
+def test_one_list_call_per_parent_and_tick():
+    client = FakeClient()
+    clock = FakeClock()
+    poller = status_poller.CoalescedPoller(client, interval=5, clock=clock)
+    volume_ids = [build_id('account01', pool, 'vol{:02d}'.format(index))
+                  for pool in ('pool01', 'pool02') for index in range(3)]
+    pool_id = build_id('account01', 'pool03')
+    futures = [poller.register(resource_id)
+               for resource_id in volume_ids + [pool_id]]
+
+    assert poller.poll_once() == 5
+    assert client.list_calls == Counter({
+        (RESOURCE_GROUP_NAME, 'account01', 'pool01'): 1,
+        (RESOURCE_GROUP_NAME, 'account01', 'pool02'): 1,
+        (RESOURCE_GROUP_NAME, 'account01'): 1})
+
+    # Nothing is due before the interval elapsed
+    clock.now += 4
+    assert poller.poll_once() == 1
+    assert sum(client.list_calls.values()) == 3
+
+    client.existing.update(volume_ids[:4])
+    clock.now += 1
+    poller.poll_once()
+    assert sum(client.list_calls.values()) == 6
+    assert [future.done() for future in futures] == [True] * 4 + [False] * 3
+
+    # pool01 has no pending wait left and is not listed anymore
+    client.existing.update(volume_ids[4:] + [pool_id])
+    clock.now += 5
+    assert poller.poll_once() is None
+    assert poller.list_calls == sum(client.list_calls.values()) == 8
+    results = [future.result() for future in futures]
+    assert all(result.succeeded for result in results)
+    assert [result.attempts for result in results] == [2] * 4 + [3] * 3
+
+    # No pending wait, no list call
+    clock.now += 5
+    assert poller.poll_once() is None
+    assert poller.list_calls == 8
+
+
+def test_deletions_and_timeouts():
+    client = FakeClient()
+    clock = FakeClock()
+    poller = status_poller.CoalescedPoller(client, interval=5, clock=clock)
+    deleted_id = build_id('account01', 'pool01', 'vol01')
+    kept_id = build_id('account01', 'pool01', 'vol02')
+    client.existing.update([deleted_id, kept_id])
+
+    deleted = poller.register(deleted_id, exists=False)
+    kept = poller.register(kept_id, exists=False, timeout=8)
+    poller.poll_once()
+    client.existing.discard(deleted_id)
+    clock.now += 5
+    poller.poll_once()
+
+    assert deleted.result().succeeded
+    assert not kept.done()
+
+    clock.now += 5
+    assert poller.poll_once() is None
+    assert not kept.result().succeeded
+    assert kept.result().elapsed == 10
+    assert poller.list_calls == 3
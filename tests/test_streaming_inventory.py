@@ -0,0 +1,109 @@
+# test_streaming_inventory.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of streaming_inventory.py page prefetching"""
+
+import threading
+import time
+import pytest
+import streaming_inventory
+
+
+class RecordingPages:
+    """Iterator of numbered pages recording which pages were fetched"""
+
+    def __init__(self, page_count, page_size=3, fail_at=None):
+        self.page_count = page_count
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.fetched = []
+        self.threads = set()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        index = len(self.fetched)
+        if index == self.page_count:
+            raise StopIteration
+        self.threads.add(threading.current_thread().name)
+        self.fetched.append(index)
+        if index == self.fail_at:
+            raise RuntimeError('page {} failed'.format(index))
+        return iter(range(index * self.page_size,
+                          (index + 1) * self.page_size))
+
+
+def test_pages_are_yielded_in_order_and_projected():
+    pages = RecordingPages(4)
+
+    result = list(streaming_inventory.prefetch_pages(pages, str))
+
+    assert result == [[str(item) for item in range(index * 3,
+                                                   (index + 1) * 3)]
+                      for index in range(4)]
+    assert pages.fetched == [0, 1, 2, 3]
+    assert threading.current_thread().name not in pages.threads
+
+
+def test_one_page_is_fetched_ahead():
+    pages = RecordingPages(10)
+    generator = streaming_inventory.prefetch_pages(pages)
+
+    assert next(generator) == [0, 1, 2]
+    # The second page is fetched while the first one is processed, and
+    # nothing more until the caller asks for it
+    deadline = time.monotonic() + 5
+    while len(pages.fetched) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert pages.fetched == [0, 1]
+
+    assert next(generator) == [3, 4, 5]
+    generator.close()
+
+
+def test_closing_early_stops_fetching():
+    pages = RecordingPages(10)
+    generator = streaming_inventory.prefetch_pages(pages)
+
+    assert next(generator) == [0, 1, 2]
+    assert next(generator) == [3, 4, 5]
+    generator.close()
+
+    # Closing waits for the page in flight, then fetches nothing more
+    assert pages.fetched == [0, 1, 2]
+    time.sleep(0.1)
+    assert pages.fetched == [0, 1, 2]
+    with pytest.raises(StopIteration):
+        next(generator)
+
+
+def test_fetch_errors_are_raised_in_order():
+    pages = RecordingPages(5, fail_at=2)
+    generator = streaming_inventory.prefetch_pages(pages)
+
+    assert next(generator) == [0, 1, 2]
+    assert next(generator) == [3, 4, 5]
+    with pytest.raises(RuntimeError, match='page 2 failed'):
+        next(generator)
+    assert pages.fetched == [0, 1, 2]
+
+
+def test_iter_pages_splits_plain_iterables_lazily():
+    consumed = []
+
+    def items():
+        for item in range(7):
+            consumed.append(item)
+            yield item
+
+    pages = streaming_inventory.iter_pages(items(), page_size=3)
+
+    assert next(pages) == [0, 1, 2]
+    assert consumed == [0, 1, 2]
+    assert list(pages) == [[3, 4, 5], [6]]
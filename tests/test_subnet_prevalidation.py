@@ -0,0 +1,190 @@
+# test_subnet_prevalidation.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of subnet_prevalidation.py against the simulated clients"""
+
+import threading
+import pytest
+import example
+import fake_clients
+import sample_utils
+import subnet_prevalidation
+
+API_VERSION = '2018-11-01'
+SUBNET_IDS = [example.build_subnet_id(
+    '00000000-0000-0000-0000-000000000000', 'anf01-rg', 'vnet-01',
+    'subnet-{:02d}'.format(index)) for index in range(3)]
+
+
+@pytest.fixture(autouse=True)
+def head_support(monkeypatch):
+    """Starts every test without any HEAD support remembered"""
+
+    monkeypatch.setattr(sample_utils, '_HEAD_UNSUPPORTED', set())
+
+
+def build_client(head_supported=True):
+    """Builds a resource client knowing the subnets of SUBNET_IDS"""
+
+    simulation = fake_clients.Simulation(fake_clients.SimulationProfile(
+        time_scale=0.001, head_supported=head_supported))
+    for subnet_id in SUBNET_IDS:
+        simulation.add_subnet(subnet_id)
+    return fake_clients.FakeResourceManagementClient(simulation)
+
+
+class BlockingResources:
+    """Resources operation group blocking GET calls until released"""
+
+    def __init__(self, resources):
+        self._resources = resources
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def check_existence_by_id(self, resource_id, api_version, **kwargs):
+        return self._resources.check_existence_by_id(resource_id,
+                                                     api_version, **kwargs)
+
+    def get_by_id(self, resource_id, api_version, **kwargs):
+        self.started.set()
+        assert self.release.wait(10)
+        return self._resources.get_by_id(resource_id, api_version, **kwargs)
+
+
+def test_validate_checks_each_subnet_once():
+    client = build_client()
+    validator = subnet_prevalidation.SubnetValidator(client, API_VERSION)
+
+    checks = validator.validate([SUBNET_IDS[0], SUBNET_IDS[1],
+                                 SUBNET_IDS[0], SUBNET_IDS[1].upper() + '/'])
+
+    assert len(checks) == 3
+    assert all(check.valid for check in checks.values())
+    assert client.simulation.stats['get'] == 2
+
+    # Later calls, in any casing, are answered from the results of the run
+    checks = validator.validate([SUBNET_IDS[1].upper(), SUBNET_IDS[2]])
+    assert all(check.valid for check in checks.values())
+    assert client.simulation.stats['get'] == 3
+    assert len(validator) == 3
+
+
+def test_concurrent_checks_wait_for_the_owner():
+    client = build_client()
+    resources = client.resources = BlockingResources(client.resources)
+    validator = subnet_prevalidation.SubnetValidator(client, API_VERSION)
+    results = []
+
+    owner = threading.Thread(target=lambda: results.append(
+        validator.check(SUBNET_IDS[0])))
+    owner.start()
+    assert resources.started.wait(10)
+
+    # The owner is blocked in its GET, the waiter gets its future
+    waiter = threading.Thread(target=lambda: results.append(
+        validator.validate([SUBNET_IDS[0]])[SUBNET_IDS[0]]))
+    waiter.start()
+    waiter.join(0.05)
+    assert waiter.is_alive()
+
+    resources.release.set()
+    owner.join(10)
+    waiter.join(10)
+
+    assert len(results) == 2
+    assert results[0] is results[1]
+    assert results[0].valid
+    assert client.simulation.stats['get'] == 1
+
+
+def test_errors_are_not_cached(monkeypatch):
+    client = build_client()
+    get_by_id = client.resources.get_by_id
+    calls = []
+
+    def failing_get_by_id(resource_id, api_version, **kwargs):
+        calls.append(resource_id)
+        if len(calls) == 1:
+            raise fake_clients.http_error(500, 'Internal server error')
+        return get_by_id(resource_id, api_version, **kwargs)
+
+    monkeypatch.setattr(client.resources, 'get_by_id', failing_get_by_id)
+    validator = subnet_prevalidation.SubnetValidator(client, API_VERSION)
+
+    check = validator.check(SUBNET_IDS[0])
+    assert not check.valid and check.error.status_code == 500
+    assert 'could not be checked' in check.reason
+    assert len(validator) == 0
+
+    assert validator.check(SUBNET_IDS[0]).valid
+    assert validator.check(SUBNET_IDS[0]).valid
+    assert len(calls) == 2
+
+
+def test_missing_and_undelegated_subnets_are_invalid(monkeypatch):
+    client = build_client()
+    get_by_id = client.resources.get_by_id
+
+    def undelegated_get_by_id(resource_id, api_version, **kwargs):
+        subnet = get_by_id(resource_id, api_version, **kwargs)
+        if resource_id == SUBNET_IDS[1]:
+            subnet['properties']['delegations'] = []
+        return subnet
+
+    monkeypatch.setattr(client.resources, 'get_by_id', undelegated_get_by_id)
+    validator = subnet_prevalidation.SubnetValidator(client, API_VERSION)
+    missing_id = SUBNET_IDS[0].replace('subnet-00', 'missing')
+
+    checks = validator.validate([SUBNET_IDS[0], SUBNET_IDS[1], missing_id])
+
+    assert checks[SUBNET_IDS[0]].valid
+    assert checks[SUBNET_IDS[0]].delegated is True
+    assert checks[SUBNET_IDS[1]].delegated is False
+    assert 'not delegated' in checks[SUBNET_IDS[1]].reason
+    assert checks[missing_id].exists is False
+    assert checks[missing_id].delegated is None
+    assert checks[missing_id].reason.endswith('not found')
+
+
+def test_is_delegated_to_netapp_reads_both_shapes():
+    assert subnet_prevalidation.is_delegated_to_netapp(
+        {'properties': fake_clients.get_subnet_properties(SUBNET_IDS[0])})
+    assert subnet_prevalidation.is_delegated_to_netapp(
+        {'properties': {'delegations': [
+            {'serviceName': 'Microsoft.NetApp/volumes'}]}})
+    assert not subnet_prevalidation.is_delegated_to_netapp(
+        {'properties': {'delegations': [{'properties': {
+            'serviceName': 'Microsoft.Sql/managedInstances'}}]}})
+    assert not subnet_prevalidation.is_delegated_to_netapp({})
+
+
+def test_head_is_skipped_once_unsupported():
+    client = build_client(head_supported=False)
+    validator = subnet_prevalidation.SubnetValidator(
+        client, API_VERSION, check_delegation=False)
+
+    checks = validator.validate(SUBNET_IDS[:1])
+    checks.update(validator.validate(SUBNET_IDS[1:]))
+
+    assert all(check.valid and check.delegated is None
+               for check in checks.values())
+    # Only the first check sends the HEAD answered with 405
+    assert client.simulation.stats['head'] == 1
+    assert client.simulation.stats['get'] == 3
+    assert not sample_utils.is_head_supported(SUBNET_IDS[2], API_VERSION)
+
+
+def test_head_answers_when_supported():
+    client = build_client()
+    validator = subnet_prevalidation.SubnetValidator(
+        client, API_VERSION, check_delegation=False)
+
+    checks = validator.validate(SUBNET_IDS)
+
+    assert all(check.valid for check in checks.values())
+    assert client.simulation.stats['head'] == 3
+    assert client.simulation.stats['get'] == 0
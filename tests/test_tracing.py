@@ -0,0 +1,103 @@
+# test_tracing.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of tracing.py nested spans"""
+
+import contextvars
+import json
+import threading
+import time
+import pytest
+import tracing
+
+
+class RecordingExporter:
+    """Exporter keeping the finished spans"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, finished_span):
+        self.spans.append(finished_span)
+
+
+@pytest.fixture
+def exporter():
+    recording = RecordingExporter()
+    tracing.add_exporter(recording)
+    yield recording
+    tracing.remove_exporter(recording)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces time.perf_counter by a clock advanced by hand"""
+
+    fake_clock = {'now': 100.0}
+    monkeypatch.setattr(time, 'perf_counter', lambda: fake_clock['now'])
+    return fake_clock
+
+
+def test_nested_spans_time_their_own_phase(exporter, clock):
+    with tracing.span('run', account='account01') as run:
+        clock['now'] += 1
+        with tracing.span('create_pool') as create_pool:
+            clock['now'] += 2
+            tracing.record('polls', 3)
+        with tracing.span('create_volume') as create_volume:
+            assert tracing.get_current_span() is create_volume
+            clock['now'] += 4
+            tracing.record('sleep_time', 1.5)
+        assert tracing.get_current_span() is run
+    assert tracing.get_current_span() is None
+
+    assert exporter.spans == [create_pool, create_volume, run]
+    assert (create_pool.duration, create_volume.duration, run.duration) == \
+        (2, 4, 7)
+    assert create_pool.parent is run and create_volume.parent is run
+    assert {span.trace_id for span in exporter.spans} == {run.trace_id}
+    # Counters of the children roll up to the parent
+    assert create_pool.counters['polls'] == 3
+    assert create_volume.counters['sleep_time'] == 1.5
+    assert (run.counters['polls'], run.counters['sleep_time']) == (3, 1.5)
+
+    document = json.loads(json.dumps(create_volume.as_dict()))
+    assert document['parentId'] == run.span_id
+    assert document['duration'] == 4
+    assert run.as_dict()['attributes'] == {'account': 'account01'}
+
+
+def test_failed_span_records_the_error(exporter, clock):
+    with pytest.raises(ValueError):
+        with tracing.span('run'):
+            with tracing.span('create_volume'):
+                clock['now'] += 1
+                raise ValueError('quota exceeded')
+
+    assert [span.error for span in exporter.spans] == \
+        ['ValueError: quota exceeded'] * 2
+    assert [span.duration for span in exporter.spans] == [1, 1]
+
+
+def test_threads_with_a_copied_context_keep_the_parent(exporter):
+    def poll():
+        with tracing.span('poll'):
+            tracing.record('polls')
+
+    with tracing.span('run') as run:
+        copied = threading.Thread(target=contextvars.copy_context().run,
+                                  args=(poll,))
+        # Threads started without a copy of the context have no span
+        orphan = threading.Thread(target=poll)
+        for thread in (copied, orphan):
+            thread.start()
+            thread.join()
+
+    polls = [span for span in exporter.spans if span.name == 'poll']
+    assert [span.parent for span in polls] == [run, None]
+    assert polls[0].trace_id == run.trace_id != polls[1].trace_id
+    assert run.counters['polls'] == 1
@@ -0,0 +1,35 @@
+# test_volume_sizing.py
+#
+# Copyright (c) Microsoft and contributors.  All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Tests of volume_sizing.py"""
+
+import pool_planner
+import volume_sizing
+
+
+def test_small_target_prices_the_provisioned_pool():
+    sizing = volume_sizing.size_volume(16)
+
+    # Ultra only needs a 128GiB quota but still a 4TiB pool
+    assert sizing.service_level == 'Standard'
+    assert sizing.pool_size == pool_planner.MIN_POOL_SIZE
+    assert sizing.monthly_cost == sizing.pool_size / pool_planner.GIB * \
+        volume_sizing.PRICE_PER_GIB_MONTH['Standard']
+
+
+def test_existing_pool_prices_the_quota():
+    sizing = volume_sizing.size_volume(16, existing_pool=True)
+
+    assert sizing.service_level == 'Ultra'
+    assert sizing.monthly_cost == sizing.usage_threshold / \
+        pool_planner.GIB * volume_sizing.PRICE_PER_GIB_MONTH['Ultra']
+
+
+def test_options_meet_the_target():
+    for option in volume_sizing.get_sizing_options(1000):
+        assert option.throughput_mibps >= 1000
+        assert option.pool_size >= option.usage_threshold